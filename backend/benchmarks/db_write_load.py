@@ -0,0 +1,161 @@
+"""
+Database write load test
+Runs concurrent writers against a throwaway SQLite database: "process" writers
+commit what /api/process stores (meeting, tasks and transcript chunks in one
+transaction) while "chat" writers commit single Chat rows like /api/chat.
+Each configuration runs in a fresh subprocess so engine settings come from
+the environment, exactly as in the app:
+
+    inline   - rollback journal, commits run on the event loop (old behaviour)
+    journal  - rollback journal, commits via run_in_session()
+    wal      - WAL + synchronous=NORMAL, commits via run_in_session()
+    async    - WAL over aiosqlite (DATABASE_ASYNC=true, needs aiosqlite)
+
+Reports commits/sec, commit latency percentiles, lock errors and the worst
+event-loop stall seen by a ticker coroutine.
+
+Usage:
+    python -m benchmarks.db_write_load --seconds 10 --process-writers 4 --chat-writers 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+CONFIGS = {
+    "inline": {"SQLITE_WAL": "false", "DATABASE_ASYNC": "false"},
+    "journal": {"SQLITE_WAL": "false", "DATABASE_ASYNC": "false"},
+    "wal": {"SQLITE_WAL": "true", "DATABASE_ASYNC": "false"},
+    "async": {"SQLITE_WAL": "true", "DATABASE_ASYNC": "true"},
+}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000, 2)
+
+
+async def run_load(args):
+    from database import init_db, run_in_session, _run_sync_session, Meeting, Task, Chat, TranscriptChunk
+
+    init_db()
+    inline = args.worker == "inline"
+    transcript = "word " * 2000
+    seed_id = await run_in_session(lambda db: _add_meeting(db, Meeting, transcript))
+
+    latencies = {"process": [], "chat": []}
+    errors = {"process": 0, "chat": 0}
+    deadline = time.perf_counter() + args.seconds
+
+    def process_commit(db):
+        meeting = Meeting(filename="load.mp3", transcript=transcript,
+                          transcript_length=len(transcript), status="completed")
+        db.add(meeting)
+        db.flush()
+        for i in range(args.tasks):
+            db.add(Task(meeting_id=meeting.id, task=f"Task {i}", owner="unknown",
+                        deadline="unknown", confidence=0.5))
+        for i in range(args.chunks):
+            db.add(TranscriptChunk(meeting_id=meeting.id, position=i, text="word " * 200))
+        db.commit()
+
+    def chat_commit(db):
+        db.add(Chat(meeting_id=seed_id, question="What was decided?", answer="answer " * 50))
+        db.commit()
+
+    async def writer(kind, fn):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if inline:
+                    _run_sync_session(fn)
+                else:
+                    await run_in_session(fn)
+                latencies[kind].append(time.perf_counter() - start)
+            except Exception:
+                errors[kind] += 1
+            await asyncio.sleep(0)
+
+    max_stall = 0.0
+
+    async def ticker():
+        nonlocal max_stall
+        interval = 0.005
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            max_stall = max(max_stall, time.perf_counter() - start - interval)
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        ticker(),
+        *[writer("process", process_commit) for _ in range(args.process_writers)],
+        *[writer("chat", chat_commit) for _ in range(args.chat_writers)],
+    )
+    elapsed = time.perf_counter() - started
+
+    return {
+        kind: {
+            "commits": len(samples),
+            "commits_per_sec": round(len(samples) / elapsed, 1),
+            "p50_ms": percentile(samples, 50),
+            "p95_ms": percentile(samples, 95),
+            "p99_ms": percentile(samples, 99),
+            "errors": errors[kind],
+        }
+        for kind, samples in latencies.items()
+    } | {"max_loop_stall_ms": round(max_stall * 1000, 2)}
+
+
+def _add_meeting(db, Meeting, transcript):
+    meeting = Meeting(filename="seed.mp3", transcript=transcript,
+                      transcript_length=len(transcript), status="completed")
+    db.add(meeting)
+    db.commit()
+    return meeting.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--process-writers", type=int, default=4)
+    parser.add_argument("--chat-writers", type=int, default=16)
+    parser.add_argument("--tasks", type=int, default=10, help="Tasks per processed meeting")
+    parser.add_argument("--chunks", type=int, default=20, help="Transcript chunks per processed meeting")
+    parser.add_argument("--configs", default="inline,journal,wal,async")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_load(args))))
+        return
+
+    results = {}
+    for name in [c.strip() for c in args.configs.split(",") if c.strip()]:
+        db_path = os.path.join(tempfile.mkdtemp(), "load.db")
+        env = {**os.environ, **CONFIGS[name], "DATABASE_URL": f"sqlite:///{db_path}"}
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.db_write_load", *sys.argv[1:], "--worker", name],
+            env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            results[name] = {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+            continue
+        results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(json.dumps({
+        "seconds": args.seconds,
+        "process_writers": args.process_writers,
+        "chat_writers": args.chat_writers,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
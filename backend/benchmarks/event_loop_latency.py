@@ -0,0 +1,100 @@
+"""
+Event loop responsiveness benchmark
+Measures /health latency while N transcriptions run in the background.
+If inference blocks the loop, loaded latency jumps from milliseconds to seconds.
+
+Usage (against a running server started with MAX_CONCURRENT_JOBS >= N):
+    python -m benchmarks.event_loop_latency path/to/recording.mp3 --jobs 4
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+import httpx
+
+
+def summarize(samples):
+    """p50/p95/max in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+async def probe_health(client, interval, stop):
+    """Hit /health repeatedly until `stop` is set"""
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def wait_for_jobs(client, job_ids, poll):
+    pending = set(job_ids)
+    while pending:
+        for job_id in list(pending):
+            job = (await client.get(f"/api/jobs/{job_id}")).json()
+            if job["status"] in ("done", "failed"):
+                pending.discard(job_id)
+        await asyncio.sleep(poll)
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+        # Idle baseline
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, args.interval, stop))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        idle = await probe
+
+        # Upload once, then queue N transcriptions of it
+        path = Path(args.audio)
+        with open(path, "rb") as f:
+            upload = (await client.post("/api/upload", files={"file": (path.name, f)})).json()
+
+        job_ids = []
+        for _ in range(args.jobs):
+            queued = (await client.post("/api/process", params={"filename": upload["filename"]})).json()
+            job_ids.append(queued["job_id"])
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, args.interval, stop))
+        start = time.perf_counter()
+        await wait_for_jobs(client, job_ids, poll=1.0)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        loaded = await probe
+
+    return {
+        "jobs": args.jobs,
+        "processing_seconds": round(elapsed, 2),
+        "health_idle": summarize(idle),
+        "health_loaded": summarize(loaded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="Recording to transcribe")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--jobs", type=int, default=4, help="Concurrent transcriptions")
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between /health probes")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Task extraction benchmark: single-shot vs map-reduce
+Runs both strategies over the same transcript against the configured Ollama
+host and reports wall-clock time and task counts. The LLM cache is disabled
+so every run pays full generation cost.
+
+Usage:
+    python -m benchmarks.extraction_map_reduce transcript.txt --runs 3
+    python -m benchmarks.extraction_map_reduce --synthetic-minutes 90
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from config import settings
+from modules.task_extractor import estimate_tokens, extract_tasks, split_transcript
+
+SPEAKERS = ["Alice", "Bob", "Priya", "Marcus", "Chen"]
+FILLER = [
+    "Let's look at the numbers from last sprint.",
+    "I think the dashboard is mostly fine as it is.",
+    "We talked about this in the previous meeting.",
+    "Does anyone have concerns about the rollout?",
+    "The customer feedback has been positive overall.",
+]
+COMMITMENTS = [
+    "{who} will send the revised budget to finance by Friday.",
+    "{who}, can you update the onboarding doc before the next release?",
+    "I'll follow up with the vendor about the contract, said {who}.",
+    "{who} is going to fix the login timeout bug this week.",
+]
+
+
+def synthetic_transcript(minutes: int, seed: int = 0) -> str:
+    """~150 spoken words per minute with a commitment every ~20 sentences"""
+    rng = random.Random(seed)
+    sentences = []
+    while sum(len(s.split()) for s in sentences) < minutes * 150:
+        if rng.random() < 0.05:
+            sentences.append(rng.choice(COMMITMENTS).format(who=rng.choice(SPEAKERS)))
+        else:
+            sentences.append(rng.choice(FILLER))
+    return " ".join(sentences)
+
+
+async def time_strategy(transcript, strategy, runs):
+    timings, counts = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        tasks = await extract_tasks(transcript, model=settings.ollama_model, strategy=strategy)
+        timings.append(time.perf_counter() - start)
+        counts.append(len(tasks))
+    return {
+        "strategy": strategy,
+        "runs": runs,
+        "median_seconds": round(statistics.median(timings), 2),
+        "min_seconds": round(min(timings), 2),
+        "task_counts": counts,
+    }
+
+
+async def run(args):
+    if args.transcript:
+        with open(args.transcript) as f:
+            transcript = f.read()
+    else:
+        transcript = synthetic_transcript(args.synthetic_minutes)
+
+    settings.llm_cache_enabled = False
+    if args.parallelism:
+        settings.extraction_parallelism = args.parallelism
+
+    results = [
+        await time_strategy(transcript, "single", args.runs),
+        await time_strategy(transcript, "map_reduce", args.runs),
+    ]
+    return {
+        "transcript_chars": len(transcript),
+        "estimated_tokens": estimate_tokens(transcript),
+        "segments": len(split_transcript(transcript, settings.extraction_segment_tokens)),
+        "parallelism": settings.extraction_parallelism,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcript", nargs="?", help="Plain-text transcript file")
+    parser.add_argument("--synthetic-minutes", type=int, default=60)
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--parallelism", type=int, default=0, help="Override EXTRACTION_PARALLELISM")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
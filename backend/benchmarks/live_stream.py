@@ -0,0 +1,227 @@
+"""
+Live transcription client / benchmark
+Streams a WAV file (or synthetic meeting audio) to /api/live in real time,
+prints partial and final segments as they arrive and reports finalization
+latency (audio received -> segment final, as measured by the server), the
+partial rate and the wait after stop, as JSON.
+
+By default the app runs in this process (Starlette test client, throwaway
+database, stub Ollama); --url streams to a running server instead (needs the
+websockets package, installed with uvicorn[standard]).
+
+Usage:
+    python -m benchmarks.live_stream meeting.wav
+    python -m benchmarks.live_stream meeting.wav --url ws://localhost:8000/api/live --speed 2
+    python -m benchmarks.live_stream --seconds 60 --quiet
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import wave
+from typing import Any, Dict, List, Optional, Tuple
+from benchmarks.pipeline import percentiles, wav_bytes
+from benchmarks.vad_savings import synthetic_meeting
+
+
+def read_wav(path: Optional[str], seconds: float) -> Tuple[bytes, int, int]:
+    """(PCM16 frames, sample rate, channels)"""
+    if path is None:
+        data = wav_bytes(synthetic_meeting(seconds / 60, 0.6))
+        path = os.path.join(tempfile.mkdtemp(prefix="live-stream-"), "synthetic.wav")
+        with open(path, "wb") as f:
+            f.write(data)
+    with wave.open(path) as f:
+        if f.getsampwidth() != 2:
+            raise SystemExit("Only 16-bit PCM WAV files are supported")
+        return f.readframes(f.getnframes()), f.getframerate(), f.getnchannels()
+
+
+class InProcessConnection:
+    """Starlette test client WebSocket, driven from asyncio"""
+
+    def __init__(self, path: str):
+        from fastapi.testclient import TestClient
+        import main
+
+        self._client = TestClient(main.app)
+        self._client.__enter__()
+        self._context = self._client.websocket_connect(path)
+        self._ws = self._context.__enter__()
+        self._messages: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        try:
+            while True:
+                self._messages.put(self._ws.receive_json())
+        except Exception:
+            self._messages.put(None)
+
+    async def send_bytes(self, data: bytes):
+        self._ws.send_bytes(data)
+
+    async def send_json(self, data: Dict[str, Any]):
+        self._ws.send_text(json.dumps(data))
+
+    async def receive(self) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._messages.get)
+
+    async def close(self):
+        try:
+            self._context.__exit__(None, None, None)
+        finally:
+            self._client.__exit__(None, None, None)
+
+
+class RemoteConnection:
+    def __init__(self, ws):
+        self._ws = ws
+
+    @classmethod
+    async def open(cls, url: str):
+        import websockets
+        return cls(await websockets.connect(url, max_size=None))
+
+    async def send_bytes(self, data: bytes):
+        await self._ws.send(data)
+
+    async def send_json(self, data: Dict[str, Any]):
+        await self._ws.send(json.dumps(data))
+
+    async def receive(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(await self._ws.recv())
+        except Exception:
+            return None
+
+    async def close(self):
+        await self._ws.close()
+
+
+def setup_in_process(args):
+    """Isolated database/uploads and a stub Ollama (must run before importing main)"""
+    from benchmarks.stub_ollama import StubOllama
+
+    workdir = tempfile.mkdtemp(prefix="live-bench-")
+    stub = StubOllama(args.prefill_seconds, args.tokens_per_second).start_in_thread()
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "OLLAMA_HOST": stub.url,
+        "LLM_CACHE_ENABLED": "false",
+        "WHISPER_MODEL": args.whisper_model,
+    })
+    return stub
+
+
+async def stream(args) -> Dict[str, Any]:
+    frames, rate, channels = read_wav(args.file, args.seconds)
+    query = f"?format=pcm16&sample_rate={rate}&channels={channels}"
+    stub = None
+    if args.url:
+        connection = await RemoteConnection.open(args.url + query)
+    else:
+        stub = setup_in_process(args)
+        connection = InProcessConnection("/api/live" + query)
+
+    bytes_per_second = rate * channels * 2
+    chunk = max(2 * channels, int(bytes_per_second * args.chunk_ms / 1000) // (2 * channels) * (2 * channels))
+    audio_seconds = len(frames) / bytes_per_second
+
+    segments: List[Dict[str, Any]] = []
+    tasks: List[Dict[str, Any]] = []
+    partials = 0
+    first_partial: Optional[float] = None
+    done: Optional[Dict[str, Any]] = None
+    errors: List[str] = []
+    started = time.perf_counter()
+    stop_sent: Optional[float] = None
+
+    async def receiver():
+        nonlocal partials, first_partial, done
+        while True:
+            message = await connection.receive()
+            if message is None:
+                return
+            kind = message.get("type")
+            if kind == "partial":
+                partials += 1
+                if first_partial is None:
+                    first_partial = time.perf_counter() - started
+                if not args.quiet:
+                    print(f"  ... [{message['start']:7.2f}] {message['text']}", file=sys.stderr)
+            elif kind == "segment":
+                segments.append(message)
+                if not args.quiet:
+                    print(f"final [{message['start']:7.2f}-{message['end']:7.2f}] {message['text']} "
+                          f"({message['latency_seconds']}s)", file=sys.stderr)
+            elif kind == "task":
+                tasks.append(message)
+                if not args.quiet:
+                    print(f"TASK  {message['task']} ({message['owner']}, {message['deadline']})", file=sys.stderr)
+            elif kind == "error":
+                errors.append(message.get("detail", ""))
+            elif kind == "done":
+                done = message
+                return
+
+    receiving = asyncio.create_task(receiver())
+    try:
+        for offset in range(0, len(frames), chunk):
+            await connection.send_bytes(frames[offset:offset + chunk])
+            if args.speed > 0:
+                # Real-time pacing against the wall clock (no drift)
+                target = started + (offset + chunk) / bytes_per_second / args.speed
+                await asyncio.sleep(max(0.0, target - time.perf_counter()))
+        stop_sent = time.perf_counter()
+        await connection.send_json({"type": "stop"})
+        await asyncio.wait_for(receiving, args.timeout)
+    finally:
+        await connection.close()
+        if stub:
+            stub.stop_thread()
+
+    finished = time.perf_counter()
+    latencies = [s["latency_seconds"] for s in segments if s.get("latency_seconds") is not None]
+    return {
+        "benchmark": "live_stream",
+        "audio_seconds": round(audio_seconds, 2),
+        "speed": args.speed,
+        "chunk_ms": args.chunk_ms,
+        "wall_seconds": round(finished - started, 2),
+        "segments": len(segments),
+        "partials": partials,
+        "first_partial_seconds": round(first_partial, 3) if first_partial is not None else None,
+        "final_latency_seconds": percentiles(latencies),
+        "stop_to_done_seconds": round(finished - stop_sent, 3) if stop_sent else None,
+        "tasks": len(tasks),
+        "meeting_id": done.get("meeting_id") if done else None,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", help="16-bit PCM WAV (default: synthetic audio)")
+    parser.add_argument("--seconds", type=float, default=60, help="Synthetic audio length")
+    parser.add_argument("--url", help="ws:// URL of a running server's /api/live")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Audio per WebSocket message")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed (0 = as fast as possible)")
+    parser.add_argument("--timeout", type=float, default=600, help="Max wait for `done` after stop")
+    parser.add_argument("--whisper-model", default="base", help="WHISPER_MODEL (in-process)")
+    parser.add_argument("--prefill-seconds", type=float, default=0.2, help="Stub Ollama time to first token (in-process)")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Stub Ollama token rate (in-process)")
+    parser.add_argument("--quiet", action="store_true", help="Only print the JSON report")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(stream(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
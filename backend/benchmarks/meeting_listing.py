@@ -0,0 +1,111 @@
+"""
+Meeting listing benchmark
+Seeds a throwaway SQLite database with N meetings (plus tasks) and times
+keyset-paginated pages at increasing depth against OFFSET pagination and
+the old per-row lazy-load listing. Keyset pages should stay flat.
+
+Usage:
+    python -m benchmarks.meeting_listing --meetings 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--meetings", type=int, default=100_000)
+    parser.add_argument("--tasks-per-meeting", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    # Imported after DATABASE_URL is set so the engine points at the temp DB
+    from database import SessionLocal, engine, init_db, Meeting, Task
+    from modules.meeting_queries import encode_cursor, list_meetings_page
+
+    init_db()
+    rng = random.Random(0)
+    start_date = datetime(2024, 1, 1)
+    transcript = "word " * 2000  # ~10 KB per meeting, never read by the listing
+
+    seed_start = time.perf_counter()
+    with engine.begin() as conn:
+        batch = 5000
+        for offset in range(0, args.meetings, batch):
+            ids = range(offset + 1, min(offset + batch, args.meetings) + 1)
+            conn.execute(Meeting.__table__.insert(), [
+                {
+                    "id": i,
+                    "filename": f"meeting_{i}.mp3",
+                    "upload_date": start_date + timedelta(minutes=i),
+                    "transcript": transcript,
+                    "transcript_length": len(transcript),
+                    "status": "completed",
+                }
+                for i in ids
+            ])
+            conn.execute(Task.__table__.insert(), [
+                {"meeting_id": i, "task": f"Task {j} for meeting {i}", "owner": "unknown",
+                 "deadline": "unknown", "confidence": rng.random()}
+                for i in ids for j in range(args.tasks_per_meeting)
+            ])
+    seed_seconds = time.perf_counter() - seed_start
+
+    db = SessionLocal()
+    ordered = db.query(Meeting.upload_date, Meeting.id).order_by(
+        Meeting.upload_date.desc(), Meeting.id.desc()
+    )
+
+    results = []
+    for fraction in (0.0, 0.1, 0.5, 0.99):
+        depth = int(args.meetings * fraction)
+        cursor = None
+        if depth:
+            row = ordered.offset(depth - 1).limit(1).one()
+            cursor = encode_cursor(row.upload_date, row.id)
+
+        def offset_page():
+            rows = (
+                db.query(Meeting)
+                .order_by(Meeting.upload_date.desc(), Meeting.id.desc())
+                .offset(depth).limit(args.page_size).all()
+            )
+            return [len(m.tasks) for m in rows]
+
+        results.append({
+            "depth": depth,
+            "keyset_ms": timed(lambda: list_meetings_page(db, args.page_size, cursor), args.repeat),
+            "offset_n_plus_1_ms": timed(offset_page, args.repeat),
+        })
+        db.expire_all()
+
+    db.close()
+    print(json.dumps({
+        "meetings": args.meetings,
+        "tasks": args.meetings * args.tasks_per_meeting,
+        "page_size": args.page_size,
+        "seed_seconds": round(seed_seconds, 1),
+        "pages": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
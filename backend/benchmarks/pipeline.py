@@ -0,0 +1,318 @@
+"""
+End-to-end pipeline benchmark
+Drives /api/upload -> /api/process -> /api/chat at increasing concurrency with
+synthetic meeting audio (speech-like bursts and room noise, unique per
+session so no cache or dedup kicks in) and a stub Ollama server with
+configurable prefill latency and token rate. Runs fully offline once the
+Whisper model is on disk.
+
+By default the app runs in this process on a throwaway database and upload
+directory (no uvicorn needed); --url targets a running server instead, which
+must be pointed at the stub (OLLAMA_HOST) by whoever started it.
+
+Stage timings come from polling /api/jobs/{id} (resolution --poll-interval):
+queue wait, transcribing, extracting, indexing, saving. RTF is transcribing
+time divided by audio length (below 1.0 = faster than real time). Peak RSS is
+the benchmark process (in-process mode) or --server-pid.
+
+Usage:
+    python -m benchmarks.pipeline --concurrency 1,2,4 --audio-seconds 60 --output run.json
+    python -m benchmarks.pipeline --file meeting.mp3 --prefill-seconds 0.5 --tokens-per-second 20
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import wave
+from typing import Any, Dict, List, Optional
+import numpy as np
+from benchmarks.stub_ollama import StubOllama
+from benchmarks.vad_savings import SAMPLE_RATE, synthetic_meeting
+
+STAGES = ("queued", "transcribing", "extracting", "indexing", "saving")
+QUESTIONS = ("What was decided about the budget?", "Who is booking the venue?", "What are the deadlines?")
+
+
+def percentiles(samples: List[float]) -> Optional[Dict[str, float]]:
+    if not samples:
+        return None
+    values = np.asarray(samples, dtype=np.float64)
+    return {
+        "count": len(samples),
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p95": round(float(np.percentile(values, 95)), 4),
+        "p99": round(float(np.percentile(values, 99)), 4),
+        "max": round(float(values.max()), 4),
+    }
+
+
+def wav_bytes(audio: np.ndarray) -> bytes:
+    """16 kHz mono float32 -> 16-bit PCM WAV"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def make_recording(args, base: Optional[np.ndarray], seed: int) -> bytes:
+    """A distinct recording per session (content hashes must differ)"""
+    if base is None:
+        audio = synthetic_meeting(args.audio_seconds / 60, args.speech_ratio, seed=seed)
+    else:
+        rng = np.random.RandomState(seed)
+        audio = base + (rng.randn(len(base)) * 1e-4).astype(np.float32)
+    return wav_bytes(audio)
+
+
+def peak_rss_mb(server_pid: Optional[int]) -> Optional[float]:
+    if server_pid:
+        try:
+            with open(f"/proc/{server_pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            return None
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def wait_for_job(client, job_id: str, poll_interval: float, timeout: float) -> Dict[str, Any]:
+    """Poll a job to completion, timing each stage as first seen"""
+    start = time.perf_counter()
+    seen: Dict[str, float] = {}
+    stage = "queued"
+    seen[stage] = start
+    while True:
+        job = (await client.get(f"/api/jobs/{job_id}")).json()
+        now = time.perf_counter()
+        current = job["stage"] if job["status"] == "running" else stage
+        if current != stage:
+            seen.setdefault(current, now)
+            stage = current
+        if job["status"] in ("done", "failed"):
+            seen["finished"] = now
+            break
+        if now - start > timeout:
+            raise TimeoutError(f"Job {job_id} still {job['status']} after {timeout:.0f}s")
+        await asyncio.sleep(poll_interval)
+
+    # Durations between consecutive first-seen stage times
+    ordered = sorted(seen.items(), key=lambda item: item[1])
+    durations = {name: ordered[i + 1][1] - at for i, (name, at) in enumerate(ordered[:-1])}
+    return {"job": job, "stages": durations, "total": seen["finished"] - start}
+
+
+async def run_session(client, args, recording: bytes, index: int) -> Dict[str, Any]:
+    timings: Dict[str, Any] = {}
+
+    start = time.perf_counter()
+    response = await client.post(
+        "/api/upload",
+        files={"file": (f"bench-{index}.wav", recording, "audio/wav")}
+    )
+    response.raise_for_status()
+    upload = response.json()
+    timings["upload"] = time.perf_counter() - start
+    timings["upload_mb_per_second"] = len(recording) / 1e6 / timings["upload"]
+
+    response = await client.post("/api/process", params={
+        "filename": upload["filename"],
+        "original_filename": f"bench-{index}.wav",
+    })
+    response.raise_for_status()
+    queued = response.json()
+    outcome = await wait_for_job(client, queued["job_id"], args.poll_interval, args.job_timeout)
+    job = outcome["job"]
+    if job["status"] != "done":
+        return {"ok": False, "error": job.get("error"), **timings}
+
+    timings["process"] = outcome["total"]
+    timings["stages"] = outcome["stages"]
+    timings["task_count"] = job["result"]["task_count"]
+
+    chats = []
+    for i in range(args.chats):
+        start = time.perf_counter()
+        response = await client.post("/api/chat", params={
+            "question": QUESTIONS[i % len(QUESTIONS)],
+            "meeting_id": queued["meeting_id"],
+        })
+        response.raise_for_status()
+        chats.append(time.perf_counter() - start)
+    timings["chat"] = chats
+    timings["total"] = timings["upload"] + timings["process"] + sum(chats)
+    return {"ok": True, **timings}
+
+
+async def run_level(client, args, base, concurrency: int, offset: int, server_pid) -> Dict[str, Any]:
+    sessions = args.sessions or concurrency * 2
+    recordings = [make_recording(args, base, offset + i) for i in range(sessions)]
+    queue: asyncio.Queue = asyncio.Queue()
+    for i, recording in enumerate(recordings):
+        queue.put_nowait((offset + i, recording))
+    results: List[Dict[str, Any]] = []
+
+    async def worker():
+        while True:
+            try:
+                index, recording = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                results.append(await run_session(client, args, recording, index))
+            except Exception as e:
+                results.append({"ok": False, "error": f"{type(e).__name__}: {e}"})
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if r["ok"]]
+    audio_seconds = len(ok) * args.audio_seconds
+    stage_samples: Dict[str, List[float]] = {}
+    for r in ok:
+        for name, seconds in r["stages"].items():
+            stage_samples.setdefault(name, []).append(seconds)
+    transcribe = stage_samples.get("transcribing", [])
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "errors": sorted({r["error"] for r in results if not r["ok"]})[:5],
+        "wall_seconds": round(wall, 3),
+        "throughput": {
+            "sessions_per_second": round(len(ok) / wall, 4) if wall else None,
+            "audio_seconds_per_second": round(audio_seconds / wall, 3) if wall else None,
+            "chats_per_second": round(len(ok) * args.chats / wall, 4) if wall else None,
+        },
+        "latency_seconds": {
+            "upload": percentiles([r["upload"] for r in ok]),
+            "process": percentiles([r["process"] for r in ok]),
+            **{f"stage_{name}": percentiles(stage_samples.get(name, [])) for name in STAGES},
+            "chat": percentiles([c for r in ok for c in r["chat"]]),
+            "session": percentiles([r["total"] for r in ok]),
+        },
+        "upload_mb_per_second": percentiles([r["upload_mb_per_second"] for r in ok]),
+        "rtf": percentiles([seconds / args.audio_seconds for seconds in transcribe]),
+        "process_rtf": percentiles([r["process"] / args.audio_seconds for r in ok]),
+        "tasks_per_session": percentiles([r["task_count"] for r in ok]),
+        "peak_rss_mb": peak_rss_mb(server_pid),
+    }
+
+
+def configure_in_process(args, stub: StubOllama, workdir: str):
+    """Environment for an isolated in-process app (must run before importing main)"""
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "OLLAMA_HOST": stub.url,
+        "OLLAMA_MAX_CONCURRENCY": str(args.llm_concurrency),
+        "LLM_CACHE_ENABLED": "false",
+        "LLM_CACHE_PATH": "",
+        "TRANSCRIPT_CACHE_ENABLED": "false",
+        "WHISPER_MODEL": args.whisper_model,
+        "MAX_FILE_SIZE_MB": "2048",
+    })
+    if args.max_jobs:
+        os.environ["MAX_CONCURRENT_JOBS"] = str(args.max_jobs)
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    base = None
+    if args.file:
+        import whisper
+        base = whisper.load_audio(args.file)
+        args.audio_seconds = len(base) / SAMPLE_RATE
+
+    stub = StubOllama(args.prefill_seconds, args.tokens_per_second, args.stub_parallel).start_in_thread()
+    report: Dict[str, Any] = {
+        "benchmark": "pipeline",
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "levels": [],
+    }
+
+    try:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=None)
+            app_startup = app_shutdown = None
+        else:
+            workdir = tempfile.mkdtemp(prefix="pipeline-bench-")
+            configure_in_process(args, stub, workdir)
+            import main
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=None)
+            app_startup, app_shutdown = main.startup_event, main.shutdown_event
+            report["config"]["workdir"] = workdir
+
+        if app_startup:
+            await app_startup()
+        try:
+            offset = 0
+            for concurrency in levels:
+                level = await run_level(client, args, base, concurrency, offset, args.server_pid)
+                offset += level["sessions"]
+                report["levels"].append(level)
+                print(f"concurrency {concurrency}: {level['succeeded']}/{level['sessions']} ok, "
+                      f"process p50 {(level['latency_seconds']['process'] or {}).get('p50')}s, "
+                      f"chat p50 {(level['latency_seconds']['chat'] or {}).get('p50')}s, "
+                      f"{level['throughput']['audio_seconds_per_second']} audio-s/s", file=sys.stderr, flush=True)
+        finally:
+            if app_shutdown:
+                await app_shutdown()
+            await client.aclose()
+    finally:
+        report["stub_ollama"] = {"requests": dict(stub.requests), "peak_active": stub.peak_active}
+        stub.stop_thread()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated concurrent sessions per level")
+    parser.add_argument("--sessions", type=int, default=0, help="Sessions per level (default 2x concurrency)")
+    parser.add_argument("--chats", type=int, default=2, help="Chat questions per session")
+    parser.add_argument("--audio-seconds", type=float, default=60)
+    parser.add_argument("--speech-ratio", type=float, default=0.6)
+    parser.add_argument("--file", help="Use this recording instead of synthetic audio")
+    parser.add_argument("--prefill-seconds", type=float, default=0.2, help="Stub Ollama time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Stub Ollama generation rate")
+    parser.add_argument("--stub-parallel", type=int, default=1, help="Stub Ollama parallel generations (0 = unlimited)")
+    parser.add_argument("--llm-concurrency", type=int, default=2, help="OLLAMA_MAX_CONCURRENCY (in-process)")
+    parser.add_argument("--max-jobs", type=int, default=0, help="MAX_CONCURRENT_JOBS (in-process)")
+    parser.add_argument("--whisper-model", default="tiny", help="WHISPER_MODEL (in-process)")
+    parser.add_argument("--url", help="Benchmark a running server instead of an in-process app")
+    parser.add_argument("--server-pid", type=int, help="Server process for peak RSS with --url (Linux)")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--job-timeout", type=float, default=3600)
+    parser.add_argument("--output", help="Write the JSON report here (default stdout)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Stub Ollama server
+Speaks enough of the Ollama HTTP API (/api/chat, /api/generate,
+/api/embeddings, /api/tags) to run the backend without a model: each
+generation waits --prefill-seconds, then streams tokens at --tokens-per-second.
+Extraction prompts (JSON/schema format) get a small task list, everything
+else a canned answer. Standard library only.
+
+Usage:
+    python -m benchmarks.stub_ollama --port 11435 --prefill-seconds 0.2 --tokens-per-second 40
+    OLLAMA_HOST=http://127.0.0.1:11435 python main.py
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+TASKS_RESPONSE = json.dumps({"tasks": [
+    {"task": "Send the revised budget to finance", "owner": "Alice", "deadline": "Friday", "confidence": 0.9},
+    {"task": "Book the venue for the offsite", "owner": "Bob", "deadline": "unknown", "confidence": 0.7},
+]})
+ANSWER_RESPONSE = "The team agreed to revisit the budget on Friday and Bob will book the venue."
+
+
+def tokenize(text: str) -> List[str]:
+    """Roughly word-sized tokens that concatenate back to `text`"""
+    tokens, current = [], ""
+    for ch in text:
+        current += ch
+        if ch in " ,:{}[]":
+            tokens.append(current)
+            current = ""
+    if current:
+        tokens.append(current)
+    return tokens
+
+
+class StubOllama:
+    """asyncio HTTP/1.1 server with keep-alive and chunked NDJSON streaming"""
+
+    def __init__(self, prefill_seconds: float = 0.1, tokens_per_second: float = 50.0,
+                 max_parallel: int = 0, embedding_dim: int = 64):
+        self.prefill_seconds = prefill_seconds
+        self.tokens_per_second = tokens_per_second
+        # Like OLLAMA_NUM_PARALLEL: requests beyond this wait (0 = unlimited)
+        self.max_parallel = max_parallel
+        self.embedding_dim = embedding_dim
+        self.requests: Dict[str, int] = {}
+        self.active = 0
+        self.peak_active = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.port = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._slots = asyncio.Semaphore(self.max_parallel) if self.max_parallel > 0 else None
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def start_in_thread(self, host: str = "127.0.0.1", port: int = 0) -> "StubOllama":
+        """Run on a private event loop in a daemon thread (for synchronous callers)"""
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start(host, port))
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="stub-ollama", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self):
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+        return method, path, headers, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, _, body = request
+                payload = json.loads(body) if body else {}
+                self.requests[path] = self.requests.get(path, 0) + 1
+                await self._route(method, path, payload, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, payload: Dict[str, Any], writer: asyncio.StreamWriter):
+        if path == "/api/tags":
+            await self._send_json(writer, {"models": [{"name": "stub:latest"}]})
+        elif path in ("/api/embeddings", "/api/embed"):
+            prompt = payload.get("prompt") or ""
+            vector = [((hash(prompt) >> i) & 0xFF) / 255.0 for i in range(self.embedding_dim)]
+            await self._send_json(writer, {"embedding": vector})
+        elif path in ("/api/chat", "/api/generate"):
+            await self._generate(path, payload, writer)
+        else:
+            await self._send_json(writer, {"error": f"unknown endpoint {path}"}, status=404)
+
+    async def _generate(self, path: str, payload: Dict[str, Any], writer: asyncio.StreamWriter):
+        is_chat = path == "/api/chat"
+        if is_chat:
+            prompt = " ".join(m.get("content", "") for m in payload.get("messages") or [])
+        else:
+            prompt = payload.get("prompt", "")
+        if not prompt:
+            # Empty prompt = load the model (warm-up)
+            await self._send_json(writer, self._final(payload, is_chat, "", 0, 0.0, 0.0))
+            return
+
+        text = TASKS_RESPONSE if payload.get("format") else ANSWER_RESPONSE
+        tokens = tokenize(text)
+        stream = payload.get("stream", True)
+
+        if self._slots:
+            await self._slots.acquire()
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            start = time.perf_counter()
+            await asyncio.sleep(self.prefill_seconds)
+            prefill = time.perf_counter() - start
+            interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+            if not stream:
+                await asyncio.sleep(interval * len(tokens))
+                generation = time.perf_counter() - start - prefill
+                await self._send_json(writer, self._final(payload, is_chat, text, len(tokens), prefill, generation))
+                return
+
+            self._start_chunked(writer)
+            for token in tokens:
+                await asyncio.sleep(interval)
+                part = {"model": payload.get("model"), "created_at": _now(), "done": False}
+                if is_chat:
+                    part["message"] = {"role": "assistant", "content": token}
+                else:
+                    part["response"] = token
+                await self._send_chunk(writer, part)
+            generation = time.perf_counter() - start - prefill
+            await self._send_chunk(writer, self._final(payload, is_chat, "", len(tokens), prefill, generation))
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            self.active -= 1
+            if self._slots:
+                self._slots.release()
+
+    def _final(self, payload, is_chat, text, count, prefill, generation) -> Dict[str, Any]:
+        final = {
+            "model": payload.get("model"),
+            "created_at": _now(),
+            "done": True,
+            "total_duration": int((prefill + generation) * 1e9),
+            "prompt_eval_count": 0,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": count,
+            "eval_duration": int(generation * 1e9),
+        }
+        if is_chat:
+            final["message"] = {"role": "assistant", "content": text}
+        else:
+            final["response"] = text
+        return final
+
+    async def _send_json(self, writer: asyncio.StreamWriter, data: Dict[str, Any], status: int = 200):
+        body = json.dumps(data).encode()
+        reason = "OK" if status == 200 else "Not Found"
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+    def _start_chunked(self, writer: asyncio.StreamWriter):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+
+    async def _send_chunk(self, writer: asyncio.StreamWriter, data: Dict[str, Any]):
+        line = json.dumps(data).encode() + b"\n"
+        writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        await writer.drain()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--prefill-seconds", type=float, default=0.1)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--max-parallel", type=int, default=0, help="Concurrent generations (0 = unlimited)")
+    args = parser.parse_args()
+
+    async def run():
+        stub = StubOllama(args.prefill_seconds, args.tokens_per_second, args.max_parallel)
+        await stub.start(args.host, args.port)
+        print(f"Stub Ollama listening on {stub.url}", flush=True)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -12,22 +12,127 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./meetings.db"
+    database_async: bool = False  # AsyncSession via aiosqlite/asyncpg
+    
+    # SQLite tuning (applied per connection)
+    sqlite_wal: bool = True  # journal_mode=WAL + synchronous=NORMAL
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size_mb: int = 256
+    sqlite_cache_size_mb: int = 64
+    
+    # Connection pool (Postgres and other server databases)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle_seconds: int = 1800
+    db_pool_timeout_seconds: int = 30
     
     # File Upload
     upload_dir: str = "./uploads"
     max_file_size_mb: int = 100
     
+    # Upload storage lifecycle
+    storage_max_age_hours: int = 168  # 0 disables age-based eviction
+    storage_quota_mb: int = 5120  # 0 disables quota eviction
+    storage_sweep_interval_seconds: int = 600
+    storage_transcode_format: str = ""  # opus or flac; empty keeps the original
+    audio_keep_pcm: bool = False  # Keep decoded .<content hash>.pcm (32 KB per audio second) for re-transcription
+    
     # Ollama
     ollama_host: str = "http://localhost:11434"
     ollama_model: str = "llama3.1:8b"
+    ollama_keep_alive: str = "30m"  # How long the server keeps the model loaded after a call
+    ollama_warmup: bool = True  # Load the model at startup
+    ollama_max_concurrency: int = 2  # In-flight generations across chat and extraction
+    ollama_connect_timeout_seconds: float = 5.0
+    ollama_chat_timeout_seconds: float = 120.0
+    ollama_extraction_timeout_seconds: float = 600.0
+    ollama_stream_idle_timeout_seconds: float = 60.0  # Max gap between streamed tokens
+    ollama_warmup_timeout_seconds: float = 300.0
     
     # Whisper
     whisper_model: str = "base"
+    whisper_models: str = ""  # Extra sizes selectable per request, comma-separated
+    whisper_pool_size: int = 1  # Loaded instances per model
+    whisper_backend: str = "auto"  # auto, openai, faster-whisper
+    whisper_device: str = "cpu"
+    whisper_compute_type: str = "int8"  # faster-whisper only
+    whisper_preload: bool = True
+    
+    # Chunked transcription for long recordings
+    whisper_chunking: bool = True
+    whisper_chunk_min_seconds: int = 900  # Only chunk recordings at least this long
+    whisper_chunk_seconds: int = 300
+    whisper_chunk_overlap_seconds: float = 2.0
+    whisper_chunk_workers: int = 2
+    
+    # Voice activity detection pre-pass (skip silence before Whisper)
+    vad_enabled: bool = False
+    vad_backend: str = "energy"  # energy or silero (needs the silero-vad package)
+    vad_threshold_db: float = 12.0  # Energy detector: dB above the noise floor counted as speech
+    vad_pad_seconds: float = 0.3  # Kept around each speech region
+    vad_min_silence_seconds: float = 1.0  # Shorter pauses are kept
+    vad_min_speech_seconds: float = 0.25  # Shorter bursts are dropped
+    vad_gap_seconds: float = 0.3  # Silence left between joined regions
+    
+    # Transcript cache (skip Whisper for already-transcribed audio)
+    transcript_cache_enabled: bool = True
+    transcript_cache_max_mb: int = 512
+    transcript_cache_max_entries: int = 10000
+    
+    # Task extraction (map-reduce for transcripts longer than the model context)
+    extraction_map_reduce_threshold_tokens: int = 6000  # 0 disables map-reduce
+    extraction_segment_tokens: int = 3000
+    extraction_parallelism: int = 2
+    extraction_format: str = "schema"  # schema (Ollama >= 0.5, falls back to json), json or text
+    extraction_max_retries: int = 3
+    extraction_retry_base_seconds: float = 1.0
+    extraction_retry_max_seconds: float = 8.0
+    extraction_log_sample_rate: float = 0.0  # Fraction of full responses logged at DEBUG
+    reextract_concurrency: int = 2  # Meetings re-extracted at once by /api/reextract
+    reextract_commit_batch: int = 20  # Meetings whose tasks are replaced per transaction
+    
+    # Retrieval-based chat
+    retrieval_chunk_tokens: int = 200
+    retrieval_top_k: int = 4
+    retrieval_embedding_model: str = ""  # e.g. nomic-embed-text; empty = BM25 only
+    
+    # LLM response cache (extraction + chat)
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 1000
+    llm_cache_ttl_seconds: int = 86400
+    llm_cache_path: str = ""  # SQLite file for persistence, empty = memory only
+    
+    # Bulk writes
+    chat_flush_interval_ms: int = 500  # Max delay before buffered chats are inserted
+    chat_buffer_max_pending: int = 200  # Flush early once this many chats are waiting
+    import_batch_size: int = 500  # Meetings per transaction in /api/import
+    
+    # Batch processing (/api/batch and python -m modules.batch)
+    batch_root: str = ""  # Server directory /api/batch may read from; empty disables the endpoint
+    batch_workers: int = 2
+    
+    # Live transcription (WebSocket /api/live)
+    live_enabled: bool = True
+    live_max_sessions: int = 4
+    live_step_seconds: float = 1.0  # Re-decode once this much new audio has arrived
+    live_window_seconds: float = 15.0  # Most audio decoded per pass; bounds latency per chunk
+    live_holdback_seconds: float = 1.0  # Segments ending this close to the window edge stay partial
+    live_extract_min_words: int = 120  # Finalized words per incremental extraction call
+    live_max_buffer_seconds: float = 120.0  # Audio waiting for Whisper before the session is stopped
+    
+    # Background jobs
+    max_concurrent_jobs: int = 1
+    max_background_jobs: int = 1  # Batch/re-extraction workers, separate from uploads
+    job_history_limit: int = 200
     
     # Environment
     environment: str = "development"
     log_level: str = "INFO"
     
+    # Observability
+    metrics_enabled: bool = True  # GET /metrics (Prometheus text format)
+    tracing: str = ""  # "", log or otel
+    
     # CORS - can be comma-separated string or list
     cors_origins: Union[List[str], str] = "http://localhost:5173,http://localhost:3000"
     
@@ -1,36 +1,163 @@
 """
 Database models and session management
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime, ForeignKey
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, TypeVar
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, Text, DateTime, ForeignKey, Index
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session, sessionmaker, relationship, deferred
 from datetime import datetime
 from config import settings
+from modules import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Driver used for each dialect when DATABASE_ASYNC is enabled
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Dialect-specific create_engine() arguments"""
+    if is_sqlite(url):
+        # busy_timeout is also set as a pragma; the driver timeout covers the connect itself
+        return {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": settings.sqlite_busy_timeout_ms / 1000,
+            }
+        }
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_pre_ping": True,
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Per-connection SQLite tuning:
+    WAL lets readers proceed during a write, synchronous=NORMAL drops the fsync
+    per commit (still durable at checkpoints), busy_timeout makes writers wait
+    for the lock instead of failing with "database is locked"
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        if settings.sqlite_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_mb) * 1024 * 1024}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_mb) * 1024}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def build_engine(url: str):
+    """Sync engine with SQLite pragmas or a sized connection pool"""
+    new_engine = create_engine(url, **_engine_options(url))
+    if is_sqlite(url):
+        event.listen(new_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
+
+def async_url(url: str) -> str:
+    """sqlite:///x.db -> sqlite+aiosqlite:///x.db, postgresql://... -> postgresql+asyncpg://..."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str):
+    """Async engine over aiosqlite/asyncpg with the same tuning as the sync one"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    options = _engine_options(url)
+    if is_sqlite(url):
+        options["connect_args"].pop("check_same_thread", None)
+    new_engine = create_async_engine(async_url(url), **options)
+    if is_sqlite(url):
+        event.listen(new_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return new_engine
+
 
 # Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+engine = build_engine(settings.database_url)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# Commit timing for /metrics (flush + COMMIT, every session class)
+@event.listens_for(Session, "before_commit")
+def _commit_started(session: Session):
+    session.info["commit_started"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_finished(session: Session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        metrics.DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
+
+@event.listens_for(Session, "after_rollback")
+def _commit_abandoned(session: Session):
+    session.info.pop("commit_started", None)
+
+
+# Optional async engine (DATABASE_ASYNC=true, requires aiosqlite or asyncpg)
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    async_engine = build_async_engine(settings.database_url)
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
 class Meeting(Base):
     """Meeting record with metadata"""
     __tablename__ = "meetings"
+    __table_args__ = (
+        # Keyset pagination: ORDER BY upload_date DESC, id DESC
+        Index("ix_meetings_upload_date_id", "upload_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, nullable=False)
     upload_date = Column(DateTime, default=datetime.utcnow)
-    transcript = Column(Text, nullable=False)
+    # Deferred: loaded only when accessed, never by listings
+    transcript = deferred(Column(Text, nullable=False))
     transcript_length = Column(Integer, nullable=False)
     status = Column(String, default="completed")  # processing, completed, failed
+    audio_hash = Column(String, index=True, nullable=True)  # SHA-256 of the uploaded recording
+    # Prompt version and Ollama model behind the stored tasks (NULL = never extracted successfully)
+    extractor_version = Column(String, nullable=True)
+    extraction_model = Column(String, nullable=True)
     
     # Relationships
     tasks = relationship("Task", back_populates="meeting", cascade="all, delete-orphan")
     chats = relationship("Chat", back_populates="meeting", cascade="all, delete-orphan")
+    chunks = relationship("TranscriptChunk", back_populates="meeting", cascade="all, delete-orphan")
+    segments = relationship("TranscriptSegment", back_populates="meeting", cascade="all, delete-orphan",
+                            order_by="TranscriptSegment.position")
 
 
 class Task(Base):
@@ -38,11 +165,13 @@ class Task(Base):
     __tablename__ = "tasks"
     
     id = Column(Integer, primary_key=True, index=True)
-    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=False)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=False, index=True)
     task = Column(Text, nullable=False)
     owner = Column(String, default="unknown")
     deadline = Column(String, default="unknown")
     confidence = Column(Float, default=0.5)
+    extractor_version = Column(String, nullable=True)
+    extraction_model = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship
@@ -54,7 +183,7 @@ class Chat(Base):
     __tablename__ = "chats"
     
     id = Column(Integer, primary_key=True, index=True)
-    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=False)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=False, index=True)
     question = Column(Text, nullable=False)
     answer = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -63,9 +192,91 @@ class Chat(Base):
     meeting = relationship("Meeting", back_populates="chats")
 
 
+class TranscriptChunk(Base):
+    """Transcript slice indexed for retrieval-based chat"""
+    __tablename__ = "transcript_chunks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    embedding = Column(Text, nullable=True)  # JSON vector when embeddings are enabled
+    
+    # Relationship
+    meeting = relationship("Meeting", back_populates="chunks")
+
+
+class TranscriptSegment(Base):
+    """Timestamped Whisper segment; the transcript is served in ranges of these"""
+    __tablename__ = "transcript_segments"
+    __table_args__ = (
+        Index("ix_transcript_segments_meeting_position", "meeting_id", "position"),
+        Index("ix_transcript_segments_meeting_start", "meeting_id", "start"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    meeting_id = Column(Integer, ForeignKey("meetings.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    start = Column(Float, nullable=True)  # Seconds into the original recording
+    end = Column(Float, nullable=True)
+    text = Column(Text, nullable=False)
+    avg_logprob = Column(Float, nullable=True)
+    no_speech_prob = Column(Float, nullable=True)
+    
+    # Relationship
+    meeting = relationship("Meeting", back_populates="segments")
+
+
+class UploadSession(Base):
+    """Browser session that references an uploaded recording"""
+    __tablename__ = "upload_sessions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, nullable=False, index=True)
+    filename = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class TranscriptCacheEntry(Base):
+    """Cached Whisper output keyed by audio hash + decoding settings"""
+    __tablename__ = "transcript_cache"
+    
+    key = Column(String, primary_key=True)
+    audio_hash = Column(String, index=True, nullable=False)
+    model = Column(String, nullable=False)
+    language = Column(String, nullable=True)
+    transcript = Column(Text, nullable=False)
+    segments = Column(Text, nullable=True)  # JSON list of timestamped segments
+    size_bytes = Column(Integer, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+def _add_missing_columns():
+    """
+    Add nullable columns and indexes introduced after a table was first created
+    (create_all only creates missing tables, never alters existing ones)
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
 
 
 def get_db():
@@ -75,3 +286,31 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def _run_sync_session(fn: Callable[[Session], T]) -> T:
+    db = SessionLocal()
+    try:
+        return fn(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_in_session(fn: Callable[[Session], T]) -> T:
+    """
+    Run ORM work fn(session) without blocking the event loop and return its result
+    fn commits itself. With DATABASE_ASYNC it runs on the async engine via
+    AsyncSession.run_sync (I/O goes through aiosqlite/asyncpg), otherwise on a
+    worker thread with its own sync Session.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            try:
+                return await db.run_sync(fn)
+            except Exception:
+                await db.rollback()
+                raise
+    return await asyncio.to_thread(_run_sync_session, fn)
@@ -1,17 +1,40 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Depends
+from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+import asyncio
+import hashlib
+import json
 import os
-import shutil
+import time
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
 # Import our modules
-from modules.transcription import transcribe_audio
-from modules.task_extractor import extract_tasks
-from database import init_db, get_db, Meeting, Task, Chat
+from modules.transcription import transcribe_with_segments, shutdown_chunk_pool
+from modules.whisper_pool import model_manager
+from modules.task_extractor import extract_tasks, ExtractionError
+from modules import task_extractor
+from modules.jobs import JobQueue, Job, BACKGROUND_LANE
+from modules import llm_client
+from modules.llm_client import close_ollama_client
+from modules.storage import save_upload, hash_from_filename, UploadTooLarge
+from modules import transcript_cache
+from modules.llm_cache import llm_cache, make_key
+from modules import retrieval
+from modules import lifecycle
+from modules.meeting_queries import list_meetings_page, list_segments_page, segment_count, InvalidCursor
+from modules import search as fulltext
+from modules.bulk import chat_buffer, insert_tasks, insert_segments, import_meetings
+from modules import batch
+from modules import reextract
+from modules import vad
+from modules import live
+from modules import metrics, tracing
+from database import init_db, get_db, engine, run_in_session, Meeting
 from config import settings
 
 # Setup logging
@@ -34,15 +57,130 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    """Request latency histogram (by route template) and an optional root span"""
+    start = time.perf_counter()
+    status = 500
+    with tracing.span("http.request", method=request.method, path=request.url.path):
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = request.scope.get("route")
+            metrics.HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                method=request.method,
+                route=getattr(route, "path", "unmatched"),
+                status=str(status)
+            )
+
 # Create uploads directory
 UPLOAD_DIR = Path(settings.upload_dir)
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Background job queue: /api/process in the default lane, backfills
+# (batch, bulk re-extraction) on their own workers in the background lane
+job_queue = JobQueue(
+    workers=settings.max_concurrent_jobs,
+    history_limit=settings.job_history_limit,
+    lanes={BACKGROUND_LANE: settings.max_background_jobs}
+)
+
+def files_in_use() -> set:
+    """Recordings that queued or running jobs still need"""
+    return {job.params.get("filename") for job in job_queue.active() if job.params.get("filename")}
+
+# Scrape-time gauges for state owned by other components
+metrics.callback("job_queue_depth", "Jobs waiting for a worker", lambda: {(): job_queue.depth})
+metrics.callback("jobs_running", "Jobs being processed", lambda: {
+    (): sum(1 for job in job_queue.active() if job.status == "running")
+})
+metrics.callback(
+    "llm_queue_waiting", "Ollama calls waiting for a generation slot",
+    lambda: {(kind,): n for kind, n in llm_client.get_limiter().stats()["waiting"].items()},
+    labels=("kind",)
+)
+metrics.callback("llm_active_generations", "Ollama generations in flight", lambda: {
+    (): llm_client.get_limiter().active
+})
+metrics.callback("live_sessions_active", "Open live transcription sessions", lambda: {
+    (): live.stats()["active_sessions"]
+})
+metrics.callback("chat_buffer_pending", "Chat rows waiting for the batched insert", lambda: {
+    (): chat_buffer.stats()["pending"]
+})
+metrics.callback(
+    "cache_hits_total", "Result cache hits",
+    lambda: {("llm",): llm_cache.hits, ("transcript",): transcript_cache.counters()["hits"]},
+    labels=("cache",), kind="counter"
+)
+metrics.callback(
+    "cache_misses_total", "Result cache misses",
+    lambda: {("llm",): llm_cache.misses, ("transcript",): transcript_cache.counters()["misses"]},
+    labels=("cache",), kind="counter"
+)
+
+_sweeper_task: Optional[asyncio.Task] = None
+_warmup_task: Optional[asyncio.Task] = None
+
+def fail_unfinished_meetings(meeting_ids: Optional[List[int]] = None):
+    """
+    Mark meetings still "processing" as failed (only `meeting_ids` if given)
+    Their jobs live in memory, so nothing resumes them after a restart
+    """
+    def update(db: Session) -> int:
+        query = db.query(Meeting).filter(Meeting.status == "processing")
+        if meeting_ids is not None:
+            query = query.filter(Meeting.id.in_(meeting_ids))
+        count = query.update({"status": "failed"}, synchronize_session=False)
+        db.commit()
+        return count
+    return update
+
 # Initialize database on startup
 @app.on_event("startup")
 async def startup_event():
+    global _sweeper_task, _warmup_task
     init_db()
+    fulltext.setup_search(engine)
     logger.info("Database initialized")
+    orphaned = await run_in_session(fail_unfinished_meetings())
+    if orphaned:
+        logger.warning(f"Marked {orphaned} meeting(s) left processing by a previous run as failed")
+    job_queue.register("process", run_process_job)
+    job_queue.register("batch", run_batch_job, lane=BACKGROUND_LANE)
+    job_queue.register("reextract", run_reextract_job, lane=BACKGROUND_LANE)
+    job_queue.register("reextract_meeting", run_reextract_meeting_job)
+    await job_queue.start()
+    await chat_buffer.start()
+    _sweeper_task = asyncio.create_task(lifecycle.run_sweeper(UPLOAD_DIR, files_in_use))
+    
+    if settings.ollama_warmup:
+        # Background so an unreachable Ollama does not block startup
+        _warmup_task = asyncio.create_task(llm_client.warm_up())
+    
+    if settings.whisper_preload:
+        try:
+            await asyncio.to_thread(model_manager.preload)
+        except Exception as e:
+            logger.error(f"Whisper preload failed, models will load on first use: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _sweeper_task:
+        _sweeper_task.cancel()
+    if _warmup_task:
+        _warmup_task.cancel()
+    abandoned = await job_queue.stop()
+    meeting_ids = [job.params["meeting_id"] for job in abandoned if job.kind == "process"]
+    if meeting_ids:
+        await run_in_session(fail_unfinished_meetings(meeting_ids))
+        logger.info(f"Marked {len(meeting_ids)} unfinished meeting(s) as failed")
+    await chat_buffer.stop()
+    await close_ollama_client()
+    shutdown_chunk_pool()
 
 @app.get("/")
 async def root():
@@ -54,15 +192,17 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check():
     """Health check with database connectivity test"""
     try:
         # Test database connection
-        db.execute("SELECT 1")
+        await run_in_session(lambda db: db.execute(text("SELECT 1")).scalar())
         return {
             "status": "healthy",
             "database": "connected",
-            "ollama_host": settings.ollama_host
+            "ollama_host": settings.ollama_host,
+            "llm": llm_client.stats(),
+            "chat_buffer": chat_buffer.stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -73,10 +213,10 @@ async def health_check(db: Session = Depends(get_db)):
         }
 
 @app.post("/api/upload")
-async def upload_recording(file: UploadFile = File(...)):
+async def upload_recording(file: UploadFile = File(...), session_id: Optional[str] = None):
     """
     Upload a meeting recording (MP3/MP4)
-    Returns meeting_id and file info
+    Streams to disk content-addressed by SHA-256 and returns the hash
     """
     try:
         # Validate file type
@@ -90,120 +230,522 @@ async def upload_recording(file: UploadFile = File(...)):
             )
         
         # Save file
-        file_path = UPLOAD_DIR / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        started = time.perf_counter()
+        saved = await save_upload(file, UPLOAD_DIR, settings.max_file_size_mb * 1024 * 1024)
+        elapsed = time.perf_counter() - started
+        if elapsed > 0:
+            metrics.UPLOAD_BYTES_PER_SECOND.observe(saved["size"] / elapsed)
+        await asyncio.to_thread(lifecycle.register_session, saved["filename"], session_id)
         
-        logger.info(f"File uploaded successfully: {file.filename}")
+        logger.info(f"File uploaded successfully: {file.filename} -> {saved['filename']}")
         
         return {
             "status": "success",
-            "filename": file.filename,
-            "path": str(file_path),
-            "size": file_path.stat().st_size
+            "original_filename": file.filename,
+            **saved
         }
         
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/process")
-async def process_recording(filename: str, db: Session = Depends(get_db)):
+@app.post("/api/import")
+async def import_meetings_jsonl(file: UploadFile = File(...), batch_size: Optional[int] = None):
     """
-    Process uploaded recording:
+    Bulk-import pre-transcribed meetings from a JSONL file
+    One object per line: {"filename", "transcript", "upload_date"?, "tasks"?, "chats"?}
+    Each batch of lines is written in a single transaction.
+    """
+    try:
+        result = await asyncio.to_thread(import_meetings, file.file, batch_size)
+    except Exception as e:
+        logger.error(f"Import error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
+    
+    return {"status": "success", **result}
+
+async def run_process_job(job: Job) -> Dict[str, Any]:
+    """
+    Pipeline executed by the job queue:
     1. Transcribe with Whisper
     2. Extract tasks with Ollama
     3. Store in database
     """
+    filename = job.params["filename"]
+    meeting_id = job.params["meeting_id"]
+    file_path = lifecycle.resolve_upload(UPLOAD_DIR, filename)
+    if file_path is None:
+        raise Exception(f"Recording {filename} is no longer stored")
+    
+    # No session is held across the awaits below; each DB step is a short
+    # run_in_session() call so commits never block the event loop
+    def load_audio_hash(db: Session) -> Optional[str]:
+        meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+        if not meeting:
+            raise Exception(f"Meeting {meeting_id} no longer exists")
+        return meeting.audio_hash
+    
+    def mark_failed(db: Session):
+        db.query(Meeting).filter(Meeting.id == meeting_id).update({"status": "failed"})
+        db.commit()
+    
     try:
-        file_path = UPLOAD_DIR / filename
-        
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="File not found")
+        audio_hash = await run_in_session(load_audio_hash)
         
+        # Step 1: Transcribe audio
+        job.update("transcribing", 0.05)
         logger.info(f"Starting transcription for: {filename}")
         
-        # Step 1: Transcribe audio
-        transcript = await transcribe_audio(str(file_path))
+        def on_segment(segment: Dict[str, Any]):
+            job.emit("segment", segment)
+            job.update("transcribing", 0.05 + 0.65 * segment["progress"])
+        
+        transcript, segments = await transcribe_with_segments(
+            str(file_path),
+            audio_hash=audio_hash,
+            on_segment=on_segment,
+            model_name=job.params.get("whisper_model"),
+            on_vad=lambda report: job.emit("vad", report)
+        )
         logger.info(f"Transcription complete. Length: {len(transcript)} chars")
         
         # Step 2: Extract tasks using Ollama
+        job.update("extracting", 0.7)
         logger.info("Extracting tasks with Ollama...")
-        tasks = await extract_tasks(transcript)
-        logger.info(f"Extracted {len(tasks)} tasks")
+        status = "completed"
+        stamp = task_extractor.extraction_stamp()
+        try:
+            tasks = await extract_tasks(transcript, on_task=lambda task: job.emit("task", task))
+            logger.info(f"Extracted {len(tasks)} tasks")
+        except ExtractionError as e:
+            # Keep the transcript and any partial tasks; the meeting stays
+            # unstamped so /api/reextract picks it up again
+            tasks = e.tasks
+            status = "extraction_failed"
+            stamp = {}
+            job.emit("extraction_failed", {"error": str(e)})
         
-        # Step 3: Store in database
-        meeting = Meeting(
-            filename=filename,
-            transcript=transcript,
-            transcript_length=len(transcript),
-            status="completed"
-        )
-        db.add(meeting)
-        db.flush()  # Get meeting ID
+        # Step 3: Build the chat retrieval index
+        job.update("indexing", 0.9)
+        chunks = await retrieval.build_chunks(meeting_id, transcript)
         
-        # Add tasks
-        for task_data in tasks:
-            task = Task(
-                meeting_id=meeting.id,
-                task=task_data.get("task", ""),
-                owner=task_data.get("owner", "unknown"),
-                deadline=task_data.get("deadline", "unknown"),
-                confidence=task_data.get("confidence", 0.5)
-            )
-            db.add(task)
+        # Step 4: Store in database (one transaction)
+        job.update("saving", 0.95)
         
-        db.commit()
-        db.refresh(meeting)
+        def save(db: Session):
+            meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
+            if not meeting:
+                raise Exception(f"Meeting {meeting_id} no longer exists")
+            meeting.transcript = transcript
+            meeting.transcript_length = len(transcript)
+            meeting.status = status
+            meeting.extractor_version = stamp.get("extractor_version")
+            meeting.extraction_model = stamp.get("extraction_model")
+            
+            retrieval.replace_chunks(db, meeting_id, chunks)
+            insert_segments(db, meeting_id, segments)
+            insert_tasks(db, meeting_id, tasks, stamp)
+            db.commit()
+        
+        await run_in_session(save)
+        
+        # Shrink the retained recording (no-op unless STORAGE_TRANSCODE_FORMAT is set)
+        try:
+            await lifecycle.transcode(file_path)
+        except Exception as e:
+            logger.error(f"Transcoding failed, keeping original: {e}")
         
-        # Return response
         return {
-            "status": "success",
-            "meeting_id": meeting.id,
+            "status": "success" if status == "completed" else status,
+            "meeting_id": meeting_id,
             "filename": filename,
-            "transcript": transcript,
+            # The transcript itself is paged from /api/meetings/{id}/segments
+            "transcript_length": len(transcript),
+            "segment_count": len(segments),
             "tasks": tasks,
             "task_count": len(tasks)
         }
+    except Exception:
+        await run_in_session(mark_failed)
+        raise
+
+@app.post("/api/process", status_code=202)
+async def process_recording(
+    filename: str,
+    original_filename: Optional[str] = None,
+    session_id: Optional[str] = None,
+    whisper_model: Optional[str] = None
+):
+    """
+    Queue an uploaded recording for processing
+    Returns a job_id to poll via /api/jobs/{job_id}
+    """
+    if lifecycle.resolve_upload(UPLOAD_DIR, filename) is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    if whisper_model and whisper_model not in model_manager.allowed_models():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid whisper_model. Allowed: {', '.join(model_manager.allowed_models())}"
+        )
+    
+    try:
+        # Reserve the meeting row so its status is visible while processing
+        def reserve(db: Session) -> int:
+            meeting = Meeting(
+                filename=original_filename or filename,
+                audio_hash=hash_from_filename(filename),
+                transcript="",
+                transcript_length=0,
+                status="processing"
+            )
+            db.add(meeting)
+            db.commit()
+            return meeting.id
+        
+        meeting_id = await run_in_session(reserve)
+        
+        await asyncio.to_thread(lifecycle.register_session, filename, session_id)
+        
+        job = job_queue.submit(
+            "process",
+            filename=filename,
+            meeting_id=meeting_id,
+            session_id=session_id,
+            whisper_model=whisper_model
+        )
+        
+        return {
+            "status": "queued",
+            "job_id": job.id,
+            "meeting_id": meeting_id,
+            "filename": filename,
+            "audio_hash": hash_from_filename(filename),
+            "queue_position": job_queue.position(job)
+        }
         
     except Exception as e:
-        db.rollback()
         logger.error(f"Processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class BatchRequest(BaseModel):
+    """Files or directories relative to BATCH_ROOT"""
+    paths: List[str]
+    workers: Optional[int] = None
+    whisper_model: Optional[str] = None
+    checkpoint: Optional[str] = None
+    reprocess: bool = False
+
+async def run_batch_job(job: Job) -> Dict[str, Any]:
+    """Run a directory/list backfill, streaming per-file results as job events"""
+    def on_progress(event: str, data: Dict[str, Any]):
+        job.emit(event, data)
+        if "total" in data:
+            job.update("processing", data["done"] / max(data["total"], 1))
+    
+    job.update("scanning", 0.0)
+    return await batch.run_batch(
+        job.params["paths"],
+        workers=job.params.get("workers"),
+        checkpoint_path=job.params["checkpoint"],
+        model_name=job.params.get("whisper_model"),
+        reprocess=job.params.get("reprocess", False),
+        on_progress=on_progress
+    )
+
+@app.post("/api/batch", status_code=202)
+async def process_batch(request: BatchRequest):
+    """
+    Queue a backfill over recordings already on the server (under BATCH_ROOT)
+    Resubmitting the same paths resumes from the batch's checkpoint.
+    """
+    if not request.paths:
+        raise HTTPException(status_code=400, detail="No paths given")
+    
+    if request.whisper_model and request.whisper_model not in model_manager.allowed_models():
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid whisper_model. Allowed: {', '.join(model_manager.allowed_models())}"
+        )
+    
+    try:
+        paths = batch.resolve_batch_paths(request.paths)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Not found: {', '.join(missing)}")
+    
+    name = request.checkpoint or hashlib.sha256("\n".join(sorted(paths)).encode()).hexdigest()[:16]
+    checkpoint_dir = Path(settings.batch_root) / ".checkpoints"
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    
+    job = job_queue.submit(
+        "batch",
+        paths=paths,
+        workers=request.workers,
+        whisper_model=request.whisper_model,
+        checkpoint=str(checkpoint_dir / f"{Path(name).name}.json"),
+        reprocess=request.reprocess
+    )
+    
+    return {
+        "status": "queued",
+        "job_id": job.id,
+        "queue_position": job_queue.position(job)
+    }
+
+class ReextractRequest(BaseModel):
+    """Stale-meeting re-extraction options (defaults from REEXTRACT_* settings)"""
+    concurrency: Optional[int] = None
+    limit: Optional[int] = None
+
+async def run_reextract_job(job: Job) -> Dict[str, Any]:
+    """Re-extract tasks of stale meetings, streaming per-meeting results as job events"""
+    def on_progress(event: str, data: Dict[str, Any]):
+        job.emit(event, data)
+        job.update("extracting", data["done"] / max(data["total"], 1))
+    
+    job.update("scanning", 0.0)
+    return await reextract.run_reextract(
+        concurrency=job.params.get("concurrency"),
+        limit=job.params.get("limit"),
+        on_progress=on_progress
+    )
+
+@app.get("/api/reextract")
+async def reextract_status():
+    """Current extractor version/model and how many stored meetings are behind it"""
+    stale = await run_in_session(reextract.count_stale)
+    return {**task_extractor.extraction_stamp(), "stale_meetings": stale}
+
+@app.post("/api/reextract", status_code=202)
+async def reextract_stale_meetings(request: Optional[ReextractRequest] = None):
+    """
+    Queue task re-extraction for meetings extracted with an older prompt
+    version or another model (or whose extraction failed). Transcripts are
+    reused; nothing is transcribed again. Resubmitting resumes an interrupted
+    run; while one is queued or running, that job is returned.
+    """
+    request = request or ReextractRequest()
+    if request.concurrency is not None and request.concurrency < 1:
+        raise HTTPException(status_code=400, detail="concurrency must be at least 1")
+    
+    running = [job for job in job_queue.active() if job.kind == "reextract"]
+    job = running[0] if running else job_queue.submit(
+        "reextract",
+        concurrency=request.concurrency,
+        limit=request.limit
+    )
+    
+    return {
+        "status": job.status,
+        "job_id": job.id,
+        "queue_position": job_queue.position(job)
+    }
+
+async def run_reextract_meeting_job(job: Job) -> Dict[str, Any]:
+    """Re-extract one meeting's tasks, streaming them as job events"""
+    job.update("extracting", 0.1)
+    result = await reextract.reextract_meeting(
+        job.params["meeting_id"],
+        on_task=lambda task: job.emit("task", task)
+    )
+    return {"status": "success", **result}
+
+@app.post("/api/meetings/{meeting_id}/reextract", status_code=202)
+async def reextract_meeting_tasks(meeting_id: int):
+    """
+    Queue extracting a stored meeting's tasks again from its transcript
+    Returns a job_id to poll via /api/jobs/{job_id}; the old tasks are kept
+    (and the job fails) if the model gives no usable response.
+    """
+    if not await run_in_session(reextract.has_transcript(meeting_id)):
+        raise HTTPException(status_code=404, detail=f"Meeting {meeting_id} has no transcript to extract from")
+    
+    job = job_queue.submit("reextract_meeting", meeting_id=meeting_id)
+    
+    return {
+        "status": "queued",
+        "job_id": job.id,
+        "meeting_id": meeting_id,
+        "queue_position": job_queue.position(job)
+    }
+
+@app.get("/api/jobs")
+async def list_jobs(limit: int = 50):
+    """List recent background jobs, newest first"""
+    return {
+        "queue_depth": job_queue.depth,
+        "jobs": [job.to_dict() for job in job_queue.list(limit)]
+    }
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get status and progress of a background job"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    data = job.to_dict()
+    data["queue_position"] = job_queue.position(job)
+    return data
+
+def sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, after: int = -1):
+    """
+    Server-Sent Events stream of job progress and transcript segments
+    Pass `after` (last seen seq) to resume without replaying earlier events
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        seq = after
+        while True:
+            for event in job.events[seq + 1:]:
+                seq = event["seq"]
+                yield sse(event["event"], {**event["data"], "seq": seq})
+            if job.finished and seq >= len(job.events) - 1:
+                if job.result is not None:
+                    yield sse("result", job.result)
+                return
+            if not await job.wait_for_events(seq + 1, timeout=15):
+                yield ": keep-alive\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.websocket("/api/live")
+async def live_transcription(
+    websocket: WebSocket,
+    format: str = "pcm16",
+    sample_rate: int = 16000,
+    channels: int = 1,
+    whisper_model: Optional[str] = None,
+    title: Optional[str] = None
+):
+    """
+    Live transcription: stream audio while the meeting runs
+    Send binary audio messages (pcm16 at `sample_rate`/`channels`, or Ogg/WebM
+    Opus with format=opus), then {"type": "stop"}. Receives partial and final
+    segments and tasks as they are found, and `done` with the stored meeting id.
+    """
+    if whisper_model and whisper_model not in model_manager.allowed_models():
+        # Closing before accept rejects the handshake
+        await websocket.close(code=1008)
+        return
+    await live.serve(websocket, format, sample_rate, channels, whisper_model, title)
+
+@app.get("/api/live/stats")
+async def live_stats():
+    """Open live sessions and totals"""
+    return live.stats()
+
+@app.post("/api/cleanup")
+async def cleanup_session(session_id: str):
+    """Delete recordings referenced only by this (closing) browser session"""
+    return await asyncio.to_thread(lifecycle.cleanup_session, UPLOAD_DIR, session_id, files_in_use)
+
+@app.get("/api/storage")
+async def storage_usage():
+    """Upload directory disk usage and lifecycle counters"""
+    return await asyncio.to_thread(lifecycle.usage, UPLOAD_DIR)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/models")
+async def model_stats():
+    """Loaded Whisper models: pool usage, load time and memory, plus VAD savings"""
+    return {**model_manager.stats(), "vad": vad.stats()}
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and footprint for result caches"""
+    return {
+        "transcripts": await asyncio.to_thread(transcript_cache.stats),
+        "llm": llm_cache.stats()
+    }
+
+@app.get("/api/llm/stats")
+async def llm_stats():
+    """Ollama client: in-flight generations and queue wait per traffic class"""
+    return llm_client.stats()
+
+@app.get("/api/extraction/stats")
+async def extraction_stats():
+    """Task extraction parse-success rate, retries and output format"""
+    return task_extractor.stats()
+
 @app.get("/api/meetings")
-async def list_meetings(limit: int = 10, db: Session = Depends(get_db)):
-    """Get list of recent meetings"""
+def list_meetings(limit: int = 10, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    Get list of recent meetings
+    Pass `next_cursor` from the previous response as `cursor` for the next page
+    """
     try:
-        meetings = db.query(Meeting).order_by(Meeting.upload_date.desc()).limit(limit).all()
-        
-        result = []
-        for meeting in meetings:
-            result.append({
-                "id": meeting.id,
-                "filename": meeting.filename,
-                "upload_date": meeting.upload_date.isoformat(),
-                "task_count": len(meeting.tasks),
-                "transcript_length": meeting.transcript_length
-            })
-        
-        return {"meetings": result}
+        return list_meetings_page(db, limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing meetings: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/search")
+def search_meetings(q: str, kinds: Optional[str] = None, limit: int = 20, db: Session = Depends(get_db)):
+    """
+    Full-text search across transcripts, tasks and chats
+    
+    Args:
+        q: Search words (the last word also matches as a prefix on SQLite)
+        kinds: Comma-separated subset of meeting,task,chat (default: all)
+    
+    Returns:
+        Ranked hits with highlighted snippets and their meeting_id
+    """
+    try:
+        kind_list = [k.strip() for k in kinds.split(",")] if kinds else None
+        results = fulltext.search(db, q, kind_list, limit)
+        return {"query": q, "results": results}
+    except Exception as e:
+        logger.error(f"Search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/meetings/{meeting_id}")
-async def get_meeting(meeting_id: int, db: Session = Depends(get_db)):
-    """Get meeting details by ID"""
+def get_meeting(meeting_id: int, include_transcript: bool = False, db: Session = Depends(get_db)):
+    """
+    Get meeting details by ID
+    The transcript is omitted unless include_transcript=true; page it from
+    /api/meetings/{id}/segments instead
+    """
     meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     
-    return {
+    details = {
         "id": meeting.id,
         "filename": meeting.filename,
         "upload_date": meeting.upload_date.isoformat(),
-        "transcript": meeting.transcript,
+        "status": meeting.status,
+        "transcript_length": meeting.transcript_length,
+        "segment_count": segment_count(db, meeting.id),
+        "extractor_version": meeting.extractor_version,
+        "extraction_model": meeting.extraction_model,
         "tasks": [
             {
                 "task": task.task,
@@ -215,60 +757,156 @@ async def get_meeting(meeting_id: int, db: Session = Depends(get_db)):
         ],
         "task_count": len(meeting.tasks)
     }
+    if include_transcript:
+        details["transcript"] = meeting.transcript
+    return details
+
+@app.get("/api/meetings/{meeting_id}/segments")
+def get_meeting_segments(
+    meeting_id: int,
+    from_index: int = 0,
+    from_time: Optional[float] = None,
+    to_time: Optional[float] = None,
+    limit: int = 200,
+    db: Session = Depends(get_db)
+):
+    """
+    Page through a meeting's transcript segments
+    
+    Args:
+        from_index: First segment index; pass `next_index` from the previous page
+        from_time / to_time: Only segments overlapping this range (seconds)
+        limit: Segments per page (max 1000)
+    """
+    if not db.query(Meeting.id).filter(Meeting.id == meeting_id).first():
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    
+    return list_segments_page(db, meeting_id, from_index, from_time, to_time, limit)
+
+# Bump whenever CHAT_PROMPT changes so cached answers are not reused
+CHAT_PROMPT_VERSION = "2"
+
+CHAT_PROMPT = """Based on these excerpts from a meeting transcript, answer the following question.
+
+Excerpts:
+{context}
+
+Question: {question}
+
+Provide a helpful, concise answer based only on the information in the excerpts."""
+
+async def prepare_chat(meeting_id: int, question: str):
+    """Retrieve context for a question and build its prompt and cache key"""
+    chunks = await retrieval.retrieve(meeting_id, question)
+    context = "\n\n".join(chunks)
+    model = settings.ollama_model
+    cache_key = make_key(model, CHAT_PROMPT_VERSION, context, question.strip())
+    prompt = CHAT_PROMPT.format(context=context, question=question)
+    return model, prompt, cache_key, len(chunks)
+
+async def save_chat(meeting_id: int, question: str, answer: str):
+    """Queue a chat exchange for the batched write-behind insert"""
+    await chat_buffer.add(meeting_id, question, answer)
+
+async def require_meeting(meeting_id: int):
+    """404 unless the meeting exists (checked off the event loop)"""
+    exists = await run_in_session(lambda db: db.query(Meeting.id).filter(Meeting.id == meeting_id).first())
+    if not exists:
+        raise HTTPException(status_code=404, detail="Meeting not found")
 
 @app.post("/api/chat")
-async def chat_about_meeting(question: str, transcript: str, meeting_id: int = None, db: Session = Depends(get_db)):
+async def chat_about_meeting(question: str, meeting_id: int):
     """
     Answer questions about the meeting using Ollama
     
     Args:
         question: User's question about the meeting
-        transcript: Meeting transcript for context
+        meeting_id: Meeting to answer from; only its most relevant chunks are sent
     
     Returns:
         AI-generated answer based on the transcript
     """
+    await require_meeting(meeting_id)
+    
     try:
-        import ollama
-        
         logger.info(f"Chat question: {question}")
         
-        prompt = f"""Based on this meeting transcript, answer the following question.
-
-Transcript: {transcript}
-
-Question: {question}
-
-Provide a helpful, concise answer based only on the information in the transcript."""
-
-        response = ollama.chat(
-            model="llama3.1:8b",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        model, prompt, cache_key, chunk_count = await prepare_chat(meeting_id, question)
+        answer = await llm_cache.aget(cache_key) if settings.llm_cache_enabled else None
         
-        answer = response['message']['content']
-        logger.info(f"Chat answer generated: {len(answer)} chars")
-        
-        # Store chat in database if meeting_id provided
-        if meeting_id:
-            chat = Chat(
-                meeting_id=meeting_id,
-                question=question,
-                answer=answer
+        if answer is not None:
+            logger.info("Chat answer served from cache")
+        else:
+            response = await llm_client.chat(
+                [{"role": "user", "content": prompt}],
+                kind=llm_client.CHAT,
+                model=model
             )
-            db.add(chat)
-            db.commit()
+            
+            answer = response['message']['content']
+            logger.info(f"Chat answer generated: {len(answer)} chars")
+            if settings.llm_cache_enabled:
+                await llm_cache.aset(cache_key, answer)
+        
+        await save_chat(meeting_id, question, answer)
         
         return {
             "status": "success",
             "question": question,
-            "answer": answer
+            "answer": answer,
+            "context_chunks": chunk_count
         }
         
+    except asyncio.TimeoutError:
+        logger.error("Chat error: Ollama timed out")
+        raise HTTPException(status_code=504, detail="The language model did not respond in time")
     except Exception as e:
         logger.error(f"Chat error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/chat/stream")
+async def chat_about_meeting_stream(question: str, meeting_id: int):
+    """
+    Streaming variant of /api/chat (Server-Sent Events)
+    Emits `token` events as Ollama generates, then `done` with the full answer,
+    which is persisted to the chat history once the stream completes
+    """
+    await require_meeting(meeting_id)
+    logger.info(f"Chat question (stream): {question}")
+    model, prompt, cache_key, chunk_count = await prepare_chat(meeting_id, question)
+    
+    async def events():
+        cached = await llm_cache.aget(cache_key) if settings.llm_cache_enabled else None
+        try:
+            if cached is not None:
+                answer = cached
+                yield sse("token", {"content": answer})
+            else:
+                parts = []
+                async for part in llm_client.chat_stream(
+                    [{"role": "user", "content": prompt}],
+                    kind=llm_client.CHAT,
+                    model=model
+                ):
+                    token = part.get("message", {}).get("content", "")
+                    if token:
+                        parts.append(token)
+                        yield sse("token", {"content": token})
+                answer = "".join(parts)
+                if settings.llm_cache_enabled:
+                    await llm_cache.aset(cache_key, answer)
+        except Exception as e:
+            detail = "The language model did not respond in time" if isinstance(e, asyncio.TimeoutError) else str(e)
+            logger.error(f"Chat stream error: {detail}")
+            yield sse("error", {"detail": detail})
+            return
+        
+        await save_chat(meeting_id, question, answer)
+        
+        yield sse("done", {"question": question, "answer": answer, "context_chunks": chunk_count})
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
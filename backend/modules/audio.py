@@ -0,0 +1,125 @@
+"""
+Single-pass audio decoding
+ffmpeg runs once per recording and streams 16 kHz mono int16 PCM into a
+hidden file next to the upload (.<content hash>.pcm). Every stage (VAD, chunk
+planning, Whisper, chunk workers in other processes) reads read-only
+memory-mapped views of that file instead of decoding again, at half the
+memory of Whisper's float32 array. Conversion to float32 happens per window,
+right before the model.
+
+The file is named after the recording's content hash (or, without one, a
+hash of its path, size and mtime), so it is only ever shared by jobs on the
+same audio. It is removed when the last one finishes, unless AUDIO_KEEP_PCM
+is set.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Union
+import numpy as np
+from config import settings
+from modules import metrics, tracing
+from modules.chunking import SAMPLE_RATE
+from modules.storage import hash_from_filename
+
+logger = logging.getLogger(__name__)
+
+PCM_SUFFIX = ".pcm"
+PCM_DTYPE = np.int16
+INT16_SCALE = 1.0 / 32768
+
+# PCM path -> (lock serializing the decode, number of users)
+_locks: Dict[Path, asyncio.Lock] = {}
+_users: Dict[Path, int] = {}
+
+
+def _source_key(path: Path) -> str:
+    """Identity of a recording without a known content hash: a changed file gets a new key"""
+    stat = path.stat()
+    source = f"{path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def pcm_path(file_path: Union[str, Path], audio_hash: Optional[str] = None) -> Path:
+    """
+    Where the decoded PCM of a recording lives (hidden, so upload listings skip it)
+    Content-addressed uploads (<sha256>.<ext>) need no `audio_hash`
+    """
+    path = Path(file_path)
+    key = audio_hash or hash_from_filename(path.name) or _source_key(path)
+    directory = path.parent if os.access(path.parent, os.W_OK) else Path(tempfile.gettempdir())
+    return directory / f".{key}{PCM_SUFFIX}"
+
+
+def open_pcm(path: Union[str, Path]) -> np.ndarray:
+    """Read-only int16 view of a decoded PCM file (empty array for empty audio)"""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=PCM_DTYPE)
+    return np.memmap(path, dtype=PCM_DTYPE, mode="r")
+
+
+def to_float32(audio: np.ndarray) -> np.ndarray:
+    """Whisper input: int16 PCM scaled to [-1, 1); float32 passes through uncopied"""
+    if audio.dtype == np.float32:
+        return audio
+    return np.multiply(audio, INT16_SCALE, dtype=np.float32)
+
+
+async def _decode(file_path: str, target: Path):
+    """Stream the recording through ffmpeg into `target` (atomic rename when done)"""
+    tmp = target.with_name(f"{target.name}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-threads", "0", "-i", file_path,
+            "-vn", "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), str(tmp),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await process.communicate()
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to decode audio: {stderr.decode(errors='replace')[:300]}")
+        tmp.replace(target)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@asynccontextmanager
+async def decoded(file_path: str, audio_hash: Optional[str] = None) -> AsyncIterator[Path]:
+    """
+    Path of the recording's decoded PCM, decoding it on first use
+    Reused while it exists; deleted after the last user unless AUDIO_KEEP_PCM
+    """
+    target = pcm_path(file_path, audio_hash)
+    lock = _locks.setdefault(target, asyncio.Lock())
+    _users[target] = _users.get(target, 0) + 1
+    try:
+        async with lock:
+            if not target.exists():
+                with tracing.span("audio.decode"), metrics.AUDIO_DECODE_SECONDS.time():
+                    await _decode(file_path, target)
+            else:
+                logger.info(f"Reusing decoded audio {target.name}")
+        yield target
+    finally:
+        _users[target] -= 1
+        if not _users[target]:
+            del _users[target]
+            _locks.pop(target, None)
+            if not settings.audio_keep_pcm:
+                # Open memory maps stay valid after unlink
+                target.unlink(missing_ok=True)
+
+
+def in_use(pcm: Path) -> bool:
+    """Whether a transcription is reading this PCM file right now"""
+    return pcm in _users
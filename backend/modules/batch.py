@@ -0,0 +1,341 @@
+"""
+Batch processing for archives of recordings
+Transcribes and extracts tasks for a list or directory of files on the server:
+longest recordings are scheduled first across N workers, content hashes that
+were already processed are skipped, and a JSON checkpoint lets an interrupted
+run resume where it stopped. Reports per-file and aggregate throughput in
+audio-seconds per wall-second.
+
+CLI (from the backend directory):
+    python -m modules.batch /data/archive --workers 2 --checkpoint archive.ckpt.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import wave
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+from sqlalchemy.orm import Session
+from config import settings
+from database import run_in_session, Meeting
+from modules import retrieval
+from modules.bulk import insert_segments, insert_tasks
+from modules.task_extractor import extract_tasks, extraction_stamp, ExtractionError
+from modules.transcription import transcribe_with_segments, hash_file
+
+logger = logging.getLogger(__name__)
+
+AUDIO_EXTENSIONS = {".mp3", ".mp4", ".m4a", ".wav", ".ogg", ".opus", ".flac", ".webm", ".aac"}
+
+# Called with ("file", {...}) / ("skip", {...}) as the batch progresses
+ProgressFn = Callable[[str, Dict[str, Any]], None]
+
+
+def discover(paths: List[str]) -> List[Path]:
+    """Expand files and directories (recursively) into audio files, de-duplicated"""
+    found: List[Path] = []
+    seen: Set[Path] = set()
+    for entry in paths:
+        path = Path(entry).expanduser()
+        if path.is_dir():
+            candidates = sorted(p for p in path.rglob("*") if p.is_file())
+        elif path.is_file():
+            candidates = [path]
+        else:
+            raise FileNotFoundError(f"No such file or directory: {entry}")
+        for candidate in candidates:
+            if candidate.suffix.lower() not in AUDIO_EXTENSIONS or candidate.name.startswith("."):
+                continue
+            resolved = candidate.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                found.append(resolved)
+    return found
+
+
+async def probe_duration(path: Path) -> Optional[float]:
+    """Duration in seconds via ffprobe (WAV header fallback); None if unknown"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1", str(path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await process.communicate()
+        if process.returncode == 0:
+            return float(stdout.decode().strip())
+    except (FileNotFoundError, ValueError):
+        pass
+
+    if path.suffix.lower() == ".wav":
+        try:
+            with wave.open(str(path)) as f:
+                return f.getnframes() / float(f.getframerate())
+        except (wave.Error, EOFError, OSError):
+            pass
+    return None
+
+
+class Checkpoint:
+    """Finished hashes persisted to a JSON file after every file (atomic replace)"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = Path(path) if path else None
+        self.done: Dict[str, Dict[str, Any]] = {}
+        self.failed: Dict[str, Dict[str, Any]] = {}
+        if self.path and self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.done = data.get("done", {})
+            self.failed = data.get("failed", {})
+            logger.info(f"Resuming batch from {self.path}: {len(self.done)} file(s) already done")
+
+    def record(self, audio_hash: str, entry: Dict[str, Any], ok: bool):
+        if ok:
+            self.done[audio_hash] = entry
+            self.failed.pop(audio_hash, None)
+        else:
+            self.failed[audio_hash] = entry
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(json.dumps({"done": self.done, "failed": self.failed}, indent=1))
+        os.replace(tmp, self.path)
+
+
+def _processed_hashes(hashes: List[str]):
+    def query(db: Session) -> Set[str]:
+        rows = db.query(Meeting.audio_hash).filter(
+            Meeting.audio_hash.in_(hashes),
+            Meeting.status.in_(("completed", "extraction_failed"))
+        ).all()
+        return {row.audio_hash for row in rows}
+    return query
+
+
+async def _process_one(item: Dict[str, Any], model_name: Optional[str]) -> Dict[str, Any]:
+    """Transcribe, extract and store one recording; returns its per-file report"""
+    path: Path = item["path"]
+    start = time.perf_counter()
+    last_end = 0.0
+    vad_report: Dict[str, Any] = {}
+
+    def on_segment(segment: Dict[str, Any]):
+        nonlocal last_end
+        if segment.get("end"):
+            last_end = max(last_end, segment["end"])
+
+    transcript, segments = await transcribe_with_segments(
+        str(path),
+        audio_hash=item["audio_hash"],
+        on_segment=on_segment,
+        model_name=model_name,
+        on_vad=vad_report.update
+    )
+    transcribe_seconds = time.perf_counter() - start
+    status, extraction_error = "completed", None
+    stamp = extraction_stamp()
+    try:
+        tasks = await extract_tasks(transcript)
+    except ExtractionError as e:
+        # Transcript (and any partial tasks) is still stored; the file counts as processed
+        tasks, status, extraction_error, stamp = e.tasks, "extraction_failed", str(e), {}
+
+    def save(db: Session) -> int:
+        meeting = Meeting(
+            filename=path.name,
+            audio_hash=item["audio_hash"],
+            transcript=transcript,
+            transcript_length=len(transcript),
+            status=status,
+            **stamp
+        )
+        db.add(meeting)
+        db.flush()
+        insert_segments(db, meeting.id, segments)
+        insert_tasks(db, meeting.id, tasks, stamp)
+        db.commit()
+        return meeting.id
+
+    meeting_id = await run_in_session(save)
+    chunks = await retrieval.build_chunks(meeting_id, transcript)
+
+    def save_chunks(db: Session):
+        retrieval.replace_chunks(db, meeting_id, chunks)
+        db.commit()
+
+    await run_in_session(save_chunks)
+
+    wall = time.perf_counter() - start
+    audio_seconds = item["duration"] or last_end or 0.0
+    return {
+        "file": str(path),
+        "audio_hash": item["audio_hash"],
+        "meeting_id": meeting_id,
+        "task_count": len(tasks),
+        "extraction_error": extraction_error,
+        "audio_seconds": round(audio_seconds, 1),
+        "wall_seconds": round(wall, 2),
+        "transcribe_seconds": round(transcribe_seconds, 2),
+        "vad_skipped_seconds": vad_report.get("skipped_seconds"),
+        "audio_seconds_per_wall_second": round(audio_seconds / wall, 2) if wall > 0 else None,
+    }
+
+
+async def run_batch(
+    paths: List[str],
+    workers: Optional[int] = None,
+    checkpoint_path: Optional[str] = None,
+    model_name: Optional[str] = None,
+    reprocess: bool = False,
+    on_progress: Optional[ProgressFn] = None
+) -> Dict[str, Any]:
+    """
+    Process every recording under `paths`
+    Skips hashes in the checkpoint or already stored as completed meetings
+    (unless `reprocess`), then runs the rest longest-first on `workers` workers.
+    """
+    workers = max(1, workers or settings.batch_workers)
+    notify = on_progress or (lambda event, data: None)
+    checkpoint = Checkpoint(checkpoint_path)
+    started = time.perf_counter()
+
+    files = discover(paths)
+    loop = asyncio.get_running_loop()
+    hashes = await asyncio.gather(*[loop.run_in_executor(None, hash_file, str(p)) for p in files])
+
+    skipped: List[Dict[str, Any]] = []
+    already = set() if reprocess else await run_in_session(_processed_hashes(list(set(hashes))))
+    pending: List[Dict[str, Any]] = []
+    seen_hashes: Set[str] = set()
+    for path, audio_hash in zip(files, hashes):
+        if audio_hash in checkpoint.done or audio_hash in already or audio_hash in seen_hashes:
+            reason = "duplicate" if audio_hash in seen_hashes else "already processed"
+            skipped.append({"file": str(path), "audio_hash": audio_hash, "reason": reason})
+            notify("skip", skipped[-1])
+            continue
+        seen_hashes.add(audio_hash)
+        pending.append({"path": path, "audio_hash": audio_hash})
+
+    probe_limit = asyncio.Semaphore(8)
+
+    async def probe(item):
+        async with probe_limit:
+            item["duration"] = await probe_duration(item["path"])
+
+    await asyncio.gather(*[probe(item) for item in pending])
+
+    # Longest first: big files start early instead of trailing alone at the end
+    pending.sort(
+        key=lambda item: (item["duration"] or 0.0, item["path"].stat().st_size),
+        reverse=True
+    )
+    logger.info(f"Batch: {len(pending)} to process, {len(skipped)} skipped, {workers} worker(s)")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+
+    processed: List[Dict[str, Any]] = []
+    failed: List[Dict[str, Any]] = []
+
+    async def worker():
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                report = await _process_one(item, model_name)
+                processed.append(report)
+                checkpoint.record(item["audio_hash"], report, ok=True)
+                notify("file", {**report, "done": len(processed) + len(failed), "total": len(pending)})
+            except Exception as e:
+                entry = {"file": str(item["path"]), "audio_hash": item["audio_hash"], "error": str(e)}
+                failed.append(entry)
+                checkpoint.record(item["audio_hash"], entry, ok=False)
+                logger.error(f"Batch: {item['path']} failed: {e}")
+                notify("file_failed", {**entry, "done": len(processed) + len(failed), "total": len(pending)})
+
+    await asyncio.gather(*[worker() for _ in range(min(workers, len(pending)) or 1)])
+
+    wall = time.perf_counter() - started
+    audio_seconds = sum(r["audio_seconds"] for r in processed)
+    return {
+        "files": len(files),
+        "processed": len(processed),
+        "skipped": len(skipped),
+        "failed": len(failed),
+        "workers": workers,
+        "audio_seconds": round(audio_seconds, 1),
+        "wall_seconds": round(wall, 2),
+        "audio_seconds_per_wall_second": round(audio_seconds / wall, 2) if wall > 0 else None,
+        "results": processed,
+        "skipped_files": skipped,
+        "failed_files": failed,
+    }
+
+
+def resolve_batch_paths(paths: List[str]) -> List[str]:
+    """API paths are relative to BATCH_ROOT and may not escape it"""
+    if not settings.batch_root:
+        raise PermissionError("Batch processing over the API is disabled (set BATCH_ROOT)")
+    root = Path(settings.batch_root).resolve()
+    resolved = []
+    for entry in paths:
+        path = (root / entry).resolve()
+        if path != root and root not in path.parents:
+            raise PermissionError(f"{entry} is outside BATCH_ROOT")
+        resolved.append(str(path))
+    return resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Recordings and/or directories to process")
+    parser.add_argument("--workers", type=int, default=settings.batch_workers)
+    parser.add_argument("--checkpoint", help="JSON checkpoint file to resume from and update")
+    parser.add_argument("--model", help="Whisper model size")
+    parser.add_argument("--reprocess", action="store_true", help="Do not skip hashes already in the database")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.log_level)
+
+    from database import init_db
+    from modules.llm_client import close_ollama_client
+    from modules.transcription import shutdown_chunk_pool
+
+    init_db()
+
+    def progress(event: str, data: Dict[str, Any]):
+        if event == "file":
+            print(f"[{data['done']}/{data['total']}] {data['file']}: {data['task_count']} tasks, "
+                  f"{data['audio_seconds']}s audio in {data['wall_seconds']}s "
+                  f"({data['audio_seconds_per_wall_second']}x)", flush=True)
+        elif event == "file_failed":
+            print(f"[{data['done']}/{data['total']}] {data['file']}: FAILED {data['error']}", flush=True)
+        elif event == "skip":
+            print(f"skip {data['file']} ({data['reason']})", flush=True)
+
+    async def run():
+        try:
+            return await run_batch(args.paths, args.workers, args.checkpoint, args.model,
+                                   args.reprocess, progress)
+        finally:
+            await close_ollama_client()
+
+    try:
+        summary = asyncio.run(run())
+    finally:
+        shutdown_chunk_pool()
+    print(json.dumps({k: v for k, v in summary.items() if k not in ("results", "skipped_files")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
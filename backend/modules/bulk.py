@@ -0,0 +1,331 @@
+"""
+Bulk persistence for tasks, segments, chats and imported meetings
+Tasks and transcript segments are written with one executemany INSERT instead
+of an ORM object per row (re-extracted tasks replace a whole batch of meetings
+in one transaction), chats go through a write-behind buffer flushed in
+batches, and pre-transcribed meetings can be imported from JSONL one
+transaction per batch
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal, run_in_session, Meeting, Task, Chat, TranscriptSegment
+from modules.task_extractor import IMPORTED_VERSION, normalize_task
+
+logger = logging.getLogger(__name__)
+
+
+def task_rows(
+    meeting_id: int,
+    tasks: List[Dict[str, Any]],
+    stamp: Optional[Dict[str, str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Extracted task dicts -> tasks table rows (same defaults as the old per-row path)
+    `stamp` is task_extractor.extraction_stamp() for freshly extracted tasks
+    """
+    stamp = stamp or {}
+    return [
+        {
+            "meeting_id": meeting_id,
+            "task": task.get("task", ""),
+            "owner": task.get("owner", "unknown"),
+            "deadline": task.get("deadline", "unknown"),
+            "confidence": task.get("confidence", 0.5),
+            "extractor_version": stamp.get("extractor_version"),
+            "extraction_model": stamp.get("extraction_model"),
+        }
+        for task in tasks
+    ]
+
+
+def insert_tasks(
+    db: Session,
+    meeting_id: int,
+    tasks: List[Dict[str, Any]],
+    stamp: Optional[Dict[str, str]] = None
+) -> int:
+    """Insert a meeting's tasks in one executemany; caller commits"""
+    rows = task_rows(meeting_id, tasks, stamp)
+    if rows:
+        db.execute(insert(Task), rows)
+    return len(rows)
+
+
+def replace_tasks(db: Session, results: Dict[int, List[Dict[str, Any]]], stamp: Dict[str, str]) -> int:
+    """
+    Swap the tasks of several meetings for freshly extracted ones: one DELETE,
+    one executemany INSERT and one UPDATE stamping the meetings; caller commits.
+    Meetings deleted in the meantime are skipped. Returns the meetings updated.
+    """
+    ids = [row.id for row in db.query(Meeting.id).filter(Meeting.id.in_(list(results))).all()]
+    if not ids:
+        return 0
+    db.query(Task).filter(Task.meeting_id.in_(ids)).delete(synchronize_session=False)
+    rows = [row for meeting_id in ids for row in task_rows(meeting_id, results[meeting_id], stamp)]
+    if rows:
+        db.execute(insert(Task), rows)
+    db.query(Meeting).filter(Meeting.id.in_(ids)).update(
+        {**stamp, "status": "completed"}, synchronize_session=False
+    )
+    return len(ids)
+
+
+def insert_segments(db: Session, meeting_id: int, segments: List[Dict[str, Any]]) -> int:
+    """Replace a meeting's transcript segments with one executemany; caller commits"""
+    db.query(TranscriptSegment).filter(TranscriptSegment.meeting_id == meeting_id).delete(synchronize_session=False)
+    rows = [
+        {
+            "meeting_id": meeting_id,
+            "position": i,
+            "start": seg.get("start"),
+            "end": seg.get("end"),
+            "text": seg.get("text", ""),
+            "avg_logprob": seg.get("avg_logprob"),
+            "no_speech_prob": seg.get("no_speech_prob"),
+        }
+        for i, seg in enumerate(segments)
+    ]
+    if rows:
+        db.execute(insert(TranscriptSegment), rows)
+    return len(rows)
+
+
+class ChatBuffer:
+    """
+    Write-behind buffer for chat history
+
+    add() returns as soon as the row is queued; a background task inserts
+    everything pending at most every `interval` seconds (sooner once
+    `max_pending` rows are waiting). A failed insert puts its rows back in
+    front of the queue; they are dropped (and counted as failed) only after
+    `max_attempts` failures in a row. stop() flushes what is left.
+    """
+
+    def __init__(self, interval: float = 0.5, max_pending: int = 200, max_attempts: int = 3):
+        self.interval = interval
+        self.max_pending = max(1, max_pending)
+        self.max_attempts = max(1, max_attempts)
+        self._failures = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.flushed_rows = 0
+        self.flushes = 0
+        self.failed_rows = 0
+
+    async def start(self):
+        if self._task:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._pending:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Chat history flush failed: {e}")
+
+    async def add(self, meeting_id: int, question: str, answer: str):
+        row = {
+            "meeting_id": meeting_id,
+            "question": question,
+            "answer": answer,
+            "created_at": datetime.utcnow(),
+        }
+        if self._task is None:
+            # Not started (e.g. scripts) - write through
+            self._pending.append(row)
+            await self.flush()
+            return
+        self._pending.append(row)
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Chat history flush failed: {e}")
+
+    async def flush(self):
+        """Insert all pending rows in one transaction"""
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+
+        def write(db: Session):
+            db.execute(insert(Chat), rows)
+            db.commit()
+
+        try:
+            if self._flush_lock is not None:
+                async with self._flush_lock:
+                    await run_in_session(write)
+            else:
+                await run_in_session(write)
+        except Exception:
+            self._failures += 1
+            if self._failures < self.max_attempts:
+                # Keep them for the next flush, ahead of rows added meanwhile
+                self._pending[:0] = rows
+            else:
+                logger.error(f"Dropping {len(rows)} chat row(s) after {self._failures} failed inserts")
+                self._failures = 0
+                self.failed_rows += len(rows)
+            raise
+        self._failures = 0
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows,
+            "flush_interval_seconds": self.interval,
+        }
+
+
+# Global chat buffer instance
+chat_buffer = ChatBuffer(
+    interval=settings.chat_flush_interval_ms / 1000,
+    max_pending=settings.chat_buffer_max_pending
+)
+
+
+def _parse_line(line: str) -> Dict[str, Any]:
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("line is not a JSON object")
+    transcript = record.get("transcript")
+    if not isinstance(transcript, str):
+        raise ValueError("missing transcript")
+    tasks = record.get("tasks") or []
+    chats = record.get("chats") or []
+    if not isinstance(tasks, list) or not isinstance(chats, list):
+        raise ValueError("tasks and chats must be lists")
+    upload_date = record.get("upload_date")
+    return {
+        "filename": str(record.get("filename") or "imported"),
+        "transcript": transcript,
+        "upload_date": datetime.fromisoformat(upload_date) if upload_date else datetime.utcnow(),
+        # Same shape as freshly extracted tasks, so one odd field cannot fail the batch insert
+        "tasks": [normalize_task(t) for t in tasks if isinstance(t, dict)],
+        "chats": [
+            {"question": str(c["question"]), "answer": str(c.get("answer") or "")}
+            for c in chats if isinstance(c, dict) and c.get("question") is not None
+        ],
+    }
+
+
+def _write_batch(db: Session, records: List[Dict[str, Any]]) -> List[int]:
+    """One transaction: meetings, then all their tasks and chats via executemany"""
+    stamp = {"extractor_version": IMPORTED_VERSION}
+    meetings = [
+        Meeting(
+            filename=r["filename"],
+            upload_date=r["upload_date"],
+            transcript=r["transcript"],
+            transcript_length=len(r["transcript"]),
+            status="completed",
+            **stamp,
+        )
+        for r in records
+    ]
+    db.add_all(meetings)
+    db.flush()
+
+    tasks, chats = [], []
+    for meeting, record in zip(meetings, records):
+        tasks.extend(task_rows(meeting.id, record["tasks"], stamp))
+        chats.extend(
+            {"meeting_id": meeting.id, "question": c["question"], "answer": c.get("answer", "")}
+            for c in record["chats"]
+        )
+    if tasks:
+        db.execute(insert(Task), tasks)
+    if chats:
+        db.execute(insert(Chat), chats)
+    db.commit()
+    return [m.id for m in meetings]
+
+
+def import_meetings(stream: BinaryIO, batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Import pre-transcribed meetings from JSONL, one object per line:
+    {"filename", "transcript", "upload_date"?, "tasks"?: [...], "chats"?: [{"question", "answer"}]}
+    Invalid lines are reported and skipped; a failed batch rolls back on its own.
+    Chat retrieval indexes are built lazily on first question.
+    """
+    batch_size = max(1, batch_size or settings.import_batch_size)
+    meeting_ids: List[int] = []
+    errors: List[Dict[str, Any]] = []
+    batches = 0
+    task_count = 0
+    batch: List[Dict[str, Any]] = []
+    batch_lines: List[int] = []
+
+    db = SessionLocal()
+
+    def commit_batch():
+        nonlocal batches, task_count
+        try:
+            meeting_ids.extend(_write_batch(db, batch))
+            task_count += sum(len(r["tasks"]) for r in batch)
+            batches += 1
+        except Exception as e:
+            db.rollback()
+            errors.append({"lines": [batch_lines[0], batch_lines[-1]], "error": str(e)})
+        batch.clear()
+        batch_lines.clear()
+
+    try:
+        for line_no, raw in enumerate(stream, start=1):
+            line = raw.decode("utf-8", errors="replace").strip() if isinstance(raw, bytes) else raw.strip()
+            if not line:
+                continue
+            try:
+                batch.append(_parse_line(line))
+                batch_lines.append(line_no)
+            except (ValueError, TypeError) as e:
+                errors.append({"line": line_no, "error": str(e)})
+                continue
+            if len(batch) >= batch_size:
+                commit_batch()
+        if batch:
+            commit_batch()
+    finally:
+        db.close()
+
+    logger.info(f"Imported {len(meeting_ids)} meeting(s) in {batches} batch(es), {len(errors)} error(s)")
+    return {
+        "imported": len(meeting_ids),
+        "tasks": task_count,
+        "batches": batches,
+        "first_meeting_id": meeting_ids[0] if meeting_ids else None,
+        "last_meeting_id": meeting_ids[-1] if meeting_ids else None,
+        "errors": errors[:100],
+        "error_count": len(errors),
+    }
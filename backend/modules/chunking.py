@@ -0,0 +1,111 @@
+"""
+Audio chunking helpers for long recordings
+Splits decoded audio at quiet points and stitches chunk transcripts back together
+"""
+import re
+from typing import List, Tuple
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper's native rate
+FRAME_SECONDS = 0.03
+
+
+FRAMES_PER_BLOCK = 20000  # ~10 minutes of 30ms frames converted at a time
+
+
+def frame_energy(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    RMS energy per 30ms frame, on the float scale whether `audio` is float32
+    or int16 PCM. Converted block by block, so a memory-mapped recording is
+    never copied whole.
+    """
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    usable = len(audio) - len(audio) % frame
+    if usable == 0:
+        return np.zeros(0, dtype=np.float32)
+    scale = 1.0 / 32768 if audio.dtype == np.int16 else 1.0
+    frames = audio[:usable].reshape(-1, frame)
+    energy = np.empty(len(frames), dtype=np.float32)
+    for i in range(0, len(frames), FRAMES_PER_BLOCK):
+        block = frames[i:i + FRAMES_PER_BLOCK].astype(np.float32)
+        block *= scale
+        energy[i:i + FRAMES_PER_BLOCK] = np.sqrt(np.mean(block * block, axis=1))
+    return energy
+
+
+def find_split_points(
+    audio: np.ndarray,
+    chunk_seconds: float,
+    search_seconds: float = 10.0,
+    sample_rate: int = SAMPLE_RATE
+) -> List[int]:
+    """
+    Choose chunk boundaries (sample offsets) near every `chunk_seconds`,
+    snapped to the quietest frame within +/- `search_seconds`
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * sample_rate)
+    if total <= chunk:
+        return [0, total]
+
+    energy = frame_energy(audio, sample_rate)
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    search = int(search_seconds * sample_rate)
+
+    points = [0]
+    target = chunk
+    while total - target > chunk // 4:
+        lo = max(points[-1] + frame, target - search) // frame
+        hi = min(total - frame, target + search) // frame
+        if hi > lo:
+            split = (lo + int(np.argmin(energy[lo:hi]))) * frame
+        else:
+            split = target
+        points.append(split)
+        target = split + chunk
+    points.append(total)
+    return points
+
+
+def plan_chunks(
+    audio: np.ndarray,
+    chunk_seconds: float,
+    overlap_seconds: float,
+    sample_rate: int = SAMPLE_RATE
+) -> List[Tuple[int, int]]:
+    """
+    (start, end) sample ranges; each chunk runs `overlap_seconds` past
+    its boundary so words cut at the split are heard in full at least once
+    """
+    points = find_split_points(audio, chunk_seconds, sample_rate=sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    total = len(audio)
+    return [
+        (start, min(total, end + overlap))
+        for start, end in zip(points[:-1], points[1:])
+    ]
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def stitch_texts(texts: List[str], max_overlap_words: int = 60, min_match_words: int = 2) -> str:
+    """
+    Join chunk transcripts in order, dropping the words at the start of each
+    chunk that repeat the end of the previous one (the overlap region)
+    """
+    words: List[str] = []
+    for text in texts:
+        incoming = text.split()
+        if not incoming:
+            continue
+        if words:
+            tail = [_normalize(w) for w in words[-max_overlap_words:]]
+            head = [_normalize(w) for w in incoming[:max_overlap_words]]
+            for k in range(min(len(tail), len(head)), min_match_words - 1, -1):
+                if tail[-k:] == head[:k]:
+                    incoming = incoming[k:]
+                    break
+        words.extend(incoming)
+    return " ".join(words)
@@ -0,0 +1,237 @@
+"""
+Background job queue for long-running processing
+Runs the transcription + extraction pipeline outside the request cycle
+so /api/process returns immediately with a pollable job id
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from modules import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Lanes have their own queue and workers, so long backfills in the
+# background lane never hold up interactive jobs in the default one
+DEFAULT_LANE = "default"
+BACKGROUND_LANE = "background"
+
+
+class Job:
+    """A single queued unit of work and its progress"""
+
+    def __init__(self, kind: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = JOB_QUEUED
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.events: List[Dict[str, Any]] = []
+        self._changed = asyncio.Event()
+        self._stage_started = time.perf_counter()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def emit(self, event: str, data: Dict[str, Any]):
+        """Append an event for /api/jobs/{id}/events subscribers"""
+        self.events.append({"seq": len(self.events), "event": event, "data": data})
+        self._changed.set()
+
+    def update(self, stage: str, progress: float):
+        """Record pipeline progress (0.0 - 1.0)"""
+        if stage != self.stage:
+            self._end_stage()
+        self.stage = stage
+        self.progress = max(0.0, min(1.0, progress))
+        self.emit("progress", {"stage": self.stage, "progress": round(self.progress, 3)})
+
+    def _end_stage(self):
+        """Time spent in the current stage -> job_stage_seconds"""
+        now = time.perf_counter()
+        metrics.JOB_STAGE_SECONDS.observe(now - self._stage_started, kind=self.kind, stage=self.stage)
+        self._stage_started = now
+
+    async def wait_for_events(self, after: int, timeout: float) -> bool:
+        """Wait until there are events past `after` (or the job ends); False on timeout"""
+        while len(self.events) <= after and not self.finished:
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "params": self.params,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+JobHandler = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    Bounded asyncio worker pool
+
+    Jobs are kept in memory; finished jobs are trimmed to `history_limit`
+    so the registry does not grow without bound. Each job kind runs in a
+    lane: `workers` serve the default lane, `lanes` maps further lane names
+    to their worker counts.
+    """
+
+    def __init__(self, workers: int = 1, history_limit: int = 200, lanes: Optional[Dict[str, int]] = None):
+        self.workers = max(1, workers)
+        self.history_limit = history_limit
+        self._lane_workers: Dict[str, int] = {DEFAULT_LANE: self.workers}
+        self._lane_workers.update({lane: max(1, n) for lane, n in (lanes or {}).items()})
+        self._handlers: Dict[str, JobHandler] = {}
+        self._kind_lanes: Dict[str, str] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler, lane: str = DEFAULT_LANE):
+        """Register the coroutine that runs jobs of a given kind, and its lane"""
+        if lane not in self._lane_workers:
+            raise ValueError(f"Unknown job lane: {lane}")
+        self._handlers[kind] = handler
+        self._kind_lanes[kind] = lane
+
+    async def start(self):
+        """Spawn worker tasks on the running event loop"""
+        if self._tasks:
+            return
+        for lane, workers in self._lane_workers.items():
+            self._queues[lane] = asyncio.Queue()
+            for i in range(workers):
+                self._tasks.append(asyncio.create_task(self._worker(lane, i)))
+        lanes = ", ".join(f"{lane}={n}" for lane, n in self._lane_workers.items())
+        logger.info(f"Job queue started with worker(s) per lane: {lanes}")
+
+    async def stop(self) -> List[Job]:
+        """Cancel workers; queued and running jobs are marked failed and returned"""
+        abandoned = [job for job in self._jobs.values() if job.status in (JOB_QUEUED, JOB_RUNNING)]
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in abandoned:
+            if job.status == JOB_QUEUED:
+                job.status = JOB_FAILED
+                job.error = "Server shut down before job finished"
+                job.finished_at = datetime.utcnow()
+                job._changed.set()
+        return abandoned
+
+    def submit(self, kind: str, **params) -> Job:
+        """Enqueue a job and return it immediately"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        if not self._queues:
+            raise RuntimeError("Job queue is not running")
+
+        job = Job(kind, params)
+        self._jobs[job.id] = job
+        self._queues[self._kind_lanes[kind]].put_nowait(job)
+        self._trim()
+        logger.info(f"Job {job.id} queued ({kind}), depth={self.depth}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, limit: int = 50) -> List[Job]:
+        """Most recent jobs first"""
+        return list(reversed(self._jobs.values()))[:limit]
+
+    def active(self) -> List[Job]:
+        """Jobs that are queued or running"""
+        return [job for job in self._jobs.values() if not job.finished]
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker (all lanes)"""
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def position(self, job: Job) -> int:
+        """Approximate place in line for a queued job within its lane (0 = next)"""
+        if job.status != JOB_QUEUED:
+            return 0
+        lane = self._kind_lanes.get(job.kind)
+        queued = [
+            j for j in self._jobs.values()
+            if j.status == JOB_QUEUED and self._kind_lanes.get(j.kind) == lane
+        ]
+        return queued.index(job) if job in queued else 0
+
+    async def _worker(self, lane: str, index: int):
+        queue = self._queues[lane]
+        while True:
+            job = await queue.get()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        job.update("starting", 0.0)
+        try:
+            with tracing.span(f"job.{job.kind}", job_id=job.id):
+                job.result = await self._handlers[job.kind](job)
+            job.update("done", 1.0)
+            job.status = JOB_DONE
+            logger.info(f"Job {job.id} finished")
+        except asyncio.CancelledError:
+            job.status = JOB_FAILED
+            job.error = "Cancelled"
+            raise
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.error = str(e)
+            logger.error(f"Job {job.id} failed: {e}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            if job.status == JOB_FAILED:
+                job._end_stage()
+            job.emit(job.status, {"error": job.error} if job.error else {})
+
+    def _trim(self):
+        """Drop the oldest finished jobs beyond the history limit"""
+        excess = len(self._jobs) - self.history_limit
+        if excess <= 0:
+            return
+        for job_id in list(self._jobs.keys()):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].status in (JOB_DONE, JOB_FAILED):
+                del self._jobs[job_id]
+                excess -= 1
@@ -0,0 +1,123 @@
+"""
+Incremental, tolerant JSON parsing for LLM output
+Pulls complete objects out of the first JSON array in a stream of text as
+tokens arrive. Prose, markdown fences and wrapper objects around the array
+are ignored, and a response cut off mid-array still yields every object that
+was finished.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def loads_lenient(text: str) -> Any:
+    """json.loads, retrying once with trailing commas removed"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", text))
+
+
+class ArrayItemParser:
+    """
+    Feed text chunks; get back the objects that became complete
+
+    Objects are collected when they are direct elements of an array, so
+    `[{...}, {...}]` and `{"tasks": [{...}, {...}]}` both yield the inner
+    objects. Objects nested inside a collected object stay part of it.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._capture_start: Optional[int] = None
+        self._capture_depth = 0
+        self.items: List[Dict[str, Any]] = []
+        self.errors = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self.buffer += chunk
+        found: List[Dict[str, Any]] = []
+        text = self.buffer
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                # Quotes only matter once inside JSON; stray prose quotes are ignored
+                if self._stack:
+                    self._in_string = True
+            elif ch in "{[":
+                if ch == "{" and self._capture_start is None and self._stack and self._stack[-1] == "[":
+                    self._capture_start = i
+                    self._capture_depth = len(self._stack)
+                self._stack.append(ch)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if ch == "}" and self._capture_start is not None and len(self._stack) == self._capture_depth:
+                    item = self._parse(text[self._capture_start:i + 1])
+                    self._capture_start = None
+                    if item is not None:
+                        found.append(item)
+        self._pos = len(text)
+        self.items.extend(found)
+        return found
+
+    def _parse(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = loads_lenient(text)
+        except json.JSONDecodeError:
+            self.errors += 1
+            return None
+        return value if isinstance(value, dict) else None
+
+    def empty_result(self) -> bool:
+        """True if the response is valid JSON that simply holds no items ([] or {"tasks": []})"""
+        starts = [i for i in (self.buffer.find("["), self.buffer.find("{")) if i != -1]
+        end = max(self.buffer.rfind("]"), self.buffer.rfind("}"))
+        if not starts or end < min(starts):
+            return False
+        try:
+            value = loads_lenient(self.buffer[min(starts):end + 1])
+        except json.JSONDecodeError:
+            return False
+        if isinstance(value, list):
+            return not value
+        return isinstance(value, dict) and any(isinstance(v, list) and not v for v in value.values())
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Finish the stream: if no array elements were found, accept a bare
+        top-level object (some models answer a single item without an array)
+        """
+        if self.items:
+            return self.items
+        start = self.buffer.find("{")
+        end = self.buffer.rfind("}")
+        if start != -1 and end > start:
+            try:
+                value = loads_lenient(self.buffer[start:end + 1])
+            except json.JSONDecodeError:
+                return self.items
+            if isinstance(value, dict) and not any(isinstance(v, list) for v in value.values()):
+                self.items.append(value)
+        return self.items
+
+
+def parse_array_items(text: str) -> List[Dict[str, Any]]:
+    """One-shot convenience wrapper"""
+    parser = ArrayItemParser()
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,282 @@
+"""
+Storage lifecycle for uploaded recordings
+Session-scoped cleanup, a background sweeper with age and quota eviction,
+optional transcoding of retained audio to compact 16 kHz mono, and disk metrics
+Decoded PCM kept next to a recording (.<sha256>.pcm) counts towards its size and
+is deleted with it
+"""
+import asyncio
+import glob
+import logging
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+from config import settings
+from database import SessionLocal, UploadSession
+from modules import audio
+from modules.storage import hash_from_filename
+
+logger = logging.getLogger(__name__)
+
+# Stale temp files from aborted uploads are removed after this long
+PART_FILE_MAX_AGE_SECONDS = 3600
+
+TRANSCODE_ARGS = {
+    "opus": ["-c:a", "libopus", "-b:a", "24k"],
+    "flac": ["-c:a", "flac", "-compression_level", "8"],
+}
+
+# Returns filenames that queued/running jobs still need
+InUseFn = Callable[[], Set[str]]
+
+_stats_lock = threading.Lock()
+_stats = {
+    "files_deleted": 0,
+    "bytes_deleted": 0,
+    "files_transcoded": 0,
+    "bytes_saved_by_transcoding": 0,
+    "sweeps": 0,
+    "last_sweep_at": None,
+}
+
+
+def _count(**deltas):
+    with _stats_lock:
+        for key, value in deltas.items():
+            _stats[key] += value
+
+
+def resolve_upload(upload_dir: Path, filename: str) -> Optional[Path]:
+    """
+    Locate a stored recording; falls back to a transcoded copy that
+    shares the content-addressed stem (e.g. <sha>.mp3 -> <sha>.opus)
+    Only names that are a content hash get the fallback, so a client cannot
+    reach a recording without knowing its hash
+    """
+    path = upload_dir / Path(filename).name
+    if path.exists():
+        return path
+    audio_hash = hash_from_filename(path.name)
+    if audio_hash is None:
+        return None
+    for candidate in upload_dir.glob(f"{glob.escape(audio_hash)}.*"):
+        if not candidate.name.startswith("."):
+            return candidate
+    return None
+
+
+def register_session(filename: str, session_id: Optional[str]):
+    """Record that a browser session references an upload"""
+    if not session_id:
+        return
+    db = SessionLocal()
+    try:
+        exists = db.query(UploadSession).filter(
+            UploadSession.session_id == session_id,
+            UploadSession.filename == filename
+        ).first()
+        if not exists:
+            db.add(UploadSession(session_id=session_id, filename=filename))
+            db.commit()
+    finally:
+        db.close()
+
+
+def _delete_file(path: Path) -> int:
+    try:
+        size = path.stat().st_size
+        path.unlink()
+    except FileNotFoundError:
+        return 0
+    _count(files_deleted=1, bytes_deleted=size)
+    return size
+
+
+def _footprint(path: Path) -> int:
+    """Recording size plus its kept PCM"""
+    pcm = audio.pcm_path(path)
+    return path.stat().st_size + (pcm.stat().st_size if pcm.exists() else 0)
+
+
+def _delete_upload(path: Path) -> int:
+    freed = _delete_file(path)
+    pcm = audio.pcm_path(path)
+    if pcm.exists() and not audio.in_use(pcm):
+        freed += _delete_file(pcm)
+    return freed
+
+
+def _busy_stems(in_use: InUseFn) -> Set[str]:
+    """Content-addressed stems of files in use (survive transcoding renames)"""
+    return {Path(name).stem for name in in_use()}
+
+
+def _forget_files(db, filenames: List[str]):
+    """Drop session references to deleted recordings, whatever their extension"""
+    for stem in {Path(name).stem for name in filenames}:
+        db.query(UploadSession).filter(
+            UploadSession.filename.like(f"{stem}.%")
+        ).delete(synchronize_session=False)
+
+
+def cleanup_session(upload_dir: Path, session_id: str, in_use: InUseFn) -> Dict[str, Any]:
+    """
+    Drop a session's references and delete recordings no other session
+    still references (files needed by running jobs are kept)
+    """
+    db = SessionLocal()
+    try:
+        filenames = [
+            row.filename for row in
+            db.query(UploadSession.filename).filter(UploadSession.session_id == session_id).all()
+        ]
+        db.query(UploadSession).filter(
+            UploadSession.session_id == session_id
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        busy = _busy_stems(in_use)
+        deleted, freed = [], 0
+        for filename in filenames:
+            still_referenced = db.query(UploadSession).filter(UploadSession.filename == filename).first()
+            if still_referenced or Path(filename).stem in busy:
+                continue
+            path = resolve_upload(upload_dir, filename)
+            if path is not None:
+                freed += _delete_upload(path)
+                deleted.append(filename)
+        return {"session_id": session_id, "deleted": deleted, "bytes_freed": freed}
+    finally:
+        db.close()
+
+
+def _stored_files(upload_dir: Path) -> List[Path]:
+    return [p for p in upload_dir.iterdir() if p.is_file() and not p.name.startswith(".")]
+
+
+def sweep(upload_dir: Path, in_use: InUseFn) -> Dict[str, Any]:
+    """
+    Evict recordings older than STORAGE_MAX_AGE_HOURS, then the least recently
+    modified ones until usage is under STORAGE_QUOTA_MB
+    """
+    now = time.time()
+    busy = _busy_stems(in_use)
+    deleted: List[str] = []
+
+    # Orphaned temp files from interrupted uploads
+    for part in upload_dir.glob(".*.part"):
+        if now - part.stat().st_mtime > PART_FILE_MAX_AGE_SECONDS:
+            _delete_file(part)
+
+    # Kept PCM whose recording is gone
+    for pcm in upload_dir.glob(f".*{audio.PCM_SUFFIX}"):
+        stem = pcm.name[1:-len(audio.PCM_SUFFIX)]
+        if stem not in busy and not audio.in_use(pcm) and resolve_upload(upload_dir, stem) is None:
+            _delete_file(pcm)
+
+    files = sorted(_stored_files(upload_dir), key=lambda p: p.stat().st_mtime)
+
+    if settings.storage_max_age_hours > 0:
+        cutoff = now - settings.storage_max_age_hours * 3600
+        for path in list(files):
+            if path.stat().st_mtime < cutoff and path.stem not in busy:
+                _delete_upload(path)
+                deleted.append(path.name)
+                files.remove(path)
+
+    if settings.storage_quota_mb > 0:
+        quota = settings.storage_quota_mb * 1024 * 1024
+        total = sum(_footprint(p) for p in files)
+        for path in list(files):
+            if total <= quota:
+                break
+            if path.stem in busy:
+                continue
+            total -= _delete_upload(path)
+            deleted.append(path.name)
+
+    if deleted:
+        db = SessionLocal()
+        try:
+            _forget_files(db, deleted)
+            db.commit()
+        finally:
+            db.close()
+        logger.info(f"Storage sweep removed {len(deleted)} recording(s)")
+
+    with _stats_lock:
+        _stats["sweeps"] += 1
+        _stats["last_sweep_at"] = now
+    return {"deleted": deleted}
+
+
+async def run_sweeper(upload_dir: Path, in_use: InUseFn):
+    """Background loop started at app startup"""
+    while True:
+        try:
+            await asyncio.to_thread(sweep, upload_dir, in_use)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Storage sweep failed: {e}")
+        await asyncio.sleep(settings.storage_sweep_interval_seconds)
+
+
+async def transcode(path: Path) -> Path:
+    """
+    Re-encode a retained recording as 16 kHz mono Opus/FLAC (STORAGE_TRANSCODE_FORMAT)
+    Returns the new path, or the original if disabled, unchanged or failed
+    """
+    fmt = settings.storage_transcode_format
+    if fmt not in TRANSCODE_ARGS or path.suffix.lower() == f".{fmt}":
+        return path
+
+    target = path.with_suffix(f".{fmt}")
+    tmp = path.with_name(f".{path.stem}.{fmt}.part")
+    # Encode from the kept PCM when there is one instead of decoding again
+    pcm = audio.pcm_path(path)
+    source = ["-f", "s16le", "-ar", "16000", "-ac", "1", "-i", str(pcm)] if pcm.exists() else ["-i", str(path)]
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-y", "-loglevel", "error", *source,
+        "-vn", "-ac", "1", "-ar", "16000", *TRANSCODE_ARGS[fmt], "-f", "ogg" if fmt == "opus" else fmt, str(tmp),
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        logger.error(f"Transcoding {path.name} failed: {stderr.decode(errors='replace')[:300]}")
+        tmp.unlink(missing_ok=True)
+        return path
+
+    before = path.stat().st_size
+    after = tmp.stat().st_size
+    if after >= before:
+        tmp.unlink(missing_ok=True)
+        return path
+
+    tmp.replace(target)
+    path.unlink(missing_ok=True)
+    _count(files_transcoded=1, bytes_saved_by_transcoding=before - after)
+    logger.info(f"Transcoded {path.name} -> {target.name} ({before / 1e6:.1f} MB -> {after / 1e6:.1f} MB)")
+    return target
+
+
+def usage(upload_dir: Path) -> Dict[str, Any]:
+    """Disk usage of the upload directory and lifecycle counters"""
+    files = _stored_files(upload_dir)
+    disk = shutil.disk_usage(upload_dir)
+    with _stats_lock:
+        counters = dict(_stats)
+    return {
+        "upload_dir": str(upload_dir),
+        "files": len(files),
+        "bytes": sum(_footprint(p) for p in files),
+        "quota_bytes": settings.storage_quota_mb * 1024 * 1024 if settings.storage_quota_mb > 0 else None,
+        "max_age_hours": settings.storage_max_age_hours or None,
+        "transcode_format": settings.storage_transcode_format or None,
+        "disk_total_bytes": disk.total,
+        "disk_free_bytes": disk.free,
+        **counters,
+    }
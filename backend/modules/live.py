@@ -0,0 +1,493 @@
+"""
+Live transcription over WebSocket
+Audio arrives in small chunks while the meeting is running. Whisper
+re-decodes a sliding window over the not-yet-final audio every
+LIVE_STEP_SECONDS of new audio: segments ending well before the window edge
+are finalized and cut from the window, the rest is sent as a partial that
+later passes may revise. The window never grows past LIVE_WINDOW_SECONDS, so
+each decode (and the wait before text becomes final) is bounded per chunk,
+not by the length of the meeting.
+
+Finalized text goes to task extraction every LIVE_EXTRACT_MIN_WORDS words
+and once more at the end; the finished meeting is stored like a processed
+upload (transcript, segments, tasks, chat index).
+
+Input formats:
+    pcm16 - little-endian signed 16-bit PCM, any sample rate / channel count
+    opus  - Ogg or WebM Opus as produced by MediaRecorder (decoded by ffmpeg)
+
+Protocol: binary messages carry audio; send {"type": "stop"} to finish.
+The server sends ready, partial, segment, task, extraction_failed, done and
+error messages as JSON.
+"""
+import asyncio
+import bisect
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy.orm import Session
+from config import settings
+from database import run_in_session, Meeting
+from modules import metrics, retrieval, vad
+from modules.bulk import insert_segments, insert_tasks
+from modules.chunking import SAMPLE_RATE
+from modules.task_extractor import extract_tasks, extraction_stamp, merge_tasks, ExtractionError
+from modules.transcription import transcribe_window
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("pcm16", "opus")
+
+# Decoders hand 16 kHz mono float32 samples to this
+AudioSink = Callable[[np.ndarray], None]
+SendFn = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_active = 0
+_totals = {"sessions": 0, "audio_seconds": 0.0, "segments": 0, "decodes": 0}
+
+
+def pcm16_to_float(data: bytes, channels: int = 1) -> np.ndarray:
+    samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+class PCMDecoder:
+    """Raw PCM16; keeps partial frames between messages and resamples to 16 kHz"""
+
+    def __init__(self, sink: AudioSink, sample_rate: int = SAMPLE_RATE, channels: int = 1):
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._rest = b""
+        self._position = 0.0  # input samples consumed, for phase-continuous resampling
+
+    async def start(self):
+        pass
+
+    async def feed(self, data: bytes):
+        data = self._rest + data
+        usable = len(data) - len(data) % (2 * self.channels)
+        self._rest = data[usable:]
+        if not usable:
+            return
+        samples = pcm16_to_float(data[:usable], self.channels)
+        if self.sample_rate != SAMPLE_RATE:
+            samples = self._resample(samples)
+        self.sink(samples)
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        # Output sample times on the input clock, continuing from the last message
+        step = self.sample_rate / SAMPLE_RATE
+        start = self._position
+        end = start + len(samples)
+        first = np.ceil(start / step) * step
+        times = np.arange(first, end - 1e-9, step)
+        self._position = end
+        return np.interp(times - start, np.arange(len(samples)), samples).astype(np.float32)
+
+    async def close(self):
+        pass
+
+
+class FFmpegDecoder:
+    """Compressed stream -> 16 kHz mono via a long-running ffmpeg process"""
+
+    def __init__(self, sink: AudioSink):
+        self.sink = sink
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-loglevel", "error",
+            "-probesize", "32768", "-analyzeduration", "0", "-fflags", "nobuffer",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        self._reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        rest = b""
+        while True:
+            data = await self._process.stdout.read(32768)
+            if not data:
+                return
+            data = rest + data
+            usable = len(data) - len(data) % 2
+            rest = data[usable:]
+            if usable:
+                self.sink(pcm16_to_float(data[:usable]))
+
+    async def feed(self, data: bytes):
+        self._process.stdin.write(data)
+        await self._process.stdin.drain()
+
+    async def close(self):
+        if self._process is None:
+            return
+        if not self._process.stdin.is_closing():
+            self._process.stdin.close()
+        await self._reader
+        await self._process.wait()
+
+
+def make_decoder(audio_format: str, sink: AudioSink, sample_rate: int, channels: int):
+    if audio_format == "pcm16":
+        return PCMDecoder(sink, sample_rate, channels)
+    if audio_format == "opus":
+        return FFmpegDecoder(sink)
+    raise ValueError(f"Unsupported format {audio_format!r}; use one of {', '.join(FORMATS)}")
+
+
+class LiveSession:
+    """Sliding-window incremental transcription of one audio stream"""
+
+    def __init__(self, send: SendFn, model_name: Optional[str] = None, title: Optional[str] = None):
+        self._send_fn = send
+        self._send_lock = asyncio.Lock()
+        self.client_gone = False
+        self.model_name = model_name
+        self.title = title or f"Live meeting {datetime.utcnow():%Y-%m-%d %H:%M}"
+
+        self.step = max(1, int(settings.live_step_seconds * SAMPLE_RATE))
+        self.window = max(self.step, int(settings.live_window_seconds * SAMPLE_RATE))
+        self.holdback = settings.live_holdback_seconds
+
+        self._audio = np.zeros(0, dtype=np.float32)  # not yet finalized
+        self._chunks: List[np.ndarray] = []  # pushed since the last decode, appended lazily
+        self._window_start = 0  # absolute sample offset of _audio[0]
+        self.max_buffer = max(self.window, int(settings.live_max_buffer_seconds * SAMPLE_RATE))
+        self.overflowed = False
+        self.received = 0
+        self._decoded_upto = 0
+        # (samples received so far, monotonic time) to measure finalization latency
+        self._arrivals: List[Tuple[int, float]] = []
+        self._new_audio = asyncio.Event()
+        self._stopping = False
+
+        self.segments: List[Dict[str, Any]] = []
+        self.tasks: List[Dict[str, Any]] = []
+        self.extraction_errors: List[str] = []
+        self._unextracted: List[str] = []
+        self._extract_queue: asyncio.Queue = asyncio.Queue()
+        self._decode_task: Optional[asyncio.Task] = None
+        self._extract_task: Optional[asyncio.Task] = None
+
+    async def send(self, message: Dict[str, Any]):
+        if self.client_gone:
+            return
+        try:
+            async with self._send_lock:
+                await self._send_fn(message)
+        except Exception:
+            # Client disconnected; keep transcribing so the meeting is still saved
+            self.client_gone = True
+
+    def start(self):
+        self._decode_task = asyncio.create_task(self._decode_loop())
+        self._extract_task = asyncio.create_task(self._extract_loop())
+
+    def push(self, samples: np.ndarray):
+        """
+        Append decoded audio (16 kHz mono float32)
+        Once LIVE_MAX_BUFFER_SECONDS of audio is waiting for Whisper, further
+        audio is dropped and `overflowed` is set; serve() then stops the session.
+        """
+        if not len(samples) or self.overflowed:
+            return
+        if self.received + len(samples) - self._window_start > self.max_buffer:
+            self.overflowed = True
+            return
+        self._chunks.append(samples)
+        self.received += len(samples)
+        self._arrivals.append((self.received, time.monotonic()))
+        if self.received - self._decoded_upto >= self.step:
+            self._new_audio.set()
+
+    def _arrival_time(self, sample: int) -> Optional[float]:
+        i = bisect.bisect_left(self._arrivals, (sample, 0.0))
+        return self._arrivals[i][1] if i < len(self._arrivals) else None
+
+    async def _decode_loop(self):
+        while True:
+            await self._new_audio.wait()
+            self._new_audio.clear()
+            final = self._stopping
+            try:
+                await self._decode(final)
+            except Exception as e:
+                logger.error(f"Live decode failed: {e}")
+                await self.send({"type": "error", "detail": f"Transcription failed: {e}"})
+                if final:
+                    # Retrying would fail the same way; give up on the rest
+                    self._window_start += len(self._audio)
+                    self._audio = self._audio[:0]
+                    return
+                # Wait for more audio instead of retrying in a tight loop
+                continue
+            if final and not len(self._audio):
+                return
+            if final or self.received - self._decoded_upto >= self.step:
+                # Still behind (or draining at stop): go again right away
+                self._new_audio.set()
+
+    async def _decode(self, final: bool):
+        if self._chunks:
+            # One copy per decode pass instead of one per pushed chunk
+            self._audio = np.concatenate([self._audio, *self._chunks])
+            self._chunks = []
+        window = self._audio[:self.window]
+        self._decoded_upto = self._window_start + len(window)
+        full = len(window) >= self.window
+        window_seconds = len(window) / SAMPLE_RATE
+        if not len(window):
+            return
+
+        if settings.vad_enabled and not vad.get_detector()(window):
+            segments: List[Dict[str, Any]] = []
+        else:
+            started = time.perf_counter()
+            segments = await transcribe_window(window, self.model_name)
+            for segment in segments:
+                # Whisper can overshoot the end of the audio on the last segment
+                segment["end"] = min(segment["end"], round(window_seconds, 2))
+                segment["start"] = min(segment["start"], segment["end"])
+            metrics.LIVE_DECODE_SECONDS.observe(time.perf_counter() - started)
+            _totals["decodes"] += 1
+
+        # Final: a prefix of segments ending before the holdback zone, never the
+        # last one (it may still be growing) - unless stopping or the window is full
+        if final:
+            done = segments
+        else:
+            done = []
+            for segment in segments[:-1]:
+                if segment["end"] > window_seconds - self.holdback:
+                    break
+                done.append(segment)
+            if full and not done:
+                done = segments[:-1] or segments
+        pending = segments[len(done):]
+
+        if done:
+            cut = min(len(window), int(round(done[-1]["end"] * SAMPLE_RATE)))
+        elif final or (full and not segments):
+            cut = len(window)  # silence, or everything has been emitted
+        else:
+            cut = 0
+        if final and not pending:
+            cut = len(window)
+
+        offset = self._window_start / SAMPLE_RATE
+        now = time.monotonic()
+        for segment in done:
+            segment = {**segment, "start": round(segment["start"] + offset, 2), "end": round(segment["end"] + offset, 2)}
+            arrived = self._arrival_time(int(segment["end"] * SAMPLE_RATE))
+            latency = round(now - arrived, 3) if arrived is not None else None
+            if latency is not None:
+                metrics.LIVE_FINAL_LATENCY_SECONDS.observe(latency)
+            self.segments.append(segment)
+            _totals["segments"] += 1
+            await self.send({"type": "segment", "index": len(self.segments) - 1, **segment, "latency_seconds": latency})
+            self._queue_for_extraction(segment["text"])
+
+        if cut:
+            self._audio = self._audio[cut:]
+            self._window_start += cut
+            # Arrival times before the window are no longer needed
+            keep = bisect.bisect_left(self._arrivals, (self._window_start, 0.0))
+            del self._arrivals[:max(0, keep - 1)]
+
+        if pending:
+            await self.send({
+                "type": "partial",
+                "start": round(pending[0]["start"] + offset, 2),
+                "end": round(pending[-1]["end"] + offset, 2),
+                "text": " ".join(s["text"] for s in pending),
+                "lag_seconds": round((self.received - self._decoded_upto) / SAMPLE_RATE, 2),
+            })
+
+    def _queue_for_extraction(self, text: str, force: bool = False):
+        if text:
+            self._unextracted.append(text)
+        words = sum(len(t.split()) for t in self._unextracted)
+        if self._unextracted and (force or words >= settings.live_extract_min_words):
+            self._extract_queue.put_nowait(" ".join(self._unextracted))
+            self._unextracted = []
+
+    async def _extract_loop(self):
+        while True:
+            span = await self._extract_queue.get()
+            if span is None:
+                return
+            try:
+                found = await extract_tasks(span, strategy="single")
+            except ExtractionError as e:
+                self.extraction_errors.append(str(e))
+                await self.send({"type": "extraction_failed", "error": str(e)})
+                continue
+            except Exception as e:
+                logger.error(f"Live extraction failed: {e}")
+                self.extraction_errors.append(str(e))
+                continue
+            before = len(self.tasks)
+            self.tasks = merge_tasks(self.tasks + found)
+            for task in self.tasks[before:]:
+                await self.send({"type": "task", **task})
+
+    async def finish(self) -> Dict[str, Any]:
+        """Decode the remaining audio, extract the tail and store the meeting"""
+        self._stopping = True
+        self._new_audio.set()
+        await self._decode_task
+        self._queue_for_extraction("", force=True)
+        self._extract_queue.put_nowait(None)
+        await self._extract_task
+
+        transcript = " ".join(s["text"] for s in self.segments)
+        status = "extraction_failed" if self.extraction_errors and not self.tasks else "completed"
+        # Left unstamped when a span failed, so re-extraction redoes the whole transcript
+        stamp = {} if self.extraction_errors else extraction_stamp()
+        segments, tasks = self.segments, self.tasks
+
+        def save(db: Session) -> int:
+            meeting = Meeting(
+                filename=self.title,
+                transcript=transcript,
+                transcript_length=len(transcript),
+                status=status,
+                **stamp
+            )
+            db.add(meeting)
+            db.flush()
+            insert_segments(db, meeting.id, segments)
+            insert_tasks(db, meeting.id, tasks, stamp)
+            db.commit()
+            return meeting.id
+
+        meeting_id = await run_in_session(save)
+        chunks = await retrieval.build_chunks(meeting_id, transcript)
+
+        def save_chunks(db: Session):
+            retrieval.replace_chunks(db, meeting_id, chunks)
+            db.commit()
+
+        await run_in_session(save_chunks)
+        _totals["audio_seconds"] += self.received / SAMPLE_RATE
+        return {
+            "meeting_id": meeting_id,
+            "status": status,
+            "audio_seconds": round(self.received / SAMPLE_RATE, 2),
+            "segment_count": len(segments),
+            "transcript_length": len(transcript),
+            "tasks": tasks,
+            "task_count": len(tasks),
+        }
+
+    async def abort(self):
+        for task in (self._decode_task, self._extract_task):
+            if task and not task.done():
+                task.cancel()
+        await asyncio.gather(*[t for t in (self._decode_task, self._extract_task) if t], return_exceptions=True)
+
+
+async def serve(
+    websocket: WebSocket,
+    audio_format: str = "pcm16",
+    sample_rate: int = SAMPLE_RATE,
+    channels: int = 1,
+    model_name: Optional[str] = None,
+    title: Optional[str] = None
+):
+    """Run one live session on a WebSocket until the client sends stop or disconnects"""
+    global _active
+    await websocket.accept()
+    if not settings.live_enabled:
+        await websocket.send_json({"type": "error", "detail": "Live transcription is disabled"})
+        await websocket.close(code=1008)
+        return
+    if _active >= settings.live_max_sessions:
+        await websocket.send_json({"type": "error", "detail": "Too many live sessions, try again later"})
+        await websocket.close(code=1013)
+        return
+    if audio_format not in FORMATS or sample_rate <= 0 or channels <= 0:
+        await websocket.send_json({"type": "error", "detail": f"Invalid audio format; use one of {', '.join(FORMATS)}"})
+        await websocket.close(code=1003)
+        return
+
+    _active += 1
+    _totals["sessions"] += 1
+    session = LiveSession(websocket.send_json, model_name, title)
+    decoder = make_decoder(audio_format, session.push, sample_rate, channels)
+    try:
+        try:
+            await decoder.start()
+        except FileNotFoundError:
+            await websocket.send_json({"type": "error", "detail": "ffmpeg is required for opus input"})
+            await websocket.close(code=1011)
+            return
+        session.start()
+        await session.send({"type": "ready", "sample_rate": SAMPLE_RATE, "window_seconds": settings.live_window_seconds})
+
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    session.client_gone = True
+                    break
+                if message.get("bytes"):
+                    await decoder.feed(message["bytes"])
+                    if session.overflowed:
+                        await session.send({
+                            "type": "error",
+                            "detail": "Transcription fell too far behind the audio; stopping the session"
+                        })
+                        break
+                elif message.get("text"):
+                    try:
+                        control = json.loads(message["text"])
+                    except json.JSONDecodeError:
+                        continue
+                    if control.get("type") == "stop":
+                        break
+        except WebSocketDisconnect:
+            session.client_gone = True
+
+        await decoder.close()
+        summary = await session.finish()
+        logger.info(f"Live session stored as meeting {summary['meeting_id']}: "
+                    f"{summary['audio_seconds']}s audio, {summary['segment_count']} segments")
+        await session.send({"type": "done", **summary})
+        if not session.client_gone:
+            await websocket.close()
+    except asyncio.CancelledError:
+        await session.abort()
+        raise
+    except Exception as e:
+        logger.error(f"Live session failed: {e}")
+        await session.abort()
+        await session.send({"type": "error", "detail": str(e)})
+    finally:
+        await decoder.close()
+        _active -= 1
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "enabled": settings.live_enabled,
+        "active_sessions": _active,
+        "max_sessions": settings.live_max_sessions,
+        "sessions": _totals["sessions"],
+        "audio_seconds": round(_totals["audio_seconds"], 1),
+        "segments": _totals["segments"],
+        "decodes": _totals["decodes"],
+    }
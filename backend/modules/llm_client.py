@@ -0,0 +1,290 @@
+"""
+Shared async Ollama client
+One pooled HTTP connection set per process, reused by extraction and chat.
+Every generation goes through a fair limiter that caps in-flight requests
+(OLLAMA_MAX_CONCURRENCY) and alternates between traffic classes, so a long
+extraction backlog cannot starve interactive chat. Calls carry keep_alive so
+the model stays loaded between meetings, and per-call timeouts.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Mapping, Optional, Union
+import httpx
+import ollama
+from config import settings
+from modules import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+# Traffic classes, in round-robin order
+CHAT = "chat"
+EXTRACTION = "extraction"
+KINDS = (CHAT, EXTRACTION)
+
+_client: Optional[ollama.AsyncClient] = None
+
+
+def get_ollama_client() -> ollama.AsyncClient:
+    """Get or create the process-wide async Ollama client"""
+    global _client
+    if _client is None:
+        logger.info(f"Creating Ollama client for {settings.ollama_host}")
+        _client = ollama.AsyncClient(
+            host=settings.ollama_host,
+            timeout=httpx.Timeout(None, connect=settings.ollama_connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=max(1, settings.ollama_max_concurrency) * 2,
+                max_keepalive_connections=max(1, settings.ollama_max_concurrency)
+            )
+        )
+    return _client
+
+
+async def close_ollama_client():
+    """Close pooled connections (called on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client._client.aclose()
+        _client = None
+
+
+class FairLimiter:
+    """
+    Counting semaphore with one FIFO queue per traffic class
+
+    When a slot frees up it goes to the next class in round-robin order
+    that has someone waiting, so each class gets an equal share under load.
+    """
+
+    def __init__(self, limit: int, kinds=KINDS):
+        self.limit = max(1, limit)
+        self.active = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {kind: deque() for kind in kinds}
+        self._order = list(kinds)
+        self._next = 0
+        self.granted: Dict[str, int] = {kind: 0 for kind in kinds}
+        self.wait_seconds: Dict[str, float] = {kind: 0.0 for kind in kinds}
+
+    def waiting(self, kind: Optional[str] = None) -> int:
+        if kind is not None:
+            return len(self._queues[kind])
+        return sum(len(q) for q in self._queues.values())
+
+    async def acquire(self, kind: str):
+        start = time.perf_counter()
+        if self.active < self.limit and not self.waiting():
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._queues[kind].append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Slot was handed over just as we were cancelled - pass it on
+                    self.release()
+                else:
+                    self._queues[kind].remove(future)
+                raise
+        self.granted[kind] += 1
+        self.wait_seconds[kind] += time.perf_counter() - start
+
+    def release(self):
+        for offset in range(len(self._order)):
+            kind = self._order[(self._next + offset) % len(self._order)]
+            queue = self._queues[kind]
+            while queue:
+                future = queue.popleft()
+                if not future.done():
+                    # Hand the slot over directly; `active` stays the same
+                    self._next = (self._order.index(kind) + 1) % len(self._order)
+                    future.set_result(None)
+                    return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self, kind: str):
+        await self.acquire(kind)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": {kind: len(q) for kind, q in self._queues.items()},
+            "granted": dict(self.granted),
+            "avg_wait_seconds": {
+                kind: round(self.wait_seconds[kind] / self.granted[kind], 3) if self.granted[kind] else 0.0
+                for kind in self._order
+            },
+        }
+
+
+_limiter: Optional[FairLimiter] = None
+
+
+def get_limiter() -> FairLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = FairLimiter(settings.ollama_max_concurrency)
+    return _limiter
+
+
+def _observe(kind: str, final: Mapping[str, Any]):
+    """Record the timings Ollama reports on a finished generation (durations in ns)"""
+    prefill = final.get("prompt_eval_duration")
+    generation = final.get("eval_duration")
+    tokens = final.get("eval_count")
+    if prefill is not None:
+        metrics.OLLAMA_PREFILL_SECONDS.observe(prefill / 1e9, kind=kind)
+    if generation:
+        metrics.OLLAMA_GENERATION_SECONDS.observe(generation / 1e9, kind=kind)
+        if tokens:
+            metrics.OLLAMA_TOKENS_PER_SECOND.observe(tokens / (generation / 1e9), kind=kind)
+
+
+def _timeout_for(kind: str, timeout: Optional[float]) -> float:
+    if timeout is not None:
+        return timeout
+    return settings.ollama_extraction_timeout_seconds if kind == EXTRACTION else settings.ollama_chat_timeout_seconds
+
+
+async def chat(
+    messages: List[Dict[str, str]],
+    kind: str = CHAT,
+    model: Optional[str] = None,
+    format: Union[str, Dict[str, Any]] = "",
+    options: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None
+) -> Mapping[str, Any]:
+    """Non-streaming chat completion, limited and timed out as `kind` traffic"""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with tracing.span("ollama.chat", kind=kind):
+            async with get_limiter().slot(kind):
+                response = await asyncio.wait_for(
+                    get_ollama_client().chat(
+                        model=model or settings.ollama_model,
+                        messages=messages,
+                        format=format,
+                        options=options,
+                        keep_alive=settings.ollama_keep_alive
+                    ),
+                    _timeout_for(kind, timeout)
+                )
+        outcome = "ok"
+        _observe(kind, response)
+        return response
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    finally:
+        metrics.OLLAMA_REQUEST_SECONDS.observe(time.perf_counter() - start, kind=kind, outcome=outcome)
+
+
+async def chat_stream(
+    messages: List[Dict[str, str]],
+    kind: str = CHAT,
+    model: Optional[str] = None,
+    format: Union[str, Dict[str, Any]] = "",
+    options: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None
+) -> AsyncIterator[Mapping[str, Any]]:
+    """
+    Streaming chat completion; yields Ollama's partial responses
+    The concurrency slot is held until the stream ends. `timeout` bounds the
+    whole generation and OLLAMA_STREAM_IDLE_TIMEOUT_SECONDS the gap between parts.
+    """
+    limit = _timeout_for(kind, timeout)
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        async with get_limiter().slot(kind):
+            deadline = time.monotonic() + limit
+            stream = await asyncio.wait_for(
+                get_ollama_client().chat(
+                    model=model or settings.ollama_model,
+                    messages=messages,
+                    format=format,
+                    options=options,
+                    keep_alive=settings.ollama_keep_alive,
+                    stream=True
+                ),
+                limit
+            )
+            iterator = stream.__aiter__()
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError(f"Generation exceeded {limit:.0f}s")
+                    try:
+                        part = await asyncio.wait_for(
+                            iterator.__anext__(),
+                            min(remaining, settings.ollama_stream_idle_timeout_seconds)
+                        )
+                    except StopAsyncIteration:
+                        outcome = "ok"
+                        return
+                    if part.get("done"):
+                        _observe(kind, part)
+                    yield part
+            finally:
+                close = getattr(iterator, "aclose", None)
+                if close is not None:
+                    await close()
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except GeneratorExit:
+        # Consumer stopped reading early
+        outcome = "cancelled"
+        raise
+    finally:
+        metrics.OLLAMA_REQUEST_SECONDS.observe(time.perf_counter() - start, kind=kind, outcome=outcome)
+
+
+async def embeddings(prompt: str, model: str, timeout: Optional[float] = None) -> Mapping[str, Any]:
+    """Embedding request (not counted against the generation limit)"""
+    return await asyncio.wait_for(
+        get_ollama_client().embeddings(model=model, prompt=prompt, keep_alive=settings.ollama_keep_alive),
+        timeout or settings.ollama_chat_timeout_seconds
+    )
+
+
+async def warm_up() -> bool:
+    """
+    Load the configured model into memory before the first request
+    (an empty generate call loads the model and honours keep_alive)
+    """
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            get_ollama_client().generate(
+                model=settings.ollama_model,
+                prompt="",
+                keep_alive=settings.ollama_keep_alive
+            ),
+            settings.ollama_warmup_timeout_seconds
+        )
+    except Exception as e:
+        logger.warning(f"Ollama warm-up of {settings.ollama_model} failed: {type(e).__name__}: {e}")
+        return False
+    logger.info(f"Ollama model {settings.ollama_model} warmed up in {time.perf_counter() - start:.1f}s")
+    return True
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "host": settings.ollama_host,
+        "model": settings.ollama_model,
+        "keep_alive": settings.ollama_keep_alive,
+        "limiter": get_limiter().stats(),
+    }
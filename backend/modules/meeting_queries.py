@@ -0,0 +1,172 @@
+"""
+Read-side meeting queries
+Keyset-paginated listing that never loads transcripts and counts tasks
+with a correlated aggregate instead of one lazy load per row, and paged
+transcript segment ranges so clients never download a whole transcript
+"""
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+from database import Meeting, Task, TranscriptChunk, TranscriptSegment
+
+MAX_PAGE_SIZE = 100
+MAX_SEGMENT_PAGE_SIZE = 1000
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(upload_date: datetime, meeting_id: int) -> str:
+    raw = f"{upload_date.isoformat()}|{meeting_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_part, id_part = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        return datetime.fromisoformat(date_part), int(id_part)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def list_meetings_page(db: Session, limit: int = 10, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    One page of meetings, newest first
+
+    Uses (upload_date, id) keyset pagination, so page N costs the same as
+    page 1; pass the returned `next_cursor` to fetch the following page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    task_count = (
+        select(func.count(Task.id))
+        .where(Task.meeting_id == Meeting.id)
+        .correlate(Meeting)
+        .scalar_subquery()
+        .label("task_count")
+    )
+    query = db.query(
+        Meeting.id,
+        Meeting.filename,
+        Meeting.upload_date,
+        Meeting.transcript_length,
+        Meeting.status,
+        task_count
+    )
+
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        # Row-value comparison lets the (upload_date, id) index seek directly
+        query = query.filter(tuple_(Meeting.upload_date, Meeting.id) < tuple_(after_date, after_id))
+
+    rows = (
+        query.order_by(Meeting.upload_date.desc(), Meeting.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "meetings": [
+            {
+                "id": row.id,
+                "filename": row.filename,
+                "upload_date": row.upload_date.isoformat(),
+                "task_count": row.task_count,
+                "transcript_length": row.transcript_length,
+                "status": row.status
+            }
+            for row in rows
+        ],
+        "next_cursor": encode_cursor(rows[-1].upload_date, rows[-1].id) if has_more else None
+    }
+
+
+def segment_count(db: Session, meeting_id: int) -> int:
+    return db.query(func.count(TranscriptSegment.id)).filter(TranscriptSegment.meeting_id == meeting_id).scalar()
+
+
+def _untimed_segments(db: Session, meeting_id: int) -> List[Dict[str, Any]]:
+    """
+    Meetings stored before segments existed (or imported as plain text):
+    serve their retrieval chunks, or the whole transcript as one segment
+    """
+    chunks = (
+        db.query(TranscriptChunk.text)
+        .filter(TranscriptChunk.meeting_id == meeting_id)
+        .order_by(TranscriptChunk.position)
+        .all()
+    )
+    if chunks:
+        texts = [row.text for row in chunks]
+    else:
+        transcript = db.query(Meeting.transcript).filter(Meeting.id == meeting_id).scalar()
+        texts = [transcript] if transcript else []
+    return [
+        {"index": i, "start": None, "end": None, "text": text, "avg_logprob": None, "no_speech_prob": None}
+        for i, text in enumerate(texts)
+    ]
+
+
+def list_segments_page(
+    db: Session,
+    meeting_id: int,
+    from_index: int = 0,
+    from_time: Optional[float] = None,
+    to_time: Optional[float] = None,
+    limit: int = 200
+) -> Dict[str, Any]:
+    """
+    A range of transcript segments in order
+
+    Select by index (`from_index`, continue with the returned `next_index`)
+    and/or by time: segments overlapping [from_time, to_time) seconds.
+    """
+    limit = max(1, min(limit, MAX_SEGMENT_PAGE_SIZE))
+    from_index = max(0, from_index)
+
+    query = db.query(TranscriptSegment).filter(
+        TranscriptSegment.meeting_id == meeting_id,
+        TranscriptSegment.position >= from_index
+    )
+    if from_time is not None:
+        query = query.filter(TranscriptSegment.end > from_time)
+    if to_time is not None:
+        query = query.filter(TranscriptSegment.start < to_time)
+    rows = query.order_by(TranscriptSegment.position).limit(limit + 1).all()
+
+    if rows or segment_count(db, meeting_id):
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        segments = [
+            {
+                "index": row.position,
+                "start": row.start,
+                "end": row.end,
+                "text": row.text,
+                "avg_logprob": row.avg_logprob,
+                "no_speech_prob": row.no_speech_prob,
+            }
+            for row in rows
+        ]
+        return {
+            "meeting_id": meeting_id,
+            "timed": True,
+            "segments": segments,
+            "next_index": rows[-1].position + 1 if has_more else None,
+        }
+
+    untimed = _untimed_segments(db, meeting_id)[from_index:from_index + limit + 1]
+    has_more = len(untimed) > limit
+    untimed = untimed[:limit]
+    return {
+        "meeting_id": meeting_id,
+        "timed": False,
+        "segments": untimed,
+        "next_index": untimed[-1]["index"] + 1 if has_more else None,
+    }
@@ -0,0 +1,220 @@
+"""
+Prometheus metrics
+Counters, gauges and histograms rendered in the Prometheus text format by
+GET /metrics. Standard library only; values are process-local, so run one
+scrape target per worker process.
+
+Callback metrics read their value at scrape time (queue depths, cache
+counters kept elsewhere) instead of being updated on every change.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+PREFIX = "meeting_tracker_"
+
+LabelValues = Tuple[str, ...]
+# Callback result: {label values: value}; use () as the key for unlabelled metrics
+CallbackResult = Dict[LabelValues, float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class CallbackMetric(Metric):
+    """Gauge or counter whose values come from `fn` at scrape time"""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], CallbackResult],
+                 labels: Sequence[str] = (), kind: str = "gauge"):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> List[str]:
+        try:
+            values = self.fn()
+        except Exception:
+            return []
+        return [f"{self.name}{_format_labels(self.label_names, k)} {_format_value(v)}" for k, v in values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (bucket counts, sum, count)
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v[0]), v[1], v[2]) for k, v in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+REGISTRY: Dict[str, Metric] = {}
+
+
+def register(metric: Metric) -> Metric:
+    REGISTRY[metric.name] = metric
+    return metric
+
+
+def callback(name: str, help: str, fn: Callable[[], CallbackResult],
+             labels: Sequence[str] = (), kind: str = "gauge") -> CallbackMetric:
+    """Register (or replace) a scrape-time metric"""
+    return register(CallbackMetric(name, help, fn, labels, kind))
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in list(REGISTRY.values()):
+        samples = metric.samples()
+        if samples:
+            lines.extend(metric.header())
+            lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+RATIO = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5)
+
+# Upload and audio
+UPLOAD_BYTES_PER_SECOND = register(Histogram(
+    "upload_bytes_per_second", "Upload streaming throughput",
+    (1e5, 5e5, 1e6, 5e6, 1e7, 5e7, 1e8, 5e8)
+))
+AUDIO_DECODE_SECONDS = register(Histogram("audio_decode_seconds", "ffmpeg decode of a recording", SECONDS))
+WHISPER_RTF = register(Histogram(
+    "whisper_real_time_factor", "Whisper transcription time / audio duration", RATIO, labels=("model",)
+))
+
+# Ollama
+OLLAMA_PREFILL_SECONDS = register(Histogram(
+    "ollama_prefill_seconds", "Prompt evaluation time reported by Ollama", SECONDS, labels=("kind",)
+))
+OLLAMA_GENERATION_SECONDS = register(Histogram(
+    "ollama_generation_seconds", "Token generation time reported by Ollama", SECONDS, labels=("kind",)
+))
+OLLAMA_TOKENS_PER_SECOND = register(Histogram(
+    "ollama_tokens_per_second", "Generation speed reported by Ollama",
+    (1, 2, 5, 10, 20, 30, 50, 75, 100, 200), labels=("kind",)
+))
+OLLAMA_REQUEST_SECONDS = register(Histogram(
+    "ollama_request_seconds", "Wall time of Ollama calls including queueing", SECONDS, labels=("kind", "outcome")
+))
+EXTRACTION_PARSE = register(Counter(
+    "extraction_parse_total", "Task extraction responses by parse outcome", labels=("outcome",)
+))
+
+# Database and pipeline
+DB_COMMIT_SECONDS = register(Histogram("db_commit_seconds", "Session flush + commit time", SECONDS))
+JOB_STAGE_SECONDS = register(Histogram(
+    "job_stage_seconds", "Background job time per stage (queued, transcribing, ...)", SECONDS,
+    labels=("kind", "stage")
+))
+HTTP_REQUEST_SECONDS = register(Histogram(
+    "http_request_seconds", "HTTP request handling time (until response headers)", SECONDS,
+    labels=("method", "route", "status")
+))
+
+# Live transcription
+LIVE_DECODE_SECONDS = register(Histogram("live_decode_seconds", "Whisper pass over the live window", SECONDS))
+LIVE_FINAL_LATENCY_SECONDS = register(Histogram(
+    "live_final_latency_seconds", "Time from receiving a segment's last audio to sending it as final", SECONDS
+))
@@ -0,0 +1,271 @@
+"""
+Task re-extraction for stored meetings
+Meetings whose tasks came from an older EXTRACTION_PROMPT_VERSION or another
+Ollama model (or whose extraction failed) are stale; imported meetings keep
+their tasks and are never stale. Re-extraction runs only extract_tasks over
+the stored transcript - no audio, no Whisper - with a bounded number of
+meetings in flight, and swaps the task rows of a whole batch of meetings per
+transaction.
+
+Progress lives in the database: a meeting is stamped with the current
+version and model in the same transaction that replaces its tasks, so an
+interrupted run simply resumes with the meetings that are still stale.
+
+CLI (from the backend directory):
+    python -m modules.reextract --concurrency 4
+    python -m modules.reextract --dry-run
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from config import settings
+from database import run_in_session, Meeting
+from modules.bulk import replace_tasks
+from modules.task_extractor import EXTRACTION_PROMPT_VERSION, IMPORTED_VERSION, extract_tasks, extraction_stamp, ExtractionError
+
+logger = logging.getLogger(__name__)
+
+# Meeting ids read per query while walking the stale set
+ID_PAGE_SIZE = 500
+
+# Called with ("meeting", {...}) / ("meeting_failed", {...}) / ("meeting_skipped", {...})
+# as the run progresses
+ProgressFn = Callable[[str, Dict[str, Any]], None]
+
+
+def stale_filter(model: str):
+    """Extracted meetings with a transcript whose tasks do not match the current version/model"""
+    return (
+        Meeting.status.in_(("completed", "extraction_failed")),
+        Meeting.transcript_length > 0,
+        func.coalesce(Meeting.extractor_version, "") != IMPORTED_VERSION,
+        or_(
+            func.coalesce(Meeting.extractor_version, "") != EXTRACTION_PROMPT_VERSION,
+            func.coalesce(Meeting.extraction_model, "") != model,
+        ),
+    )
+
+
+def count_stale(db: Session, model: Optional[str] = None) -> int:
+    return db.query(func.count(Meeting.id)).filter(*stale_filter(model or settings.ollama_model)).scalar()
+
+
+def _stale_ids(model: str, after_id: int, limit: int):
+    def query(db: Session) -> List[int]:
+        rows = db.query(Meeting.id).filter(
+            *stale_filter(model), Meeting.id > after_id
+        ).order_by(Meeting.id).limit(limit).all()
+        return [row.id for row in rows]
+    return query
+
+
+def has_transcript(meeting_id: int):
+    """Whether the meeting has a stored transcript that can be re-extracted"""
+    def query(db: Session) -> bool:
+        return db.query(Meeting.id).filter(
+            Meeting.id == meeting_id,
+            Meeting.status.in_(("completed", "extraction_failed")),
+            Meeting.transcript_length > 0
+        ).first() is not None
+    return query
+
+
+def _load_transcript(meeting_id: int):
+    """Stored transcript, or None if the meeting is gone or has none to extract from"""
+    def query(db: Session) -> Optional[str]:
+        row = db.query(Meeting.transcript).filter(
+            Meeting.id == meeting_id,
+            Meeting.status.in_(("completed", "extraction_failed")),
+            Meeting.transcript_length > 0
+        ).first()
+        return row.transcript if row else None
+    return query
+
+
+async def reextract_meeting(
+    meeting_id: int,
+    model: Optional[str] = None,
+    on_task: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Re-extract one meeting's tasks now, whatever its stamp
+    Raises LookupError if the meeting has no stored transcript (missing, still
+    processing or failed) and ExtractionError if the model gave no usable
+    response (old tasks are kept).
+    """
+    model = model or settings.ollama_model
+    transcript = await run_in_session(_load_transcript(meeting_id))
+    if transcript is None:
+        raise LookupError(f"Meeting {meeting_id} has no transcript to extract from")
+
+    tasks = await extract_tasks(transcript, model=model, on_task=on_task)
+    stamp = extraction_stamp(model)
+
+    def save(db: Session):
+        replace_tasks(db, {meeting_id: tasks}, stamp)
+        db.commit()
+
+    await run_in_session(save)
+    return {"meeting_id": meeting_id, **stamp, "tasks": tasks, "task_count": len(tasks)}
+
+
+async def run_reextract(
+    model: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    limit: Optional[int] = None,
+    on_progress: Optional[ProgressFn] = None
+) -> Dict[str, Any]:
+    """
+    Re-extract every stale meeting (at most `limit`), `concurrency` at a time
+    Tasks are replaced REEXTRACT_COMMIT_BATCH meetings per transaction; a
+    meeting whose extraction fails keeps its old tasks and stays stale.
+    """
+    model = model or settings.ollama_model
+    concurrency = max(1, concurrency or settings.reextract_concurrency)
+    commit_batch = max(1, settings.reextract_commit_batch)
+    notify = on_progress or (lambda event, data: None)
+    stamp = extraction_stamp(model)
+    started = time.perf_counter()
+
+    total = await run_in_session(lambda db: count_stale(db, model))
+    if limit is not None:
+        total = min(total, max(0, limit))
+    logger.info(f"Re-extraction: {total} stale meeting(s) for prompt v{EXTRACTION_PROMPT_VERSION} / {model}")
+
+    ids: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    pending: Dict[int, List[Dict[str, Any]]] = {}
+    write_lock = asyncio.Lock()
+    done: List[int] = []
+    failed: List[Dict[str, Any]] = []
+    skipped = 0
+    task_count = 0
+    finished = 0
+
+    async def flush():
+        nonlocal task_count
+        async with write_lock:
+            if not pending:
+                return
+            batch = dict(pending)
+            pending.clear()
+
+            def save(db: Session) -> int:
+                updated = replace_tasks(db, batch, stamp)
+                db.commit()
+                return updated
+
+            await run_in_session(save)
+            done.extend(batch)
+            task_count += sum(len(tasks) for tasks in batch.values())
+
+    async def produce():
+        after, queued = 0, 0
+        while total - queued > 0:
+            page = await run_in_session(_stale_ids(model, after, min(ID_PAGE_SIZE, total - queued)))
+            if not page:
+                break
+            for meeting_id in page:
+                await ids.put(meeting_id)
+            after = page[-1]
+            queued += len(page)
+        for _ in range(concurrency):
+            await ids.put(None)
+
+    async def worker():
+        nonlocal finished, skipped
+        while True:
+            meeting_id = await ids.get()
+            if meeting_id is None:
+                return
+            try:
+                transcript = await run_in_session(_load_transcript(meeting_id))
+                if transcript is None:
+                    # Deleted or reprocessed since it was listed; still counts towards progress
+                    skipped += 1
+                    finished += 1
+                    notify("meeting_skipped", {"meeting_id": meeting_id, "done": finished, "total": total})
+                    continue
+                pending[meeting_id] = await extract_tasks(transcript, model=model)
+                finished += 1
+                notify("meeting", {
+                    "meeting_id": meeting_id,
+                    "task_count": len(pending[meeting_id]),
+                    "done": finished,
+                    "total": total,
+                })
+                if len(pending) >= commit_batch:
+                    await flush()
+            except Exception as e:
+                entry = {"meeting_id": meeting_id, "error": str(e)}
+                failed.append(entry)
+                finished += 1
+                if not isinstance(e, ExtractionError):
+                    logger.error(f"Re-extraction of meeting {meeting_id} failed: {e}")
+                notify("meeting_failed", {**entry, "done": finished, "total": total})
+
+    runners = [asyncio.create_task(produce())] + [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*runners)
+    finally:
+        for runner in runners:
+            runner.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+        # Keep what was already extracted, also when the run is cancelled or fails
+        await flush()
+
+    wall = time.perf_counter() - started
+    return {
+        **stamp,
+        "stale": total,
+        "reextracted": len(done),
+        "failed": len(failed),
+        "skipped": skipped,
+        "task_count": task_count,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 2),
+        "meetings_per_minute": round(len(done) / wall * 60, 1) if wall > 0 else None,
+        "failed_meetings": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Ollama model (default OLLAMA_MODEL)")
+    parser.add_argument("--concurrency", type=int, default=settings.reextract_concurrency)
+    parser.add_argument("--limit", type=int, help="Re-extract at most this many meetings")
+    parser.add_argument("--dry-run", action="store_true", help="Only count stale meetings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.log_level)
+
+    from database import init_db
+    from modules.llm_client import close_ollama_client
+
+    init_db()
+
+    def progress(event: str, data: Dict[str, Any]):
+        if event == "meeting":
+            print(f"[{data['done']}/{data['total']}] meeting {data['meeting_id']}: {data['task_count']} tasks", flush=True)
+        elif event == "meeting_failed":
+            print(f"[{data['done']}/{data['total']}] meeting {data['meeting_id']}: FAILED {data['error']}", flush=True)
+        elif event == "meeting_skipped":
+            print(f"[{data['done']}/{data['total']}] meeting {data['meeting_id']}: skipped (no transcript)", flush=True)
+
+    async def run():
+        try:
+            if args.dry_run:
+                return {"stale": await run_in_session(lambda db: count_stale(db, args.model))}
+            return await run_reextract(args.model, args.concurrency, args.limit, progress)
+        finally:
+            await close_ollama_client()
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Per-meeting retrieval index for chat
+Transcripts are chunked once at processing time; questions are answered from
+the top-k relevant chunks (BM25, or Ollama embeddings when configured) instead
+of resending the whole transcript
+"""
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from config import settings
+from database import run_in_session, Meeting, TranscriptChunk
+from modules import llm_client
+from modules.task_extractor import split_transcript
+
+logger = logging.getLogger(__name__)
+
+# Small English stopword list - enough to keep BM25 from matching on filler
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "do", "for", "from",
+    "has", "have", "i", "in", "is", "it", "its", "of", "on", "or", "so", "that",
+    "the", "their", "there", "this", "to", "was", "we", "were", "what", "when",
+    "which", "who", "will", "with", "you", "about", "did", "does", "how", "our",
+}
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a meeting's chunks"""
+
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        doc_freq: Counter = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(chunks)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def search(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """(chunk index, score) for the k best-scoring chunks"""
+        terms = [t for t in tokenize(query) if t in self.idf]
+        scores = []
+        for i, tf in enumerate(self.term_freqs):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+            for term in terms:
+                freq = tf.get(term, 0)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append((i, score))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:k]
+
+
+class MeetingIndex:
+    """Loaded chunks for one meeting plus its search structures"""
+
+    def __init__(self, chunks: List[str], embeddings: Optional[np.ndarray] = None):
+        self.chunks = chunks
+        self.bm25 = BM25Index(chunks)
+        self.embeddings = embeddings
+
+
+# LRU of loaded indexes so repeat questions skip the DB load
+_indexes: "OrderedDict[int, MeetingIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+MAX_LOADED_INDEXES = 64
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-8)
+
+
+def forget(meeting_id: int):
+    """Drop a meeting's loaded index (after its chunks change)"""
+    with _indexes_lock:
+        _indexes.pop(meeting_id, None)
+
+
+async def embed(texts: List[str]) -> List[List[float]]:
+    """Embed texts with the configured Ollama embedding model"""
+    vectors = []
+    for text in texts:
+        response = await llm_client.embeddings(text, settings.retrieval_embedding_model)
+        vectors.append(response["embedding"])
+    return vectors
+
+
+async def build_chunks(meeting_id: int, transcript: str) -> List[TranscriptChunk]:
+    """
+    Chunk a transcript into TranscriptChunk rows (not yet added to a session),
+    with embeddings when RETRIEVAL_EMBEDDING_MODEL is set
+    """
+    texts = split_transcript(transcript, settings.retrieval_chunk_tokens) if transcript.strip() else []
+
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    if texts and settings.retrieval_embedding_model:
+        try:
+            embeddings = await embed(texts)
+        except Exception as e:
+            logger.error(f"Embedding failed, falling back to BM25 only: {e}")
+
+    forget(meeting_id)
+
+    return [
+        TranscriptChunk(
+            meeting_id=meeting_id,
+            position=i,
+            text=text,
+            embedding=json.dumps(vector) if vector is not None else None
+        )
+        for i, (text, vector) in enumerate(zip(texts, embeddings))
+    ]
+
+
+def replace_chunks(db: Session, meeting_id: int, chunks: List[TranscriptChunk]):
+    """Swap a meeting's stored chunks for freshly built ones; caller commits"""
+    db.query(TranscriptChunk).filter(TranscriptChunk.meeting_id == meeting_id).delete()
+    db.add_all(chunks)
+    forget(meeting_id)
+
+
+async def index_meeting(meeting_id: int):
+    """(Re)build and store the chunk index for a meeting from its stored transcript"""
+    transcript = await run_in_session(
+        lambda db: db.query(Meeting.transcript).filter(Meeting.id == meeting_id).scalar()
+    )
+    chunks = await build_chunks(meeting_id, transcript or "")
+
+    def save(db: Session):
+        replace_chunks(db, meeting_id, chunks)
+        db.commit()
+
+    await run_in_session(save)
+
+
+def _cached(meeting_id: int) -> Optional[MeetingIndex]:
+    with _indexes_lock:
+        index = _indexes.get(meeting_id)
+        if index is not None:
+            _indexes.move_to_end(meeting_id)
+        return index
+
+
+def _load(db: Session, meeting_id: int) -> Optional[MeetingIndex]:
+    index = _cached(meeting_id)
+    if index is not None:
+        return index
+
+    rows = (
+        db.query(TranscriptChunk.text, TranscriptChunk.embedding)
+        .filter(TranscriptChunk.meeting_id == meeting_id)
+        .order_by(TranscriptChunk.position)
+        .all()
+    )
+    if not rows:
+        return None
+
+    embeddings = None
+    if all(row.embedding for row in rows):
+        embeddings = _normalize_rows(np.array([json.loads(row.embedding) for row in rows], dtype=np.float32))
+
+    index = MeetingIndex([row.text for row in rows], embeddings)
+    with _indexes_lock:
+        _indexes[meeting_id] = index
+        while len(_indexes) > MAX_LOADED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+async def retrieve(meeting_id: int, question: str, k: Optional[int] = None) -> List[str]:
+    """
+    Top-k transcript chunks for a question, returned in transcript order
+    Meetings processed before indexing existed are indexed on first use.
+    Database work runs through run_in_session, off the event loop.
+    """
+    k = k or settings.retrieval_top_k
+    index = _cached(meeting_id) or await run_in_session(lambda db: _load(db, meeting_id))
+    if index is None:
+        await index_meeting(meeting_id)
+        index = await run_in_session(lambda db: _load(db, meeting_id))
+        if index is None:
+            return []
+
+    ranked: List[Tuple[int, float]] = []
+    if index.embeddings is not None:
+        try:
+            query = _normalize_rows(np.array(await embed([question]), dtype=np.float32))[0]
+            scores = index.embeddings @ query
+            top = np.argsort(-scores)[:k]
+            ranked = [(int(i), float(scores[i])) for i in top]
+        except Exception as e:
+            logger.error(f"Query embedding failed, using BM25: {e}")
+
+    if not ranked:
+        ranked = index.bm25.search(question, k)
+        # No lexical overlap at all - fall back to the opening of the meeting
+        if all(score == 0.0 for _, score in ranked):
+            ranked = [(i, 0.0) for i in range(min(k, len(index.chunks)))]
+
+    return [index.chunks[i] for i in sorted(i for i, _ in ranked)]
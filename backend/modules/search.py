@@ -0,0 +1,204 @@
+"""
+Full-text search across transcripts, tasks and chats
+SQLite: FTS5 external-content tables kept in sync by triggers
+Postgres: generated tsvector columns with GIN indexes
+Both maintain the index incrementally on insert/update/delete.
+"""
+import logging
+import re
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# (fts table, source table, indexed columns)
+SOURCES = {
+    "meeting": ("meetings_fts", "meetings", ["transcript"]),
+    "task": ("tasks_fts", "tasks", ["task", "owner"]),
+    "chat": ("chats_fts", "chats", ["question", "answer"]),
+}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchBackend:
+    """Dialect-specific index setup and query"""
+
+    def setup(self, engine: Engine):
+        raise NotImplementedError
+
+    def search(self, db: Session, query: str, kinds: List[str], limit: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """FTS5 with external content - the index stores no second copy of transcripts"""
+
+    def setup(self, engine: Engine):
+        with engine.begin() as conn:
+            for fts, source, columns in SOURCES.values():
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": fts}
+                ).first()
+                cols = ", ".join(columns)
+                new_cols = ", ".join(f"new.{c}" for c in columns)
+                old_cols = ", ".join(f"old.{c}" for c in columns)
+
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                    f"{cols}, content='{source}', content_rowid='id', tokenize='porter unicode61')"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+                    f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END"
+                ))
+
+                if not exists:
+                    # Index rows written before search existed
+                    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+                    logger.info(f"Built full-text index {fts}")
+
+    @staticmethod
+    def match_expression(query: str) -> Optional[str]:
+        """Quote each word (no FTS syntax injection); last word matches as a prefix"""
+        words = _WORD.findall(query)
+        if not words:
+            return None
+        quoted = [f'"{w}"' for w in words]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, db: Session, query: str, kinds: List[str], limit: int) -> List[Dict[str, Any]]:
+        match = self.match_expression(query)
+        if match is None:
+            return []
+
+        parts = []
+        if "meeting" in kinds:
+            parts.append(
+                "SELECT 'meeting' AS kind, m.id AS id, m.id AS meeting_id, "
+                "snippet(meetings_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet, "
+                "bm25(meetings_fts) AS score "
+                "FROM meetings_fts JOIN meetings m ON m.id = meetings_fts.rowid "
+                "WHERE meetings_fts MATCH :q"
+            )
+        if "task" in kinds:
+            parts.append(
+                "SELECT 'task' AS kind, t.id AS id, t.meeting_id AS meeting_id, "
+                "snippet(tasks_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet, "
+                "bm25(tasks_fts) AS score "
+                "FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid "
+                "WHERE tasks_fts MATCH :q"
+            )
+        if "chat" in kinds:
+            parts.append(
+                "SELECT 'chat' AS kind, c.id AS id, c.meeting_id AS meeting_id, "
+                "snippet(chats_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet, "
+                "bm25(chats_fts) AS score "
+                "FROM chats_fts JOIN chats c ON c.id = chats_fts.rowid "
+                "WHERE chats_fts MATCH :q"
+            )
+        if not parts:
+            return []
+
+        sql = " UNION ALL ".join(parts) + " ORDER BY score LIMIT :limit"
+        rows = db.execute(text(sql), {"q": match, "limit": limit}).all()
+        # bm25() is lower-is-better; flip so callers see higher-is-better
+        return [
+            {"kind": r.kind, "id": r.id, "meeting_id": r.meeting_id,
+             "snippet": r.snippet, "score": round(-r.score, 4)}
+            for r in rows
+        ]
+
+
+class PostgresFTSBackend(SearchBackend):
+    """Stored generated tsvector columns + GIN indexes"""
+
+    def setup(self, engine: Engine):
+        with engine.begin() as conn:
+            for _, source, columns in SOURCES.values():
+                doc = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+                conn.execute(text(
+                    f"ALTER TABLE {source} ADD COLUMN IF NOT EXISTS search_tsv tsvector "
+                    f"GENERATED ALWAYS AS (to_tsvector('english', {doc})) STORED"
+                ))
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{source}_search_tsv ON {source} USING GIN (search_tsv)"
+                ))
+
+    def search(self, db: Session, query: str, kinds: List[str], limit: int) -> List[Dict[str, Any]]:
+        if not _WORD.search(query):
+            return []
+
+        parts = []
+        for kind in kinds:
+            _, source, columns = SOURCES[kind]
+            meeting_col = "id" if source == "meetings" else "meeting_id"
+            doc = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+            parts.append(
+                f"SELECT '{kind}' AS kind, id, {meeting_col} AS meeting_id, {doc} AS doc, "
+                f"ts_rank(search_tsv, query) AS score "
+                f"FROM {source}, websearch_to_tsquery('english', :q) query "
+                f"WHERE search_tsv @@ query"
+            )
+        if not parts:
+            return []
+
+        # Rank first, then build headlines for the returned page only
+        sql = (
+            "SELECT kind, id, meeting_id, score, "
+            "ts_headline('english', doc, websearch_to_tsquery('english', :q), "
+            "'StartSel=<mark>, StopSel=</mark>, MaxFragments=1, MaxWords=32') AS snippet "
+            f"FROM ({' UNION ALL '.join(parts)} ORDER BY score DESC LIMIT :limit) ranked "
+            "ORDER BY score DESC"
+        )
+        rows = db.execute(text(sql), {"q": query, "limit": limit}).all()
+        return [
+            {"kind": r.kind, "id": r.id, "meeting_id": r.meeting_id,
+             "snippet": r.snippet, "score": round(float(r.score), 4)}
+            for r in rows
+        ]
+
+
+_backend: Optional[SearchBackend] = None
+
+
+def get_backend(engine: Engine) -> Optional[SearchBackend]:
+    """Pick the search backend for the engine's dialect (None if unsupported)"""
+    global _backend
+    if _backend is None:
+        if engine.dialect.name == "sqlite":
+            _backend = SQLiteFTS5Backend()
+        elif engine.dialect.name == "postgresql":
+            _backend = PostgresFTSBackend()
+    return _backend
+
+
+def setup_search(engine: Engine):
+    """Create indexes/triggers (idempotent); called at startup"""
+    backend = get_backend(engine)
+    if backend is None:
+        logger.warning(f"Full-text search not supported for dialect {engine.dialect.name}")
+        return
+    backend.setup(engine)
+
+
+def search(db: Session, query: str, kinds: Optional[List[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Ranked hits with highlighted snippets across the requested kinds"""
+    backend = get_backend(db.get_bind())
+    if backend is None:
+        raise RuntimeError("Full-text search is not available for this database")
+    kinds = [k for k in (kinds or list(SOURCES)) if k in SOURCES]
+    return backend.search(db, query, kinds, max(1, min(limit, 100)))
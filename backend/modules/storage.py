@@ -0,0 +1,83 @@
+"""
+Upload storage
+Streams uploads to disk in chunks, enforces the size limit and stores
+recordings content-addressed by SHA-256 so duplicates are kept once
+"""
+import hashlib
+import logging
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional
+import aiofiles
+import aiofiles.os
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+_HASH_NAME = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit"""
+
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        super().__init__(f"File exceeds maximum size of {limit_bytes // (1024 * 1024)} MB")
+
+
+def hash_from_filename(filename: str) -> Optional[str]:
+    """Return the content hash for a content-addressed filename, else None"""
+    stem = Path(filename).stem
+    return stem if _HASH_NAME.match(stem) else None
+
+
+async def save_upload(file: UploadFile, upload_dir: Path, max_bytes: int) -> Dict[str, Any]:
+    """
+    Stream an upload to `upload_dir` as <sha256><ext>
+
+    Writes to a temporary .part file while hashing, aborts as soon as
+    `max_bytes` is crossed, then renames into place (or discards the
+    temp file if identical content is already stored).
+    """
+    ext = Path(file.filename).suffix.lower()
+    tmp_path = upload_dir / f".{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        if tmp_path.exists():
+            await aiofiles.os.remove(tmp_path)
+        raise
+
+    sha256 = digest.hexdigest()
+    final_path = upload_dir / f"{sha256}{ext}"
+    duplicate = final_path.exists()
+
+    if duplicate:
+        await aiofiles.os.remove(tmp_path)
+        logger.info(f"Duplicate upload {file.filename} -> {final_path.name}")
+    else:
+        os.replace(tmp_path, final_path)
+
+    return {
+        "filename": final_path.name,
+        "path": str(final_path),
+        "size": size,
+        "sha256": sha256,
+        "duplicate": duplicate,
+    }
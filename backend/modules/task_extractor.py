@@ -2,109 +2,436 @@
 Task extraction module using Ollama - FRESH VERSION
 Extracts action items from meeting transcripts using local LLM
 """
+import asyncio
 import logging
 import json
+import random
 import re
-from typing import List, Dict, Any
+import threading
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, List, Optional
 import ollama
+from config import settings
+from modules.json_stream import ArrayItemParser
+from modules.llm_cache import llm_cache, make_key
+from modules import llm_client, metrics, tracing
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever EXTRACTION_PROMPT changes so cached results are not reused and
+# stored meetings are picked up by re-extraction (modules/reextract.py)
+EXTRACTION_PROMPT_VERSION = "2"
+
+# extractor_version of meetings/tasks brought in by the JSONL import; their
+# tasks did not come from this extractor, so re-extraction leaves them alone
+IMPORTED_VERSION = "imported"
+
 EXTRACTION_PROMPT = """Extract action items from this meeting transcript.
 
 Rules:
 - Only extract explicit commitments or assignments
-- Identify task owner if mentioned
-- Extract deadline if mentioned (YYYY-MM-DD format)
-- Return JSON array only
+- Identify task owner if mentioned, otherwise use "unknown"
+- Extract deadline if mentioned (YYYY-MM-DD format), otherwise use "unknown"
+- Return a JSON object only
 
 Transcript: {transcript}
 
-Return JSON array like: [{{"task": "...", "owner": "...", "deadline": "...", "confidence": 0.9}}]"""
+Return JSON like: {{"tasks": [{{"task": "...", "owner": "...", "deadline": "...", "confidence": 0.9}}]}}
+Use {{"tasks": []}} if there are no action items."""
 
-async def extract_tasks(transcript: str, model: str = "llama3.1:8b") -> List[Dict[str, Any]]:
-    """Extract action items from transcript using Ollama"""
-    try:
-        logger.info(f"🤖 Calling Ollama with model: {model}")
-        
-        prompt = EXTRACTION_PROMPT.format(transcript=transcript)
-        
-        # Call Ollama
-        response = ollama.chat(
-            model=model,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        logger.info("✅ Ollama responded successfully")
-        
-        # Extract content
-        content = response['message']['content']
-        logger.info(f"📝 Response preview: {content[:200]}")
-        
-        # Clean response
-        content = content.strip()
-        
-        # Remove markdown code blocks
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0]
-        elif "```" in content:
-            content = content.split("```")[1].split("```")[0]
-        
-        content = content.strip()
-        
-        # Try to extract JSON array
-        json_match = re.search(r'\[.*\]', content, re.DOTALL)
-        if json_match:
-            content = json_match.group(0)
-        
-        logger.info(f"🔍 Parsing JSON: {content[:300]}")
-        
-        # Parse JSON
-        tasks = json.loads(content)
-        
-        if not isinstance(tasks, list):
-            tasks = [tasks]
+# Structured output schema (Ollama >= 0.5 constrains generation to it)
+TASKS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tasks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "task": {"type": "string"},
+                    "owner": {"type": "string"},
+                    "deadline": {"type": "string"},
+                    "confidence": {"type": "number"},
+                },
+                "required": ["task", "owner", "deadline", "confidence"],
+            },
+        },
+    },
+    "required": ["tasks"],
+}
+
+# Receives each task as soon as it has been parsed from the stream
+TaskCallback = Callable[[Dict[str, Any]], None]
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+def split_transcript(transcript: str, max_tokens: int) -> List[str]:
+    """
+    Split a transcript into segments of at most ~max_tokens,
+    breaking on sentence boundaries where possible
+    """
+    max_chars = max_tokens * 4
+    sentences = re.split(r'(?<=[.!?])\s+', transcript.strip())
+    
+    segments = []
+    current = ""
+    for sentence in sentences:
+        # Hard-wrap pathological sentences (no punctuation for pages)
+        while len(sentence) > max_chars:
+            if current:
+                segments.append(current)
+                current = ""
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            segments.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
         
-        # Validate and format - handle flexible field names
-        result = []
-        for task in tasks:
-            # Extract task description (try multiple field names)
-            task_desc = (
-                task.get("task") or 
-                task.get("topic") or 
-                task.get("description") or 
-                task.get("action") or
-                "Unknown task"
-            )
-            
-            # If description is separate, append it to task
-            if task.get("description") and task.get("topic"):
-                task_desc = f"{task.get('topic')}: {task.get('description')}"
-            
-            result.append({
-                "task": task_desc,
-                "owner": task.get("owner") or task.get("assignee") or "unknown",
-                "deadline": task.get("deadline") or task.get("due_date") or "unknown",
-                "confidence": float(task.get("confidence", 0.7))
-            })
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            segments.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    
+    if current:
+        segments.append(current)
+    return segments
+
+def _normalize_task(text: str) -> str:
+    return re.sub(r"[^a-z0-9 ]", "", text.lower()).strip()
+
+def merge_tasks(tasks: List[Dict[str, Any]], similarity: float = 0.85) -> List[Dict[str, Any]]:
+    """
+    Drop near-duplicate tasks (same commitment mentioned in several segments),
+    keeping the highest-confidence copy and filling in unknown owner/deadline
+    """
+    merged: List[Dict[str, Any]] = []
+    keys: List[str] = []
+    for task in tasks:
+        key = _normalize_task(task["task"])
+        match = None
+        for i, existing in enumerate(keys):
+            if key == existing or SequenceMatcher(None, key, existing).ratio() >= similarity:
+                match = i
+                break
         
-        logger.info(f"✨ Successfully extracted {len(result)} tasks")
-        return result
+        if match is None:
+            merged.append(dict(task))
+            keys.append(key)
+            continue
         
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ JSON parse error: {e}")
-        logger.error(f"Content was: {content if 'content' in locals() else 'N/A'}")
-        return [{
-            "task": "Could not parse AI response - check logs",
-            "owner": "unknown",
-            "deadline": "unknown",
-            "confidence": 0.0
-        }]
-    except Exception as e:
-        logger.error(f"❌ Error: {type(e).__name__}: {str(e)}")
-        return [{
-            "task": f"Error: {str(e)[:100]}",
-            "owner": "unknown",
-            "deadline": "unknown",
-            "confidence": 0.0
-        }]
+        kept = merged[match]
+        if task["confidence"] > kept["confidence"]:
+            task, kept = kept, dict(task)
+            merged[match] = kept
+        for field in ("owner", "deadline"):
+            if kept.get(field, "unknown") == "unknown" and task.get(field, "unknown") != "unknown":
+                kept[field] = task[field]
+    return merged
+
+class ExtractionError(Exception):
+    """
+    Raised when no usable response was obtained after all retries
+    `tasks` holds what the segments that did succeed found (map-reduce only);
+    they are neither cached nor stamped as a complete extraction
+    """
+
+    def __init__(self, message: str, tasks: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.tasks = tasks or []
+
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "responses": 0,
+    "parsed_strict": 0,  # Whole response was valid JSON
+    "parsed_recovered": 0,  # Tolerant parser salvaged items from invalid JSON
+    "parse_failures": 0,
+    "retries": 0,
+    "failed_extractions": 0,  # Gave up after EXTRACTION_MAX_RETRIES
+    "schema_fallbacks": 0,  # Server rejected a schema; using plain JSON mode
+}
+
+# Set once the Ollama server rejects schema-constrained output (older servers)
+_schema_unsupported = False
+
+
+def _count(**deltas):
+    with _metrics_lock:
+        for key, value in deltas.items():
+            _metrics[key] += value
+
+
+def stats() -> Dict[str, Any]:
+    """Parse-success rate and retry counters since startup"""
+    with _metrics_lock:
+        metrics = dict(_metrics)
+    parsed = metrics["parsed_strict"] + metrics["parsed_recovered"]
+    return {
+        **metrics,
+        "format": output_format(),
+        "parse_success_rate": round(parsed / metrics["responses"], 3) if metrics["responses"] else None,
+        "strict_parse_rate": round(metrics["parsed_strict"] / metrics["responses"], 3) if metrics["responses"] else None,
+    }
+
+
+def output_format() -> str:
+    """Effective EXTRACTION_FORMAT: schema, json or text"""
+    mode = settings.extraction_format
+    if mode == "schema" and _schema_unsupported:
+        return "json"
+    return mode
+
+
+def _format_param(mode: str):
+    if mode == "schema":
+        return TASKS_SCHEMA
+    return "json" if mode == "json" else ""
+
+
+def normalize_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Map flexible field names onto task/owner/deadline (strings) and confidence (0-1)"""
+    task_desc = (
+        task.get("task") or 
+        task.get("topic") or 
+        task.get("description") or 
+        task.get("action") or
+        "Unknown task"
+    )
+    
+    # If description is separate, append it to task
+    if task.get("description") and task.get("topic"):
+        task_desc = f"{task.get('topic')}: {task.get('description')}"
+    
+    try:
+        confidence = float(task.get("confidence", 0.7))
+    except (TypeError, ValueError):
+        confidence = 0.7
+    
+    return {
+        "task": str(task_desc),
+        "owner": str(task.get("owner") or task.get("assignee") or "unknown"),
+        "deadline": str(task.get("deadline") or task.get("due_date") or "unknown"),
+        "confidence": max(0.0, min(1.0, confidence))
+    }
+
+
+def _strict_parse(text: str) -> bool:
+    """Whether the response (minus markdown fences) is valid JSON as-is"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+    try:
+        json.loads(text)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+def _log_response(content: str):
+    """Full responses are large; log a sample of them, and only at DEBUG"""
+    rate = settings.extraction_log_sample_rate
+    if rate > 0 and logger.isEnabledFor(logging.DEBUG) and random.random() < rate:
+        logger.debug(f"Extraction response ({len(content)} chars): {content}")
+
+
+async def _call_once(transcript: str, model: str, on_task: Optional[TaskCallback]) -> List[Dict[str, Any]]:
+    """
+    One streamed Ollama call; tasks are parsed as tokens arrive
+    Raises ExtractionError when nothing usable could be parsed
+    """
+    global _schema_unsupported
+    mode = output_format()
+    prompt = EXTRACTION_PROMPT.format(transcript=transcript)
+    
+    parser = ArrayItemParser()
+    tasks: List[Dict[str, Any]] = []
+    try:
+        async for part in llm_client.chat_stream(
+            [{"role": "user", "content": prompt}],
+            kind=llm_client.EXTRACTION,
+            model=model,
+            format=_format_param(mode)
+        ):
+            token = part.get("message", {}).get("content", "")
+            if not token:
+                continue
+            for item in parser.feed(token):
+                task = normalize_task(item)
+                tasks.append(task)
+                if on_task:
+                    on_task(task)
+    except ollama.ResponseError as e:
+        if mode == "schema" and e.status_code == 400 and not parser.buffer:
+            # Servers before structured outputs only accept format="json"
+            logger.warning(f"Ollama rejected schema output ({e.error}); falling back to JSON mode")
+            _schema_unsupported = True
+            _count(schema_fallbacks=1)
+            return await _call_once(transcript, model, on_task)
+        raise
+    
+    if not tasks:
+        for item in parser.close():
+            task = normalize_task(item)
+            tasks.append(task)
+            if on_task:
+                on_task(task)
+    
+    _count(responses=1)
+    content = parser.buffer
+    _log_response(content)
+    
+    if _strict_parse(content):
+        _count(parsed_strict=1)
+        metrics.EXTRACTION_PARSE.inc(outcome="strict")
+    elif tasks:
+        _count(parsed_recovered=1)
+        metrics.EXTRACTION_PARSE.inc(outcome="recovered")
+        logger.warning(f"Recovered {len(tasks)} task(s) from malformed JSON")
+    
+    if not tasks and not parser.empty_result():
+        _count(parse_failures=1)
+        metrics.EXTRACTION_PARSE.inc(outcome="failed")
+        raise ExtractionError(f"Unparseable response: {content[:200]!r}")
+    return tasks
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with jitter, capped at EXTRACTION_RETRY_MAX_SECONDS"""
+    delay = min(settings.extraction_retry_max_seconds, settings.extraction_retry_base_seconds * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def _extract_segment(
+    transcript: str,
+    model: str,
+    on_task: Optional[TaskCallback] = None
+) -> List[Dict[str, Any]]:
+    """Extract from one transcript segment, retrying failed calls; raises ExtractionError"""
+    logger.info(f"🤖 Calling Ollama with model: {model} ({output_format()} output)")
+    attempts = max(0, settings.extraction_max_retries) + 1
+    last_error: Optional[Exception] = None
+    
+    # A retry streams the same tasks again; pass on only those not yet
+    # emitted by an earlier attempt (repeats within one attempt still go out)
+    emitted: Counter = Counter()
+    seen: Counter = Counter()
+    
+    def emit_new(task: Dict[str, Any]):
+        key = (_normalize_task(task["task"]), task["owner"], task["deadline"])
+        seen[key] += 1
+        if seen[key] > emitted[key]:
+            emitted[key] += 1
+            on_task(task)
+    
+    for attempt in range(attempts):
+        if attempt:
+            delay = _backoff(attempt - 1)
+            _count(retries=1)
+            logger.warning(f"🔁 Retrying extraction in {delay:.1f}s (attempt {attempt + 1}/{attempts}): {last_error}")
+            await asyncio.sleep(delay)
+        seen.clear()
+        try:
+            with tracing.span("extraction.call", attempt=attempt + 1):
+                tasks = await _call_once(transcript, model, emit_new if on_task else None)
+            logger.info("✅ Ollama responded successfully")
+            return tasks
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            last_error = e
+    
+    _count(failed_extractions=1)
+    raise ExtractionError(f"Extraction failed after {attempts} attempt(s): {last_error}") from last_error
+
+async def _extract_map_reduce(
+    transcript: str,
+    model: str,
+    on_task: Optional[TaskCallback] = None
+) -> List[Dict[str, Any]]:
+    """
+    Map: extract from token-bounded segments concurrently
+    Reduce: concatenate in transcript order and merge near-duplicates
+    """
+    segments = split_transcript(transcript, settings.extraction_segment_tokens)
+    semaphore = asyncio.Semaphore(max(1, settings.extraction_parallelism))
+    logger.info(f"🗺️ Map-reduce extraction over {len(segments)} segments")
+    
+    async def run(segment: str):
+        async with semaphore:
+            return await _extract_segment(segment, model, on_task)
+    
+    results = await asyncio.gather(*[run(seg) for seg in segments], return_exceptions=True)
+    
+    tasks: List[Dict[str, Any]] = []
+    failures = 0
+    for i, result in enumerate(results):
+        if isinstance(result, BaseException):
+            failures += 1
+            logger.error(f"❌ Segment {i + 1}/{len(segments)} failed: {type(result).__name__}: {result}")
+            continue
+        tasks.extend(result)
+    
+    merged = merge_tasks(tasks)
+    logger.info(f"🧩 Merged {len(tasks)} segment tasks into {len(merged)}")
+    if failures:
+        first_error = next(r for r in results if isinstance(r, BaseException))
+        raise ExtractionError(
+            f"{failures}/{len(segments)} segment(s) failed: {first_error}",
+            tasks=merged
+        ) from first_error
+    return merged
+
+def extraction_stamp(model: Optional[str] = None) -> Dict[str, str]:
+    """Version columns stored on meetings and tasks produced by extract_tasks(model)"""
+    return {
+        "extractor_version": EXTRACTION_PROMPT_VERSION,
+        "extraction_model": model or settings.ollama_model,
+    }
+
+def use_map_reduce(transcript: str) -> bool:
+    """Long transcripts go through map-reduce instead of one huge prompt"""
+    threshold = settings.extraction_map_reduce_threshold_tokens
+    return threshold > 0 and estimate_tokens(transcript) > threshold
+
+async def extract_tasks(
+    transcript: str,
+    model: Optional[str] = None,
+    strategy: str = "auto",
+    on_task: Optional[TaskCallback] = None
+) -> List[Dict[str, Any]]:
+    """
+    Extract action items from transcript using Ollama
+    
+    strategy: "auto" (by transcript length), "single" or "map_reduce"
+    on_task: called with each task as it streams in (before map-reduce de-duplication)
+    
+    Raises ExtractionError if no usable response was obtained after retries,
+    or if any map-reduce segment failed (the rest is in its `tasks`).
+    """
+    if not transcript.strip():
+        return []
+    
+    model = model or settings.ollama_model
+    cache_key = make_key(model, f"{EXTRACTION_PROMPT_VERSION}:{output_format()}", transcript)
+    if settings.llm_cache_enabled:
+        cached = await llm_cache.aget(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Extraction cache hit ({len(cached)} tasks)")
+            return cached
+    
+    try:
+        if strategy == "map_reduce" or (strategy == "auto" and use_map_reduce(transcript)):
+            result = await _extract_map_reduce(transcript, model, on_task)
+        else:
+            result = await _extract_segment(transcript, model, on_task)
+    except ExtractionError as e:
+        logger.error(f"❌ {e}")
+        raise
+    
+    logger.info(f"✨ Successfully extracted {len(result)} tasks")
+    if settings.llm_cache_enabled:
+        await llm_cache.aset(cache_key, result)
+    return result
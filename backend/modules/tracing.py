@@ -0,0 +1,81 @@
+"""
+Optional tracing spans
+TRACING selects the backend:
+    ""     - off (spans cost one settings check)
+    "log"  - finished spans are logged with their duration and trace id
+    "otel" - OpenTelemetry; needs opentelemetry-api. With opentelemetry-sdk
+             installed and no provider configured, spans are exported over
+             OTLP (opentelemetry-exporter-otlp) or printed to the console
+"""
+import contextvars
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# (trace id, span name) of the enclosing "log" span
+_current: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+_tracer = None
+
+
+def _otel_tracer():
+    global _tracer
+    if _tracer is None:
+        from opentelemetry import trace
+
+        try:
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+            if not isinstance(trace.get_tracer_provider(), TracerProvider):
+                try:
+                    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                    exporter = OTLPSpanExporter()
+                except ImportError:
+                    exporter = ConsoleSpanExporter()
+                provider = TracerProvider()
+                provider.add_span_processor(BatchSpanProcessor(exporter))
+                trace.set_tracer_provider(provider)
+                logger.info(f"Tracing spans exported with {type(exporter).__name__}")
+        except ImportError:
+            logger.info("opentelemetry-sdk not installed; using the globally configured tracer provider")
+        _tracer = trace.get_tracer("meeting-tracker")
+    return _tracer
+
+
+def enabled() -> bool:
+    return bool(settings.tracing)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """Time a block as a span nested under the current one (no-op when TRACING is off)"""
+    if settings.tracing == "otel":
+        with _otel_tracer().start_as_current_span(name, attributes=attributes):
+            yield
+        return
+    if settings.tracing != "log":
+        yield
+        return
+
+    parent: Optional[tuple] = _current.get()
+    trace_id = parent[0] if parent else uuid.uuid4().hex[:16]
+    token = _current.set((trace_id, name))
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        elapsed = (time.perf_counter() - start) * 1000
+        details = " ".join(f"{k}={v}" for k, v in attributes.items())
+        logger.info(
+            f"span trace={trace_id} name={name} parent={parent[1] if parent else '-'} "
+            f"ms={elapsed:.1f}{' error=' + error if error else ''}{' ' + details if details else ''}"
+        )
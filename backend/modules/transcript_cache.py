@@ -0,0 +1,155 @@
+"""
+Persistent transcript cache
+Whisper output keyed by (audio hash, model, language, decoding options),
+stored in the database with LRU eviction bounded by size and entry count
+"""
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func
+from config import settings
+from database import SessionLocal, TranscriptCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_stats_lock = threading.Lock()
+_hits = 0
+_misses = 0
+_evictions = 0
+
+
+def make_key(audio_hash: str, model: str, language: Optional[str], options: Dict[str, Any]) -> str:
+    """Stable cache key for one audio file under one set of decoding settings"""
+    payload = json.dumps(
+        {"audio": audio_hash, "model": model, "language": language, "options": options},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get(key: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    Return (transcript, segments) and bump the LRU timestamp, or None
+    Entries cached before segments were stored come back as one untimed segment
+    """
+    global _hits, _misses
+    db = SessionLocal()
+    try:
+        entry = db.query(TranscriptCacheEntry).filter(TranscriptCacheEntry.key == key).first()
+        with _stats_lock:
+            if entry is None:
+                _misses += 1
+                return None
+            _hits += 1
+        entry.hits = (entry.hits or 0) + 1
+        entry.last_used_at = datetime.utcnow()
+        db.commit()
+        if entry.segments:
+            segments = json.loads(entry.segments)
+        else:
+            segments = [{"start": 0.0, "end": None, "text": entry.transcript,
+                         "avg_logprob": None, "no_speech_prob": None}] if entry.transcript else []
+        return entry.transcript, segments
+    finally:
+        db.close()
+
+
+def put(
+    key: str,
+    audio_hash: str,
+    model: str,
+    language: Optional[str],
+    transcript: str,
+    segments: Optional[List[Dict[str, Any]]] = None
+):
+    """Store a transcript (and its segments), then evict least-recently-used entries over budget"""
+    db = SessionLocal()
+    try:
+        entry = db.query(TranscriptCacheEntry).filter(TranscriptCacheEntry.key == key).first()
+        if entry is None:
+            entry = TranscriptCacheEntry(key=key)
+            db.add(entry)
+        entry.audio_hash = audio_hash
+        entry.model = model
+        entry.language = language
+        entry.transcript = transcript
+        entry.segments = json.dumps(segments) if segments is not None else None
+        entry.size_bytes = len(transcript.encode("utf-8")) + len((entry.segments or "").encode("utf-8"))
+        entry.last_used_at = datetime.utcnow()
+        db.commit()
+        _evict(db)
+    finally:
+        db.close()
+
+
+def _evict(db):
+    """Drop oldest-used entries until both size and count limits hold"""
+    global _evictions
+    max_bytes = settings.transcript_cache_max_mb * 1024 * 1024
+    max_entries = settings.transcript_cache_max_entries
+
+    count, total = db.query(
+        func.count(TranscriptCacheEntry.key),
+        func.coalesce(func.sum(TranscriptCacheEntry.size_bytes), 0)
+    ).one()
+    if count <= max_entries and total <= max_bytes:
+        return
+
+    evicted = 0
+    oldest = (
+        db.query(TranscriptCacheEntry.key, TranscriptCacheEntry.size_bytes)
+        .order_by(TranscriptCacheEntry.last_used_at.asc())
+        .all()
+    )
+    doomed = []
+    for key, size in oldest:
+        if count <= max_entries and total <= max_bytes:
+            break
+        doomed.append(key)
+        count -= 1
+        total -= size
+        evicted += 1
+
+    if doomed:
+        db.query(TranscriptCacheEntry).filter(
+            TranscriptCacheEntry.key.in_(doomed)
+        ).delete(synchronize_session=False)
+        db.commit()
+        with _stats_lock:
+            _evictions += evicted
+        logger.info(f"Transcript cache evicted {evicted} entries")
+
+
+def counters() -> Dict[str, int]:
+    """Hit/miss counters only (no database query)"""
+    with _stats_lock:
+        return {"hits": _hits, "misses": _misses}
+
+
+def stats() -> Dict[str, Any]:
+    """Hit/miss counters since startup plus current cache footprint"""
+    db = SessionLocal()
+    try:
+        count, total = db.query(
+            func.count(TranscriptCacheEntry.key),
+            func.coalesce(func.sum(TranscriptCacheEntry.size_bytes), 0)
+        ).one()
+    finally:
+        db.close()
+
+    with _stats_lock:
+        lookups = _hits + _misses
+        return {
+            "enabled": settings.transcript_cache_enabled,
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": round(_hits / lookups, 3) if lookups else 0.0,
+            "evictions": _evictions,
+            "entries": count,
+            "size_bytes": total,
+            "max_entries": settings.transcript_cache_max_entries,
+            "max_bytes": settings.transcript_cache_max_mb * 1024 * 1024,
+        }
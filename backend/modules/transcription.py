@@ -1,59 +1,356 @@
 """
 Transcription module using OpenAI Whisper
 Converts audio to text locally (no API costs)
-100% Python virtual environment - uses Whisper's built-in audio loading
+Audio is decoded once to a shared int16 PCM file (modules/audio.py)
+Model instances come from the pool in modules/whisper_pool.py
 """
+import asyncio
+import hashlib
 import logging
-import whisper
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from config import settings
+from modules import audio as audio_io, metrics, transcript_cache, vad
+from modules.chunking import SAMPLE_RATE, plan_chunks, stitch_texts
+from modules.whisper_pool import load_model, model_manager, resolve_backend
 
 logger = logging.getLogger(__name__)
 
-# Initialize Whisper model (lazy loading)
-_model = None
-
-def get_whisper_model():
-    """Get or initialize Whisper model"""
-    global _model
-    if _model is None:
-        logger.info("Loading Whisper model (base)...")
-        # Use 'base' model for speed, 'small' or 'medium' for better accuracy
-        # Model will be downloaded to ~/.cache/whisper on first run
-        _model = whisper.load_model("base")
-        logger.info("Whisper model loaded successfully")
-    return _model
-
-async def transcribe_audio(file_path: str) -> str:
+WHISPER_LANGUAGE = "en"  # Set to None for auto-detection
+
+# Receives {"start", "end", "text", "progress"} as transcription advances
+SegmentCallback = Callable[[Dict[str, Any]], None]
+
+# Stored segment: {"start", "end", "text", "avg_logprob", "no_speech_prob"}
+Segment = Dict[str, Any]
+
+# What a chunk worker transcribes: (PCM file path, start, end) sample range,
+# opened there as a memory map, or an in-memory array (VAD-compressed audio)
+ChunkSource = Union[Tuple[str, int, int], np.ndarray]
+
+# Dedicated executor for Whisper so inference never runs on the event loop.
+# PyTorch releases the GIL during inference, so threads scale across cores.
+_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1,
+    thread_name_prefix="whisper"
+)
+
+# Process pool for chunked transcription (created on first long recording)
+_chunk_pool = None
+_chunk_pool_lock = threading.Lock()
+
+# Per-worker models inside chunk pool processes, by model name
+_worker_models: Dict[str, Any] = {}
+
+def _transcribe_sync(audio: np.ndarray, model_name: Optional[str] = None) -> dict:
+    """Blocking Whisper call - runs on the dedicated executor"""
+    # Each concurrent call gets its own instance from the pool
+    with model_manager.checkout(model_name) as model:
+        return model.transcribe(audio_io.to_float32(audio), language=WHISPER_LANGUAGE)
+
+def _init_chunk_worker(model_name: str, threads: int):
+    """Process pool initializer - each worker loads its own model once"""
+    import torch
+    torch.set_num_threads(threads)
+    _worker_models[model_name] = load_model(model_name)
+
+def _segments(result: Dict[str, Any], offset: float = 0.0) -> List[Segment]:
+    """Whisper result segments -> stored segment dicts, shifted by `offset` seconds"""
+    return [
+        {
+            "start": round(seg["start"] + offset, 2),
+            "end": round(seg["end"] + offset, 2),
+            "text": seg["text"].strip(),
+            "avg_logprob": seg.get("avg_logprob"),
+            "no_speech_prob": seg.get("no_speech_prob"),
+        }
+        for seg in result.get("segments", [])
+        if seg["text"].strip()
+    ]
+
+def _transcribe_chunk(source: ChunkSource, model_name: str) -> Tuple[str, List[Segment]]:
+    """Transcribe one chunk inside a pool worker (segment times relative to the chunk)"""
+    model = _worker_models.get(model_name)
+    if model is None:
+        model = _worker_models[model_name] = load_model(model_name)
+    if isinstance(source, tuple):
+        path, start, end = source
+        audio = audio_io.open_pcm(path)[start:end]
+    else:
+        audio = source
+    result = model.transcribe(audio_io.to_float32(audio), language=WHISPER_LANGUAGE)
+    return result["text"].strip(), _segments(result)
+
+def get_chunk_pool() -> ProcessPoolExecutor:
+    """Get or start the chunk transcription process pool"""
+    global _chunk_pool
+    with _chunk_pool_lock:
+        if _chunk_pool is None:
+            workers = max(1, settings.whisper_chunk_workers)
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            logger.info(f"Starting {workers} Whisper chunk worker(s), {threads} thread(s) each")
+            _chunk_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chunk_worker,
+                initargs=(settings.whisper_model, threads)
+            )
+    return _chunk_pool
+
+def shutdown_chunk_pool():
+    """Stop chunk worker processes"""
+    global _chunk_pool
+    with _chunk_pool_lock:
+        if _chunk_pool is not None:
+            _chunk_pool.shutdown(cancel_futures=True)
+            _chunk_pool = None
+
+async def _transcribe_chunked(
+    audio: np.ndarray,
+    model_name: str,
+    on_segment: Optional[SegmentCallback] = None,
+    pcm_file: Optional[str] = None
+) -> Tuple[str, List[Segment]]:
     """
-    Transcribe full audio file to text using Whisper
+    Split decoded audio at quiet points and transcribe windows in parallel
+    Windows are awaited in order, so `on_segment` sees text as soon as every
+    earlier window is done. Segments starting in a window's overlap tail are
+    dropped; the next window covers them.
     
-    Args:
-        file_path: Path to audio file (MP3, MP4, WAV, M4A)
-        
-    Returns:
-        Full transcript as string
+    When `audio` is the PCM file at `pcm_file`, workers map their window from
+    the file instead of receiving a pickled copy.
     """
+    chunks = plan_chunks(
+        audio,
+        chunk_seconds=settings.whisper_chunk_seconds,
+        overlap_seconds=settings.whisper_chunk_overlap_seconds
+    )
+    logger.info(f"Chunked transcription: {len(chunks)} windows")
+    
+    loop = asyncio.get_running_loop()
+    pool = get_chunk_pool()
+    futures = [
+        loop.run_in_executor(
+            pool, _transcribe_chunk,
+            (pcm_file, start, end) if pcm_file else audio[start:end],
+            model_name
+        )
+        for start, end in chunks
+    ]
+    
+    stitched = ""
+    segments: List[Segment] = []
     try:
-        model = get_whisper_model()
-        
-        logger.info(f"Transcribing: {file_path}")
-        
-        # Use model.transcribe() directly - this processes the FULL audio file
-        result = model.transcribe(
-            file_path,
-            language="en",  # Set to None for auto-detection
-            fp16=False  # Use FP32 for CPU compatibility
+        for i, ((start, end), future) in enumerate(zip(chunks, futures)):
+            text, chunk_segments = await future
+            next_start = chunks[i + 1][0] / SAMPLE_RATE if i + 1 < len(chunks) else None
+            offset = start / SAMPLE_RATE
+            segments.extend(
+                seg for seg in _segments({"segments": chunk_segments}, offset)
+                if next_start is None or seg["start"] < next_start
+            )
+            previous = stitched
+            stitched = stitch_texts([stitched, text])
+            if on_segment:
+                on_segment({
+                    "start": round(start / SAMPLE_RATE, 2),
+                    "end": round(end / SAMPLE_RATE, 2),
+                    "text": stitched[len(previous):].strip(),
+                    "progress": end / len(audio)
+                })
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return stitched, segments
+
+def decoding_options() -> Dict[str, Any]:
+    """Settings that change Whisper output - part of the transcript cache key"""
+    return {
+        "backend": resolve_backend(),
+        "device": settings.whisper_device,
+        "compute_type": settings.whisper_compute_type if resolve_backend() == "faster-whisper" else None,
+        "chunking": settings.whisper_chunking,
+        "chunk_min_seconds": settings.whisper_chunk_min_seconds,
+        "chunk_seconds": settings.whisper_chunk_seconds,
+        "chunk_overlap_seconds": settings.whisper_chunk_overlap_seconds,
+        # Only present when enabled so existing cache entries stay valid
+        **({"vad": {
+            "backend": settings.vad_backend,
+            "threshold_db": settings.vad_threshold_db,
+            "pad_seconds": settings.vad_pad_seconds,
+            "min_silence_seconds": settings.vad_min_silence_seconds,
+            "min_speech_seconds": settings.vad_min_speech_seconds,
+            "gap_seconds": settings.vad_gap_seconds,
+        }} if settings.vad_enabled else {}),
+    }
+
+async def transcribe_window(audio: np.ndarray, model_name: Optional[str] = None) -> List[Segment]:
+    """
+    Transcribe an in-memory 16 kHz window (float32 or int16 PCM) with the pooled models
+    (live sessions); segment times are relative to the window
+    """
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_executor, _transcribe_sync, audio, model_name)
+    return _segments(result)
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 of a file on disk, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+async def _transcribe_pcm(
+    pcm_file: Path,
+    model_name: str,
+    on_segment: Optional[SegmentCallback],
+    on_vad: Optional[Callable[[Dict[str, Any]], None]]
+) -> Tuple[str, List[Segment]]:
+    """VAD (optional) and Whisper over a decoded PCM file; segment times are in the original audio"""
+    loop = asyncio.get_running_loop()
+    audio = audio_io.open_pcm(pcm_file)
+    original_duration = len(audio) / SAMPLE_RATE
+    time_map = None
+    
+    # Drop non-speech before Whisper; segment times are mapped back to the original
+    if settings.vad_enabled:
+        vad_result = await loop.run_in_executor(_executor, vad.compress, audio)
+        report = vad_result.to_dict()
+        logger.info(
+            f"VAD ({report['backend']}): kept {report['kept_seconds']}s of "
+            f"{report['original_seconds']}s, skipped {report['skipped_ratio']:.0%}"
         )
+        if on_vad:
+            on_vad(report)
+        audio = vad_result.audio
+        time_map = vad_result.time_map
+        if on_segment:
+            report_segment = on_segment
+            
+            def on_segment(segment: Dict[str, Any]):
+                report_segment({
+                    **segment,
+                    "start": round(time_map.to_original(segment["start"]), 2),
+                    "end": round(time_map.to_original(segment["end"]), 2) if segment["end"] is not None else None,
+                })
+    
+    duration = len(audio) / SAMPLE_RATE
+    whisper_started = time.perf_counter()
+    
+    if duration == 0:
+        logger.info("No speech detected")
+        full_transcript, segments = "", []
+    elif settings.whisper_chunking and duration >= settings.whisper_chunk_min_seconds:
+        full_transcript, segments = await _transcribe_chunked(
+            audio, model_name, on_segment,
+            # VAD output is a new in-memory array; otherwise workers map the file
+            pcm_file=str(pcm_file) if time_map is None else None
+        )
+    else:
+        result = await loop.run_in_executor(_executor, _transcribe_sync, audio, model_name)
+        
+        # Whisper has no per-segment callback; short recordings report on completion
+        if on_segment:
+            for segment in result.get("segments", []):
+                on_segment({
+                    "start": round(segment["start"], 2),
+                    "end": round(segment["end"], 2),
+                    "text": segment["text"].strip(),
+                    "progress": min(1.0, segment["end"] / max(duration, 1e-6))
+                })
         
         # Extract full transcript
         full_transcript = result["text"].strip()
+        segments = _segments(result)
         
         # Log detected language
         detected_language = result.get("language", "en")
         logger.info(f"Detected language: {detected_language}")
-        logger.info(f"Transcription complete. {len(full_transcript)} characters")
+    
+    if original_duration > 0:
+        # Against the original length, so VAD savings show up as a lower RTF
+        metrics.WHISPER_RTF.observe((time.perf_counter() - whisper_started) / original_duration, model=model_name)
+    
+    if time_map is not None:
+        for segment in segments:
+            segment["start"] = round(time_map.to_original(segment["start"]), 2)
+            segment["end"] = round(time_map.to_original(segment["end"]), 2)
+    
+    return full_transcript, segments
+
+async def transcribe_audio(
+    file_path: str,
+    audio_hash: Optional[str] = None,
+    on_segment: Optional[SegmentCallback] = None,
+    model_name: Optional[str] = None,
+    on_vad: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> str:
+    """Transcribe full audio file to text (see transcribe_with_segments)"""
+    transcript, _ = await transcribe_with_segments(file_path, audio_hash, on_segment, model_name, on_vad)
+    return transcript
+
+async def transcribe_with_segments(
+    file_path: str,
+    audio_hash: Optional[str] = None,
+    on_segment: Optional[SegmentCallback] = None,
+    model_name: Optional[str] = None,
+    on_vad: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Tuple[str, List[Segment]]:
+    """
+    Transcribe full audio file using Whisper, keeping timestamped segments
+    
+    Args:
+        file_path: Path to audio file (MP3, MP4, WAV, M4A)
+        audio_hash: SHA-256 of the file, if already known (used for caching)
+        on_segment: Called with each finished piece of transcript, in order
+        model_name: Whisper model size (defaults to WHISPER_MODEL)
+        on_vad: Called with the VAD report (kept/skipped seconds) when VAD_ENABLED
+        
+    Returns:
+        (full transcript, segments with start/end in seconds of the original audio)
+    """
+    try:
+        logger.info(f"Transcribing: {file_path}")
+        
+        loop = asyncio.get_running_loop()
+        model_name = model_name or settings.whisper_model
+        
+        cache_key = None
+        if settings.transcript_cache_enabled:
+            if audio_hash is None:
+                audio_hash = await loop.run_in_executor(_executor, hash_file, file_path)
+            cache_key = transcript_cache.make_key(
+                audio_hash, model_name, WHISPER_LANGUAGE, decoding_options()
+            )
+            cached = await asyncio.to_thread(transcript_cache.get, cache_key)
+            if cached is not None:
+                logger.info(f"Transcript cache hit for {file_path}")
+                transcript, segments = cached
+                if on_segment:
+                    on_segment({"start": 0.0, "end": None, "text": transcript, "progress": 1.0})
+                return transcript, segments
+        
+        # Decode once; every stage below reads views of the same PCM file
+        async with audio_io.decoded(file_path, audio_hash) as pcm_file:
+            full_transcript, segments = await _transcribe_pcm(pcm_file, model_name, on_segment, on_vad)
+        
+        logger.info(f"Transcription complete. {len(full_transcript)} characters, {len(segments)} segments")
+        
+        if cache_key is not None:
+            await asyncio.to_thread(
+                transcript_cache.put, cache_key, audio_hash,
+                model_name, WHISPER_LANGUAGE, full_transcript, segments
+            )
         
-        return full_transcript
+        return full_transcript, segments
         
     except Exception as e:
         logger.error(f"Transcription error: {str(e)}")
@@ -0,0 +1,220 @@
+"""
+Voice activity detection pre-pass
+Finds speech regions in decoded audio so Whisper only decodes speech.
+Non-speech is cut down to a short gap and a TimeMap translates timestamps in
+the compressed audio back to the original recording.
+
+Detectors: "energy" (adaptive RMS threshold, NumPy only) and "silero"
+(silero-vad model, used when the silero-vad package is installed)
+"""
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config import settings
+from modules.audio import to_float32
+from modules.chunking import FRAME_SECONDS, SAMPLE_RATE, frame_energy
+
+logger = logging.getLogger(__name__)
+
+# (start, end) sample offsets of speech in the original audio
+Region = Tuple[int, int]
+Detector = Callable[[np.ndarray], List[Region]]
+
+# Energy never counts as speech below this level (-50 dBFS)
+ABSOLUTE_FLOOR = 10 ** (-50 / 20)
+
+
+def _merge(regions: List[Region], total: int, pad: int, min_gap: int, min_speech: int) -> List[Region]:
+    """
+    Join regions separated by less than min_gap (syllable and breath pauses),
+    drop what is still shorter than min_speech, then pad
+    """
+    merged: List[Region] = []
+    for start, end in regions:
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    padded: List[Region] = []
+    for start, end in merged:
+        if end - start < min_speech:
+            continue
+        start, end = max(0, start - pad), min(total, end + pad)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def energy_regions(audio: np.ndarray, sample_rate: int = SAMPLE_RATE) -> List[Region]:
+    """
+    Speech = frames whose RMS is VAD_THRESHOLD_DB above the recording's noise
+    floor (10th percentile frame energy)
+    """
+    energy = frame_energy(audio, sample_rate)
+    if len(energy) == 0:
+        return []
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    floor = float(np.percentile(energy, 10))
+    threshold = max(ABSOLUTE_FLOOR, floor * 10 ** (settings.vad_threshold_db / 20))
+    active = energy > threshold
+
+    # Rising/falling edges of the active mask -> frame runs
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+    return [(int(s) * frame, int(e) * frame) for s, e in zip(edges[::2], edges[1::2])]
+
+
+class SileroDetector:
+    """silero-vad model, loaded once per process"""
+
+    def __init__(self):
+        self._model = None
+        self._lock = threading.Lock()
+
+    def __call__(self, audio: np.ndarray) -> List[Region]:
+        import torch
+        from silero_vad import get_speech_timestamps, load_silero_vad
+
+        with self._lock:
+            if self._model is None:
+                logger.info("Loading silero-vad model...")
+                self._model = load_silero_vad()
+            timestamps = get_speech_timestamps(
+                torch.from_numpy(np.ascontiguousarray(to_float32(audio))),
+                self._model,
+                sampling_rate=SAMPLE_RATE
+            )
+        return [(int(t["start"]), int(t["end"])) for t in timestamps]
+
+
+def silero_available() -> bool:
+    try:
+        import silero_vad  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+DETECTORS: Dict[str, Detector] = {
+    "energy": energy_regions,
+    "silero": SileroDetector(),
+}
+
+
+def register_detector(name: str, detector: Detector):
+    """Plug in another detector: audio (16 kHz float32 or int16 PCM) -> speech sample ranges"""
+    DETECTORS[name] = detector
+
+
+def get_detector(name: Optional[str] = None) -> Detector:
+    name = name or settings.vad_backend
+    if name == "silero" and not silero_available():
+        logger.warning("silero-vad not installed, falling back to the energy detector")
+        name = "energy"
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown VAD backend: {name}")
+    return DETECTORS[name]
+
+
+class TimeMap:
+    """Maps times in the compressed audio back to the original recording"""
+
+    def __init__(self, pieces: List[Tuple[int, int, int]], sample_rate: int = SAMPLE_RATE):
+        # (compressed start, original start, length) in samples, ascending
+        self.pieces = pieces
+        self.sample_rate = sample_rate
+        self._starts = [p[0] for p in pieces]
+
+    def to_original(self, seconds: float) -> float:
+        if not self.pieces:
+            return seconds
+        sample = int(round(seconds * self.sample_rate))
+        i = max(0, bisect.bisect_right(self._starts, sample) - 1)
+        compressed_start, original_start, length = self.pieces[i]
+        offset = min(max(0, sample - compressed_start), length)
+        return (original_start + offset) / self.sample_rate
+
+
+class VADResult:
+    """Compressed audio plus what was removed"""
+
+    def __init__(self, audio: np.ndarray, time_map: TimeMap, original_samples: int, backend: str):
+        self.audio = audio
+        self.time_map = time_map
+        self.original_seconds = original_samples / SAMPLE_RATE
+        self.kept_seconds = len(audio) / SAMPLE_RATE
+        self.backend = backend
+
+    @property
+    def skipped_seconds(self) -> float:
+        return max(0.0, self.original_seconds - self.kept_seconds)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "backend": self.backend,
+            "regions": len(self.time_map.pieces),
+            "original_seconds": round(self.original_seconds, 2),
+            "kept_seconds": round(self.kept_seconds, 2),
+            "skipped_seconds": round(self.skipped_seconds, 2),
+            "skipped_ratio": round(self.skipped_seconds / self.original_seconds, 3) if self.original_seconds else 0.0,
+        }
+
+
+_stats_lock = threading.Lock()
+_stats = {"files": 0, "original_seconds": 0.0, "kept_seconds": 0.0}
+
+
+def compress(audio: np.ndarray, backend: Optional[str] = None) -> VADResult:
+    """
+    Keep only speech, joined by VAD_GAP_SECONDS of silence so Whisper still
+    sees a pause between regions
+    """
+    backend = backend or settings.vad_backend
+    detector = get_detector(backend)
+    pad = int(settings.vad_pad_seconds * SAMPLE_RATE)
+    regions = _merge(
+        detector(audio),
+        len(audio),
+        pad=pad,
+        min_gap=int(settings.vad_min_silence_seconds * SAMPLE_RATE),
+        min_speech=int(settings.vad_min_speech_seconds * SAMPLE_RATE)
+    )
+
+    gap = np.zeros(int(settings.vad_gap_seconds * SAMPLE_RATE), dtype=audio.dtype)
+    parts: List[np.ndarray] = []
+    pieces: List[Tuple[int, int, int]] = []
+    position = 0
+    for i, (start, end) in enumerate(regions):
+        if i:
+            parts.append(gap)
+            position += len(gap)
+        parts.append(audio[start:end])
+        pieces.append((position, start, end - start))
+        position += end - start
+
+    compressed = np.concatenate(parts) if parts else np.zeros(0, dtype=audio.dtype)
+    result = VADResult(compressed, TimeMap(pieces), len(audio), backend)
+    with _stats_lock:
+        _stats["files"] += 1
+        _stats["original_seconds"] += result.original_seconds
+        _stats["kept_seconds"] += result.kept_seconds
+    return result
+
+
+def stats() -> Dict[str, float]:
+    """Cumulative audio removed by the VAD pre-pass"""
+    with _stats_lock:
+        original = _stats["original_seconds"]
+        kept = _stats["kept_seconds"]
+        return {
+            "enabled": settings.vad_enabled,
+            "backend": settings.vad_backend,
+            "files": _stats["files"],
+            "original_seconds": round(original, 1),
+            "skipped_seconds": round(original - kept, 1),
+            "skipped_ratio": round((original - kept) / original, 3) if original else 0.0,
+        }
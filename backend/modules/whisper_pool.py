@@ -0,0 +1,247 @@
+"""
+Whisper model manager
+Holds a pool of N loaded instances per model size with checkout/checkin,
+preloads configured models at startup and reports load time and memory.
+Uses faster-whisper (CTranslate2, int8 on CPU) when installed and enabled,
+otherwise openai-whisper.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process (0 if unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def faster_whisper_available() -> bool:
+    try:
+        import faster_whisper  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def resolve_backend() -> str:
+    """Pick the backend from WHISPER_BACKEND (auto prefers faster-whisper)"""
+    backend = settings.whisper_backend
+    if backend == "auto":
+        return "faster-whisper" if faster_whisper_available() else "openai"
+    if backend == "faster-whisper" and not faster_whisper_available():
+        logger.warning("faster-whisper not installed, falling back to openai-whisper")
+        return "openai"
+    return backend
+
+
+class OpenAIWhisperModel:
+    """openai-whisper wrapper"""
+
+    backend = "openai"
+
+    def __init__(self, name: str):
+        import whisper
+        # Model will be downloaded to ~/.cache/whisper on first run
+        self.model = whisper.load_model(name, device=settings.whisper_device)
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str]) -> Dict[str, Any]:
+        return self.model.transcribe(
+            audio,
+            language=language,
+            fp16=settings.whisper_device == "cuda"  # FP32 on CPU
+        )
+
+    def param_bytes(self) -> int:
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+
+
+class FasterWhisperModel:
+    """faster-whisper wrapper returning openai-whisper shaped results"""
+
+    backend = "faster-whisper"
+
+    def __init__(self, name: str):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(
+            name,
+            device=settings.whisper_device,
+            compute_type=settings.whisper_compute_type,
+            cpu_threads=max(1, (os.cpu_count() or 1) // max(1, settings.whisper_pool_size))
+        )
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str]) -> Dict[str, Any]:
+        segments, info = self.model.transcribe(audio, language=language)
+        result_segments = [
+            {
+                "id": i,
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "avg_logprob": seg.avg_logprob,
+                "no_speech_prob": seg.no_speech_prob,
+            }
+            for i, seg in enumerate(segments)
+        ]
+        return {
+            "text": "".join(seg["text"] for seg in result_segments),
+            "segments": result_segments,
+            "language": info.language,
+        }
+
+    def param_bytes(self) -> int:
+        return 0
+
+
+def load_model(name: str, backend: Optional[str] = None):
+    """Load one model instance with the given (or configured) backend"""
+    backend = backend or resolve_backend()
+    if backend == "faster-whisper":
+        return FasterWhisperModel(name)
+    return OpenAIWhisperModel(name)
+
+
+class ModelPool:
+    """N interchangeable instances of one model size"""
+
+    def __init__(self, name: str, size: int, backend: str):
+        self.name = name
+        self.size = max(1, size)
+        self.backend = backend
+        self._idle: "queue.Queue" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self.load_seconds: List[float] = []
+        self.memory_bytes: List[int] = []
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+
+    def _create(self):
+        logger.info(f"Loading Whisper model ({self.name}, {self.backend})...")
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        model = load_model(self.name, self.backend)
+        elapsed = time.perf_counter() - start
+        memory = max(_rss_bytes() - rss_before, model.param_bytes())
+        self.load_seconds.append(elapsed)
+        self.memory_bytes.append(memory)
+        logger.info(f"Whisper model {self.name} loaded in {elapsed:.1f}s (~{memory / 1e6:.0f} MB)")
+        return model
+
+    def preload(self):
+        """Load every instance up front"""
+        while True:
+            with self._lock:
+                if self._created >= self.size:
+                    return
+                self._created += 1
+            try:
+                self._idle.put(self._create())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    @contextmanager
+    def checkout(self) -> Iterator[Any]:
+        """Borrow an instance; loads lazily up to `size`, then waits"""
+        start = time.perf_counter()
+        model = None
+        try:
+            model = self._idle.get_nowait()
+        except queue.Empty:
+            create = False
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+            if create:
+                try:
+                    model = self._create()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                model = self._idle.get()
+
+        self.checkouts += 1
+        self.wait_seconds += time.perf_counter() - start
+        try:
+            yield model
+        finally:
+            self._idle.put(model)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.name,
+            "backend": self.backend,
+            "pool_size": self.size,
+            "loaded": self._created,
+            "idle": self._idle.qsize(),
+            "checkouts": self.checkouts,
+            "avg_wait_seconds": round(self.wait_seconds / self.checkouts, 3) if self.checkouts else 0.0,
+            "load_seconds": [round(s, 2) for s in self.load_seconds],
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+class WhisperModelManager:
+    """One ModelPool per allowed model size"""
+
+    def __init__(self):
+        self._pools: Dict[str, ModelPool] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def default_model(self) -> str:
+        return settings.whisper_model
+
+    def allowed_models(self) -> List[str]:
+        extra = [m.strip() for m in settings.whisper_models.split(",") if m.strip()]
+        return [self.default_model] + [m for m in extra if m != self.default_model]
+
+    def pool(self, name: Optional[str] = None) -> ModelPool:
+        name = name or self.default_model
+        if name not in self.allowed_models():
+            raise ValueError(f"Whisper model '{name}' is not enabled. Allowed: {', '.join(self.allowed_models())}")
+        with self._lock:
+            if name not in self._pools:
+                self._pools[name] = ModelPool(name, settings.whisper_pool_size, resolve_backend())
+            return self._pools[name]
+
+    @contextmanager
+    def checkout(self, name: Optional[str] = None) -> Iterator[Any]:
+        with self.pool(name).checkout() as model:
+            yield model
+
+    def preload(self):
+        """Load all configured models (blocking - run off the event loop)"""
+        for name in self.allowed_models():
+            self.pool(name).preload()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pools = list(self._pools.values())
+        return {
+            "default": self.default_model,
+            "allowed": self.allowed_models(),
+            "backend": resolve_backend(),
+            "device": settings.whisper_device,
+            "models": [p.stats() for p in pools],
+        }
+
+
+# Global manager instance
+model_manager = WhisperModelManager()